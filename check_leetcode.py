@@ -1,9 +1,25 @@
 import os
+import time
+import asyncio
 import argparse
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from typing import Optional
 from dotenv import load_dotenv
 
 from src.leetcode_service import LeetCodeService
 from src.discord_bot import DiscordBot
+from src.webhook_sender import WebhookSender
+from src.stats_cache import StatsCache
+from src.circuit_breaker import CircuitBreaker
+from src.poll_scheduler import PollScheduler
+from src.onboarding import BulkOnboarder
+from src.trickle_poller import TricklePoller
+from src.profiler import NullProfiler, Profiler
+from src.lease import FileLease
+from src.scoring import load_scoring_scheme
+from src.stats_sources import create_sources
 
 load_dotenv()
 
@@ -11,22 +27,119 @@ load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 CHANNEL_ID = int(os.getenv("CHANNEL_ID", "0").split()[0])
 LEETCODE_API_URL = os.getenv("LEETCODE_API_URL")
-DB_PATH = os.path.join(os.path.dirname(__file__), "db.json")
+WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "db.json"))
+STATS_CACHE_PATH = os.getenv(
+    "STATS_CACHE_PATH", os.path.join(os.path.dirname(__file__), "stats_cache.json")
+)
+PROBLEM_CACHE_PATH = os.getenv(
+    "PROBLEM_CACHE_PATH", os.path.join(os.path.dirname(__file__), "problem_cache.json")
+)
+POLL_SCHEDULE_PATH = os.getenv(
+    "POLL_SCHEDULE_PATH", os.path.join(os.path.dirname(__file__), "poll_schedule.json")
+)
+# Fraction of recent LeetCode API calls that must fail to open the circuit
+API_FAILURE_THRESHOLD = float(os.getenv("API_FAILURE_THRESHOLD", "0.5"))
+# Optional JSON scoring scheme; stored points are rescored when its version changes
+SCORING_SCHEME_PATH = os.getenv(
+    "SCORING_SCHEME_PATH", os.path.join(os.path.dirname(__file__), "scoring.json")
+)
+SCORING_SCHEME = load_scoring_scheme(SCORING_SCHEME_PATH)
+LEASE_PATH = os.getenv("LEASE_PATH", f"{DB_PATH}.lease")
+# Seconds a crashed replica keeps the lease before a standby takes over
+LEASE_TTL = float(os.getenv("LEASE_TTL", "30"))
+# Other platforms to count gains from, e.g. "codeforces,atcoder"
+STATS_SOURCES = os.getenv("STATS_SOURCES", "").split(",")
+# Seconds the background poller takes to refresh every user once
+POLL_PERIOD = float(os.getenv("POLL_PERIOD", str(24 * 60 * 60)))
+# Stats refreshed by the background poller within this window are not refetched.
+# It must cover a whole poll cycle, or users polled early in the cycle are
+# refetched anyway; the extra hour allows for a cycle that runs late.
+MAX_STATS_AGE = float(os.getenv("MAX_STATS_AGE", str(POLL_PERIOD + 60 * 60)))
 
 
-async def execute_bot_logic(discord_bot: DiscordBot):
-    """Execute the main bot logic."""
-    service = LeetCodeService(LEETCODE_API_URL, DB_PATH)
-    users_to_tag, leaderboard, is_monday = service.check_and_update_progress(
-        update_db=True
+def create_service(
+    incremental: bool = False, adaptive: bool = False, profiler=None, fence=None
+) -> LeetCodeService:
+    """Create the service, reading warm stats left by the background poller."""
+    return LeetCodeService(
+        LEETCODE_API_URL,
+        DB_PATH,
+        stats_cache=StatsCache(STATS_CACHE_PATH).load(),
+        max_stats_age=MAX_STATS_AGE,
+        incremental=incremental,
+        problem_cache_path=PROBLEM_CACHE_PATH,
+        circuit_breaker=CircuitBreaker(failure_threshold=API_FAILURE_THRESHOLD),
+        poll_scheduler=PollScheduler(POLL_SCHEDULE_PATH).load() if adaptive else None,
+        profiler=profiler,
+        fence=fence,
+        scoring_scheme=SCORING_SCHEME,
+        sources=create_sources(STATS_SOURCES),
+    )
+
+
+def run_progress_check(
+    service: LeetCodeService,
+    update_db: bool,
+    stream: bool,
+    deadline_minutes: Optional[float] = None,
+):
+    """Run the progress check in batch or streaming mode."""
+    if stream:
+        return service.stream_and_update_progress(update_db=update_db)
+    deadline = None
+    if deadline_minutes is not None:
+        deadline = time.time() + deadline_minutes * 60
+    return service.check_and_update_progress(update_db=update_db, deadline=deadline)
+
+
+async def run_progress_check_async(
+    service: LeetCodeService,
+    update_db: bool,
+    stream: bool,
+    deadline_minutes: Optional[float] = None,
+):
+    """Run the progress check without blocking the event loop."""
+    if stream:
+        return await asyncio.to_thread(
+            service.stream_and_update_progress, update_db=update_db
+        )
+    deadline = None
+    if deadline_minutes is not None:
+        deadline = time.time() + deadline_minutes * 60
+    return await service.check_and_update_progress_async(
+        update_db=update_db, deadline=deadline
     )
 
-    # Send Monday leaderboard if applicable
+
+async def execute_bot_logic(
+    discord_bot: DiscordBot,
+    stream: bool = False,
+    incremental: bool = False,
+    adaptive: bool = False,
+    deadline_minutes: Optional[float] = None,
+    profiler=None,
+    fence=None,
+):
+    """Execute the main bot logic."""
+    service = create_service(incremental, adaptive, profiler, fence)
+    try:
+        users_to_tag, leaderboard, is_monday = await run_progress_check_async(
+            service, update_db=True, stream=stream, deadline_minutes=deadline_minutes
+        )
+    finally:
+        service.close()
+
+    # Queue Monday leaderboard if applicable; it is sent ahead of the tags
     if is_monday and leaderboard:
-        await discord_bot.send_leaderboard(leaderboard)
+        discord_bot.queue_leaderboard(leaderboard)
+
+    # Queue tags for users who didn't meet goals
+    discord_bot.queue_tags(users_to_tag)
 
-    # Send tags for users who didn't meet goals
-    await discord_bot.send_tags(users_to_tag)
+    with service.profiler.phase("send"):
+        service.check_fence()
+        await discord_bot.flush_messages()
 
 
 def main():
@@ -36,14 +149,106 @@ def main():
         action="store_true",
         help="Print the progress without updating the database",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream users through the pipeline instead of loading the whole database",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Score problems accepted since the last run instead of diffing totals",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Fetch idle users without goals less often, based on their activity",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="MINUTES",
+        help="Stop fetching after this many minutes, checking goal holders first",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile",
+        metavar="PREFIX",
+        help="Profile the run, writing PREFIX.pstats and a PREFIX.txt report",
+    )
+    parser.add_argument(
+        "--lease",
+        action="store_true",
+        help="Hold LEASE_PATH while running so only one replica does the work",
+    )
+    parser.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Recompute stored points with the SCORING_SCHEME_PATH scheme and exit",
+    )
+    parser.add_argument(
+        "--onboard",
+        metavar="CSV",
+        help="Add or relink users from discord_name,lc_id lines, capturing baselines",
+    )
+    parser.add_argument(
+        "--no-gateway",
+        action="store_true",
+        help="Post over the REST API or DISCORD_WEBHOOK_URL without a gateway login",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Run the background poller that refreshes users throughout the day",
+    )
     args = parser.parse_args()
+    if args.deadline is not None and args.stream:
+        parser.error("--deadline is not supported with --stream")
 
-    if args.print:
-        # Print mode - just show who would be tagged
-        service = LeetCodeService(LEETCODE_API_URL, DB_PATH)
-        users_to_tag, leaderboard, is_monday = service.check_and_update_progress(
-            update_db=False
+    profiler = Profiler(args.profile) if args.profile else NullProfiler()
+
+    if args.rescore:
+        service = create_service()
+        if service.ensure_scoring_current(update_db=True):
+            print(f"Points now use scoring scheme v{SCORING_SCHEME.version}")
+        else:
+            print(f"Points already use scoring scheme v{SCORING_SCHEME.version}")
+    elif args.onboard:
+        service = create_service()
+        with open(args.onboard, "r", newline="") as f:
+            mappings = BulkOnboarder.parse_mappings(f)
+        result = BulkOnboarder(
+            service.leetcode_api, service.db_manager, scheme=SCORING_SCHEME
+        ).onboard(mappings)
+        print(BulkOnboarder.format_summary(result))
+    elif args.poll:
+        service = create_service()
+        poller = TricklePoller(
+            service.leetcode_api,
+            service.db_manager,
+            service.stats_cache,
+            period=POLL_PERIOD,
         )
+        try:
+            poller.run()
+        finally:
+            service.close()
+    elif args.print:
+        # Print mode - just show who would be tagged
+        service = create_service(args.incremental, args.adaptive, profiler)
+        profiler.start()
+        try:
+            users_to_tag, leaderboard, is_monday = run_progress_check(
+                service,
+                update_db=False,
+                stream=args.stream,
+                deadline_minutes=args.deadline,
+            )
+        finally:
+            service.close()
+            # Also written for a run that failed, which is when it's wanted
+            profiler.stop()
 
         if is_monday and leaderboard:
             print("=== Weekly Leaderboard ===")
@@ -57,12 +262,55 @@ def main():
                 print(f"{user_to_tag.username}: needs {user_to_tag.daily_goal} points")
         else:
             print("No users to tag")
+
+        if service.carried_over:
+            print(f"Not reached before the deadline: {', '.join(service.carried_over)}")
     else:
         # Discord bot mode
-        discord_bot = DiscordBot(TOKEN, CHANNEL_ID)
-        import asyncio
+        if args.no_gateway:
+            discord_bot = WebhookSender(TOKEN, CHANNEL_ID, webhook_url=WEBHOOK_URL)
+        else:
+            discord_bot = DiscordBot(TOKEN, CHANNEL_ID)
+        lease = None
+        fence = None
+        if args.lease:
+            lease = FileLease(LEASE_PATH, ttl=LEASE_TTL)
+            run_key = datetime.now().strftime("%Y-%m-%d")
+            print(f"Waiting for lease {LEASE_PATH}")
+            token = lease.wait(run_key)
+            if token is None:
+                print(f"Another replica already completed the run for {run_key}")
+                return
+            print(f"Acquired lease with fencing token {token}")
+            fence = partial(lease.check, token)
+
+        # The gateway client swallows errors raised while running, so
+        # completion is reported by the run itself
+        completed = False
+
+        async def run(bot):
+            nonlocal completed
+            await execute_bot_logic(
+                bot,
+                stream=args.stream,
+                incremental=args.incremental,
+                adaptive=args.adaptive,
+                deadline_minutes=args.deadline,
+                profiler=profiler,
+                fence=fence,
+            )
+            completed = True
 
-        asyncio.run(discord_bot.connect_and_execute(execute_bot_logic))
+        profiler.start()
+        try:
+            with lease.hold(token) if lease else nullcontext():
+                asyncio.run(discord_bot.connect_and_execute(run))
+        finally:
+            # An unfinished run releases without completing, so a standby
+            # takes it over at once and resumes from the checkpoint
+            if lease:
+                lease.release(token, completed=run_key if completed else None)
+            profiler.stop()
 
 
 if __name__ == "__main__":
@@ -3,14 +3,47 @@ from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 import os
-import json
 from datetime import datetime, timedelta
 import argparse
 import sys
 import asyncio
+from typing import Tuple
+
+from src.database import DatabaseManager, Unchanged
+from src.migrations import new_user_record
+from src.ranking import RankingView
+from src.http_api import StatsHttpApi
+from src.leetcode_api import LeetCodeAPI
+from src.onboarding import BulkOnboarder
+from src.command_sync import CommandSyncCache
+from src.baseline_prefetcher import BaselinePrefetcher
+from src.scoring import load_scoring_scheme
+from src.stats_sources import SOURCE_TYPES
+from src.points_calculator import PointsCalculator
 
 load_dotenv()
 
+# db.json by default; point DB_PATH at a .bin file to use the binary format
+db_manager = DatabaseManager(os.getenv("DB_PATH", "db.json"))
+# Only needed by /onboard and baseline prefetching
+LEETCODE_API_URL = os.getenv("LEETCODE_API_URL")
+# Found next to the script, like the daily checker's; baselines are scored
+# with the scheme of the stored points, so a mismatch can't skew gains
+scoring_scheme = load_scoring_scheme(
+    os.getenv(
+        "SCORING_SCHEME_PATH", os.path.join(os.path.dirname(__file__), "scoring.json")
+    )
+)
+# Fetches newly linked users' current totals in the background, so their
+# first daily run counts no fake gains
+baseline_prefetcher = (
+    BaselinePrefetcher(LeetCodeAPI(LEETCODE_API_URL), db_manager, scheme=scoring_scheme)
+    if LEETCODE_API_URL
+    else None
+)
+# Precomputed standings, refreshed incrementally when the database changes
+ranking_view = RankingView(db_manager)
+
 intents = discord.Intents.default()
 bot = commands.Bot(command_prefix="!", intents=intents)
 
@@ -28,8 +61,29 @@ parser = argparse.ArgumentParser(description="LeetGrind Discord Bot")
 parser.add_argument(
     "--delete", action="store_true", help="Delete all commands and exit"
 )
+parser.add_argument(
+    "--force-sync",
+    action="store_true",
+    help="Sync slash commands on startup even if they haven't changed",
+)
+parser.add_argument(
+    "--http-port",
+    type=int,
+    help="Also serve stats and leaderboards as read-only JSON on this port",
+)
+parser.add_argument(
+    "--http-host", default="127.0.0.1", help="Interface for the read-only HTTP API"
+)
 args = parser.parse_args()
 
+http_runner = None
+
+
+# Hash of the last synced command tree, so restarts skip unneeded syncs
+command_sync_cache = CommandSyncCache(
+    os.getenv("COMMAND_SYNC_CACHE_PATH", "command_sync.json")
+)
+
 
 # Function to delete all commands
 async def delete_all_commands():
@@ -42,57 +96,60 @@ async def delete_all_commands():
     guild = discord.Object(id=GUILD_ID)
     bot.tree.clear_commands(guild=guild)
     await bot.tree.sync(guild=guild)
+    command_sync_cache.forget(GUILD_ID)
     print(f"Cleared all commands from guild {GUILD_ID}")
 
     print("All commands deleted. Exiting.")
     await bot.close()
 
 
-def get_db():
-    with open("db.json", "r") as f:
-        db = json.load(f)
-    return db
-
-
-def save_db(db):
-    with open("db.json", "w") as f:
-        json.dump(db, f, indent=4)
-
-
 # This runs once when the bot is ready
 @bot.event
 async def on_ready():
+    global http_runner
     print(f"Logged in as {bot.user}")
+    # on_ready fires again after reconnects; only start the API once
+    if args.http_port and http_runner is None:
+        http_runner = await StatsHttpApi(ranking_view).start(
+            args.http_host, args.http_port
+        )
+    if baseline_prefetcher is not None:
+        baseline_prefetcher.start()
+        # Links made before a restart may still lack a baseline
+        db = await asyncio.to_thread(db_manager.get_db)
+        baseline_prefetcher.enqueue_pending(db)
     try:
         # For guild-specific command updates
         guild = discord.Object(id=GUILD_ID)
-        # Clear all commands for this guild first
-        bot.tree.clear_commands(guild=guild)
-        bot.tree.copy_global_to(guild=guild)
-        synced = await bot.tree.sync(guild=guild)
-        print(f"Refreshed and synced {len(synced)} slash commands to guild {GUILD_ID}.")
+        synced = await command_sync_cache.sync_if_changed(
+            bot.tree, guild, force=args.force_sync
+        )
+        if synced is None:
+            print(f"Slash commands for guild {GUILD_ID} are up to date, skipping sync.")
+        else:
+            print(f"Refreshed and synced {synced} slash commands to guild {GUILD_ID}.")
     except Exception as e:
         print(e)
 
 
 @bot.tree.command(name="getgoal", description="Get your current goal")
 async def get_goal(interaction: discord.Interaction):
-    db = get_db()
     user_name = f"{interaction.user.name}"
+    user_data = db_manager.get_user(user_name)
 
-    if user_name not in db:
+    if user_data is None:
         await interaction.response.send_message(
             "You haven't set a goal yet. Use /setgoal to set one!"
         )
         return
 
-    if "goal" not in db[user_name] or not db[user_name]["goal"]:
+    if "goal" not in user_data or not user_data["goal"]:
         await interaction.response.send_message(
             "You don't have any on-going goals. Use /setgoal to set one!"
         )
         return
 
-    user_goal = db[user_name]["goal"]
+    user_goal = user_data["goal"]
     points_is_one = user_goal[0] == 1
 
     await interaction.response.send_message(
@@ -105,39 +162,179 @@ async def set_goal(
     interaction: discord.Interaction,
     points: app_commands.Range[int, 1, None],
     days: int,
+    leetcode_id: str = None,
 ):
-    db = get_db()
     user_name = f"{interaction.user.name}"
 
     # Calculate the end date
     end_date_dt = datetime.now() + timedelta(days=days)
     end_date = end_date_dt.strftime("%Y-%m-%d")
 
-    # Check if user already has a goal and if new end date is earlier
-    if (
-        user_name in db and "goal" in db[user_name] and db[user_name]["goal"]
-    ):  # Only validate if goal exists and is not empty
-        current_end_date = db[user_name]["goal"][1]
-        current_end_date_dt = datetime.strptime(current_end_date, "%Y-%m-%d")
-        if end_date_dt < current_end_date_dt:
-            await interaction.response.send_message(
-                f"nice try, you cannot change your goal to end earlier than {current_end_date}"
+    def save_goal() -> Tuple[str, bool]:
+        linked = False
+        # Read and write under the database lock so a concurrent daily run
+        # can't overwrite the new goal
+        with db_manager.transaction() as db:
+            # Only validate if goal exists and is not empty
+            current_goal = db[user_name].get("goal") if user_name in db else None
+            if current_goal and end_date_dt < datetime.strptime(
+                current_goal[1], "%Y-%m-%d"
+            ):
+                message = f"nice try, you cannot change your goal to end earlier than {current_goal[1]}"
+                raise Unchanged
+
+            # Create user entry if doesn't exist
+            if user_name not in db:
+                db[user_name] = new_user_record()
+
+            # Set the goal
+            db[user_name]["goal"] = [points, end_date]
+            if leetcode_id:
+                linked = BaselinePrefetcher.link(db[user_name], leetcode_id)
+
+            points_is_one = points == 1
+            message = f"Goal set! You are to gain {points} point{'' if points_is_one else 's'} daily until {end_date}"
+            if linked:
+                message += f"\nLinked LeetCode account {leetcode_id}"
+        return message, linked
+
+    # The lock and file I/O stay off the event loop
+    message, linked = await asyncio.to_thread(save_goal)
+
+    # Answer right away; the baseline is fetched in the background
+    await interaction.response.send_message(message)
+    if linked and baseline_prefetcher is not None:
+        baseline_prefetcher.enqueue(user_name, leetcode_id)
+
+
+@bot.tree.command(name="link", description="Link your account on another platform")
+@app_commands.choices(
+    platform=[app_commands.Choice(name=name, value=name) for name in SOURCE_TYPES]
+)
+async def link_command(
+    interaction: discord.Interaction,
+    platform: app_commands.Choice[str],
+    handle: str,
+):
+    user_name = f"{interaction.user.name}"
+
+    def save_link() -> str:
+        with db_manager.transaction() as db:
+            user_data = db.get(user_name)
+            sources = user_data.get("sources", {}) if user_data else {}
+            # Users are only checked through their LeetCode account
+            if user_data is None or not user_data["lc_id"]:
+                message = (
+                    "Link your LeetCode account first with "
+                    "`/setgoal <points> <days> <leetcode_id>`, then link other platforms."
+                )
+                raise Unchanged
+            if sources.get(platform.value, {}).get("handle") == handle:
+                message = f"Your {platform.name} account is already {handle}"
+                raise Unchanged
+            # The next daily check takes the account's counts as its baseline
+            user_data["sources"] = {**sources, platform.value: {"handle": handle}}
+            message = (
+                f"Linked {platform.name} account {handle}. "
+                "Problems you solve there count towards your goal from the next check."
             )
-            return
+        # Unchanged leaves the block without an error, so message is always set
+        return message
+
+    message = await asyncio.to_thread(save_link)
+    await interaction.response.send_message(message)
+
+
+@bot.tree.command(
+    name="onboard", description="Add users from a discord_name,lc_id CSV file"
+)
+@app_commands.default_permissions(administrator=True)
+async def onboard_command(
+    interaction: discord.Interaction, mappings: discord.Attachment
+):
+    if not LEETCODE_API_URL:
+        await interaction.response.send_message("LEETCODE_API_URL is not configured.")
+        return
+
+    try:
+        lines = (await mappings.read()).decode("utf-8").splitlines()
+        parsed = BulkOnboarder.parse_mappings(lines)
+    except (UnicodeDecodeError, ValueError) as e:
+        await interaction.response.send_message(
+            f"Could not read {mappings.filename}: {e}"
+        )
+        return
+
+    # Validating thousands of ids takes a while; answer once it's done
+    await interaction.response.defer(thinking=True)
+    onboarder = BulkOnboarder(
+        baseline_prefetcher.leetcode_api, db_manager, scheme=scoring_scheme
+    )
+    result = await asyncio.to_thread(onboarder.onboard, parsed)
+    await interaction.followup.send(BulkOnboarder.format_summary(result))
+
+
+@bot.tree.command(name="stats", description="Show LeetCode stats for you or a member")
+async def stats_command(
+    interaction: discord.Interaction, member: discord.Member = None
+):
+    user_name = member.name if member else interaction.user.name
+    await ranking_view.refresh_async()
+    result = ranking_view.user_stats(user_name)
+
+    if result is None:
+        await interaction.response.send_message(f"{user_name} isn't being tracked yet.")
+        return
+
+    user_data, rank = result
+    message = (
+        f"**{user_name}**\n"
+        f"Easy: {user_data['easySolved']} | Medium: {user_data['mediumSolved']} | Hard: {user_data['hardSolved']}\n"
+    )
+    total_points = user_data["points"]
+    for name, account in user_data.get("sources", {}).items():
+        # Counts are unknown until the first check after linking
+        if "easySolved" not in account:
+            continue
+        total_points += PointsCalculator.calculate_points(account, scoring_scheme)
+        message += (
+            f"{name.capitalize()} ({account['handle']}): "
+            f"Easy: {account['easySolved']} | Medium: {account['mediumSolved']} | Hard: {account['hardSolved']}\n"
+        )
+    await interaction.response.send_message(
+        message + f"Total points: {total_points}\n"
+        f"This week: {user_data['weekly_points']} pts (#{rank} of {len(ranking_view.ranking)})"
+    )
 
-    # Create user entry if doesn't exist
-    if user_name not in db:
-        db[user_name] = {}
 
-    # Set the goal
-    db[user_name]["goal"] = [points, end_date]
+@bot.tree.command(name="leaderboard", description="Show this week's leaderboard")
+async def leaderboard_command(interaction: discord.Interaction):
+    await ranking_view.refresh_async()
+    leaderboard = ranking_view.leaderboard()
 
-    # Save the updated database
-    save_db(db)
+    if not leaderboard or leaderboard[0].points == 0:
+        await interaction.response.send_message("No points scored this week!")
+        return
+
+    message = "# 🏆 Leaderboard 🏆\n"
+    for i, entry in enumerate(leaderboard, 1):
+        message += f"{i}. {entry.username} - `{entry.points} pts`\n"
+    await interaction.response.send_message(message)
+
+
+@bot.tree.command(name="rank", description="Show your rank this week")
+async def rank_command(interaction: discord.Interaction):
+    user_name = f"{interaction.user.name}"
+    await ranking_view.refresh_async()
+    result = ranking_view.user_stats(user_name)
+
+    if result is None:
+        await interaction.response.send_message("You aren't being tracked yet.")
+        return
 
-    points_is_one = points == 1
+    user_data, rank = result
     await interaction.response.send_message(
-        f"Goal set! You are to gain {points} point{'' if points_is_one else 's'} daily until {end_date}"
+        f"You are #{rank} of {len(ranking_view.ranking)} with {user_data['weekly_points']} pts this week"
     )
 
 
@@ -145,19 +342,25 @@ async def set_goal(
     name="help", description="Get help with LeetGrind bot commands and point system"
 )
 async def help_command(interaction: discord.Interaction):
-    help_text = """
+    help_text = f"""
 **LeetGrind Bot Help**
 
 **Points System:**
-- Easy LeetCode problems = 1 point
-- Medium LeetCode problems = 2 points
-- Hard LeetCode problems = 3 points
+- Easy LeetCode problems = {scoring_scheme.easy} point{'' if scoring_scheme.easy == 1 else 's'}
+- Medium LeetCode problems = {scoring_scheme.medium} point{'' if scoring_scheme.medium == 1 else 's'}
+- Hard LeetCode problems = {scoring_scheme.hard} point{'' if scoring_scheme.hard == 1 else 's'}
 
 **Commands:**
-- `/setgoal <points> <days>` - Set a daily points goal for the specified number of days
+- `/setgoal <points> <days> [leetcode_id]` - Set a daily points goal for the specified number of days, optionally linking your LeetCode account
 - `/getgoal` - View your current goal
+- `/link <platform> <handle>` - Count problems solved on Codeforces or AtCoder too
+- `/stats [member]` - View solved problems, points and weekly rank
+- `/leaderboard` - View this week's top 10
+- `/rank` - View your rank this week
+- `/onboard <csv>` - (Admins) Add users from `discord_name,lc_id` lines
 - `/help` - Show this help message
 
+Problems on linked platforms score the same as LeetCode ones of the same difficulty.
 The bot will check your LeetCode progress daily and tag you if you don't meet your goal.
 """
     await interaction.response.send_message(help_text)
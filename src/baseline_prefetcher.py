@@ -0,0 +1,126 @@
+import asyncio
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from .database import DatabaseManager, Unchanged
+from .leetcode_api import LeetCodeAPI
+from .models import UserData, UserStats, ScoringScheme, DEFAULT_SCORING_SCHEME
+from .points_calculator import PointsCalculator
+from .scoring import Rescorer
+
+
+class BaselinePrefetcher:
+    def __init__(
+        self,
+        leetcode_api: LeetCodeAPI,
+        db_manager: DatabaseManager,
+        retry_delays: Sequence[float] = (30, 120, 600),
+        sleep=asyncio.sleep,
+        scheme: ScoringScheme = DEFAULT_SCORING_SCHEME,
+    ):
+        self.leetcode_api = leetcode_api
+        self.db_manager = db_manager
+        self.scheme = scheme
+        self.rescorer = Rescorer(db_manager, scheme)
+        self.retry_delays = retry_delays
+        self.sleep = sleep
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Keyed by account too, so a relink while queued fetches the new one
+        self._queued: Set[Tuple[str, str]] = set()
+        self._task: Optional[asyncio.Task] = None
+        # The loop only keeps weak references to tasks
+        self._retries: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def link(user_data: UserData, lc_id: str) -> bool:
+        """
+        Point a record at a LeetCode account whose baseline is not known yet.
+        Returns False if the record was already linked to lc_id.
+        """
+        if user_data["lc_id"] == lc_id:
+            return False
+        user_data["lc_id"] = lc_id
+        # A cursor belongs to the previous account
+        user_data.pop("submission_cursor", None)
+        user_data["baseline_pending"] = True
+        return True
+
+    def enqueue(self, username: str, lc_id: str, attempt: int = 0) -> None:
+        """Queue a user's baseline fetch without waiting for it."""
+        if (username, lc_id) in self._queued:
+            return
+        self._queued.add((username, lc_id))
+        self.queue.put_nowait((username, lc_id, attempt))
+
+    def enqueue_pending(self, db: Dict[str, UserData]) -> int:
+        """Queue every user still waiting for a baseline, e.g. after a restart."""
+        count = 0
+        for username, user_data in db.items():
+            if user_data.get("baseline_pending") and user_data["lc_id"]:
+                self.enqueue(username, user_data["lc_id"])
+                count += 1
+        return count
+
+    def start(self) -> asyncio.Task:
+        """Start the worker on the running event loop, once."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self) -> None:
+        """Fetch queued baselines one at a time, forever."""
+        while True:
+            username, lc_id, attempt = await self.queue.get()
+            self._queued.discard((username, lc_id))
+            try:
+                await self.prefetch(username, lc_id, attempt)
+            except Exception as e:
+                print(f"Error prefetching baseline for {username}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def prefetch(self, username: str, lc_id: str, attempt: int = 0) -> bool:
+        """
+        Fetch and store one user's baseline, retrying later if the API fails.
+        Returns whether the baseline was stored.
+        """
+        stats = await asyncio.to_thread(self.leetcode_api.get_user_stats, lc_id)
+        if stats is None:
+            if attempt < len(self.retry_delays):
+                task = asyncio.create_task(self._retry(username, lc_id, attempt))
+                self._retries.add(task)
+                task.add_done_callback(self._retries.discard)
+            else:
+                # The daily run sets the baseline instead
+                print(f"Giving up on prefetching the baseline for {username}")
+            return False
+        return await asyncio.to_thread(self.store_baseline, username, lc_id, stats)
+
+    async def _retry(self, username: str, lc_id: str, attempt: int) -> None:
+        await self.sleep(self.retry_delays[attempt])
+        self.enqueue(username, lc_id, attempt + 1)
+
+    def store_baseline(self, username: str, lc_id: str, stats: UserStats) -> bool:
+        """
+        Store fetched totals as the user's baseline, unless they relinked or
+        the daily run set a baseline first. Points use the stored points'
+        scheme, which only the daily checker changes, when it rescores.
+        """
+        stored = False
+        with self.db_manager.transaction() as db:
+            user_data = db.get(username)
+            if (
+                user_data is None
+                or user_data["lc_id"] != lc_id
+                or not user_data.get("baseline_pending")
+            ):
+                raise Unchanged
+            scheme = self.rescorer.stored_scheme()
+            user_data["easySolved"] = stats["easySolved"]
+            user_data["mediumSolved"] = stats["mediumSolved"]
+            user_data["hardSolved"] = stats["hardSolved"]
+            user_data["points"] = PointsCalculator.calculate_points(stats, scheme)
+            del user_data["baseline_pending"]
+            stored = True
+        if stored:
+            print(f"Stored baseline for {username}")
+        return stored
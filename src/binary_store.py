@@ -0,0 +1,341 @@
+"""
+Compact binary on-disk format for the user table.
+
+Layout (little-endian):
+    header          magic, format and schema versions, counts and section offsets
+    string index    (offset, length) per interned string
+    string blob     UTF-8 bytes of every interned string
+    records         one fixed-width record per user
+    hash index      open-addressing table of record numbers keyed by username
+
+Usernames, lc_ids and goal end dates are interned in the string table, and
+numeric columns are stored as fixed-width integers. Any field that does not
+fit the fixed layout is kept losslessly in a per-record JSON "extras" string.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import UserData, SCHEMA_VERSION_KEY
+
+MAGIC = b"LGDB"
+FORMAT_VERSION = 1
+NO_STRING = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sHHIIIQQQQ")
+STRING_ENTRY = struct.Struct("<II")
+RECORD = struct.Struct("<6I6q")
+SLOT = struct.Struct("<I")
+
+# Presence bits for the fixed-width fields of a record
+HAS_LC_ID = 1 << 0
+HAS_GOAL = 1 << 1
+HAS_EASY = 1 << 2
+HAS_MEDIUM = 1 << 3
+HAS_HARD = 1 << 4
+HAS_POINTS = 1 << 5
+HAS_WEEKLY = 1 << 6
+GOAL_SET = 1 << 7
+
+INT_FIELDS = [
+    ("easySolved", HAS_EASY),
+    ("mediumSolved", HAS_MEDIUM),
+    ("hardSolved", HAS_HARD),
+    ("points", HAS_POINTS),
+    ("weekly_points", HAS_WEEKLY),
+]
+INT_FIELD_NAMES = {field for field, _ in INT_FIELDS}
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def _hash(username: str) -> int:
+    return zlib.crc32(username.encode("utf-8"))
+
+
+def _is_int64(value) -> bool:
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and INT64_MIN <= value <= INT64_MAX
+    )
+
+
+class BinaryUserStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Invalid binary database file: {path}")
+
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"Invalid binary database file: {path}")
+
+        (
+            magic,
+            version,
+            self.schema_version,
+            self._n_users,
+            self._n_strings,
+            self._n_slots,
+            self._string_index_off,
+            self._string_blob_off,
+            self._records_off,
+            self._hash_off,
+        ) = HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Invalid binary database file: {path}")
+
+    def __enter__(self) -> "BinaryUserStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap and close the underlying file."""
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._n_users
+
+    def __contains__(self, username: str) -> bool:
+        return self._find(username) is not None
+
+    def _string(self, sid: int) -> str:
+        offset, length = STRING_ENTRY.unpack_from(
+            self._mm, self._string_index_off + sid * STRING_ENTRY.size
+        )
+        start = self._string_blob_off + offset
+        return self._mm[start : start + length].decode("utf-8")
+
+    def _username_sid(self, index: int) -> int:
+        return RECORD.unpack_from(self._mm, self._records_off + index * RECORD.size)[1]
+
+    def _find(self, username: str) -> Optional[int]:
+        if not self._n_slots:
+            return None
+        mask = self._n_slots - 1
+        slot = _hash(username) & mask
+        while True:
+            (entry,) = SLOT.unpack_from(self._mm, self._hash_off + slot * SLOT.size)
+            if entry == 0:
+                return None
+            index = entry - 1
+            if self._string(self._username_sid(index)) == username:
+                return index
+            slot = (slot + 1) & mask
+
+    def _decode(self, index: int) -> Tuple[str, UserData]:
+        (
+            flags,
+            username_sid,
+            lc_id_sid,
+            goal_end_sid,
+            extras_sid,
+            _pad,
+            goal_points,
+            *numbers,
+        ) = RECORD.unpack_from(self._mm, self._records_off + index * RECORD.size)
+
+        user_data = {}
+        if flags & HAS_LC_ID:
+            user_data["lc_id"] = (
+                None if lc_id_sid == NO_STRING else self._string(lc_id_sid)
+            )
+        if flags & HAS_GOAL:
+            user_data["goal"] = (
+                [goal_points, self._string(goal_end_sid)] if flags & GOAL_SET else []
+            )
+        for (field, bit), value in zip(INT_FIELDS, numbers):
+            if flags & bit:
+                user_data[field] = value
+        if extras_sid != NO_STRING:
+            user_data.update(json.loads(self._string(extras_sid)))
+
+        return self._string(username_sid), user_data
+
+    def get_user(self, username: str) -> Optional[UserData]:
+        """Look up a single user without decoding the rest of the table."""
+        index = self._find(username)
+        if index is None:
+            return None
+        return self._decode(index)[1]
+
+    def iter_users(self) -> Iterator[Tuple[str, UserData]]:
+        """Yield (username, user_data) pairs in stored order."""
+        for index in range(self._n_users):
+            yield self._decode(index)
+
+    def to_dict(self) -> Dict[str, UserData]:
+        """Decode the whole table into the JSON database layout."""
+        return dict(self.iter_users())
+
+    @staticmethod
+    def write(db: Dict[str, UserData], path: str, schema_version: int = 0) -> None:
+        """Atomically write a database dict in the binary format."""
+        strings: List[bytes] = []
+        string_ids: Dict[str, int] = {}
+
+        def intern(value: str) -> int:
+            sid = string_ids.get(value)
+            if sid is None:
+                sid = len(strings)
+                string_ids[value] = sid
+                strings.append(value.encode("utf-8"))
+            return sid
+
+        records = bytearray()
+        for username, user_data in db.items():
+            extras = {}
+            flags = 0
+            lc_id_sid = goal_end_sid = extras_sid = NO_STRING
+            goal_points = 0
+            numbers = []
+
+            for field, value in user_data.items():
+                if field == "lc_id" and (value is None or isinstance(value, str)):
+                    flags |= HAS_LC_ID
+                    if value is not None:
+                        lc_id_sid = intern(value)
+                elif field == "goal" and value == []:
+                    flags |= HAS_GOAL
+                elif (
+                    field == "goal"
+                    and isinstance(value, list)
+                    and len(value) == 2
+                    and _is_int64(value[0])
+                    and isinstance(value[1], str)
+                ):
+                    flags |= HAS_GOAL | GOAL_SET
+                    goal_points = value[0]
+                    goal_end_sid = intern(value[1])
+                elif field not in INT_FIELD_NAMES or not _is_int64(value):
+                    extras[field] = value
+
+            for field, bit in INT_FIELDS:
+                value = user_data.get(field)
+                if field in user_data and field not in extras:
+                    flags |= bit
+                    numbers.append(value)
+                else:
+                    numbers.append(0)
+
+            if extras:
+                extras_sid = intern(json.dumps(extras))
+
+            records += RECORD.pack(
+                flags,
+                intern(username),
+                lc_id_sid,
+                goal_end_sid,
+                extras_sid,
+                0,
+                goal_points,
+                *numbers,
+            )
+
+        n_users = len(db)
+        n_slots = 1
+        while n_slots < n_users * 2:
+            n_slots *= 2
+        if not n_users:
+            n_slots = 0
+
+        slots = [0] * n_slots
+        for index, username in enumerate(db):
+            slot = _hash(username) & (n_slots - 1)
+            while slots[slot]:
+                slot = (slot + 1) & (n_slots - 1)
+            slots[slot] = index + 1
+
+        string_index = bytearray()
+        blob_offset = 0
+        for encoded in strings:
+            string_index += STRING_ENTRY.pack(blob_offset, len(encoded))
+            blob_offset += len(encoded)
+
+        string_index_off = HEADER.size
+        string_blob_off = string_index_off + len(string_index)
+        records_off = string_blob_off + blob_offset
+        hash_off = records_off + len(records)
+
+        header = HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            schema_version,
+            n_users,
+            len(strings),
+            n_slots,
+            string_index_off,
+            string_blob_off,
+            records_off,
+            hash_off,
+        )
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(string_index)
+            for encoded in strings:
+                f.write(encoded)
+            f.write(records)
+            f.write(struct.pack(f"<{n_slots}I", *slots))
+        os.replace(tmp_path, path)
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """Convert a JSON database to the binary format. Returns the user count."""
+    with open(json_path, "r") as f:
+        db = json.load(f)
+    schema_version = db.pop(SCHEMA_VERSION_KEY, 0)
+    BinaryUserStore.write(db, binary_path, schema_version)
+    return len(db)
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """Convert a binary database back to JSON. Returns the user count."""
+    with BinaryUserStore(binary_path) as store:
+        db = store.to_dict()
+        schema_version = store.schema_version
+    if schema_version:
+        db = {SCHEMA_VERSION_KEY: schema_version, **db}
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(db, f, indent=4)
+    os.replace(tmp_path, json_path)
+    return len(db) - (1 if schema_version else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the user database between JSON and binary formats"
+    )
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+
+    if args.direction == "to-binary":
+        count = json_to_binary(args.source, args.destination)
+    else:
+        count = binary_to_json(args.source, args.destination)
+    print(f"Converted {count} users to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+from .models import LeaderboardEntry
+
+
+class CheckpointManager:
+    """
+    A run's checkpoint is a small header (date, Monday reset, leaderboard,
+    progress) plus an append-only journal of the per-user updates applied so
+    far. Saving costs only the new entries, and a resumed run replays the
+    journal onto the database snapshot it started from.
+    """
+
+    def __init__(self, checkpoint_path: str):
+        self.checkpoint_path = checkpoint_path
+        self.journal_path = f"{checkpoint_path}.journal"
+
+    @staticmethod
+    def new_checkpoint(current_date: str) -> Dict:
+        """Create an empty checkpoint for a run on the given date."""
+        return {
+            "date": current_date,
+            "weekly_reset_done": False,
+            "leaderboard": [],
+            # Journal entries already saved to the database; None until the
+            # first commit of the day, which also saves the weekly reset
+            "committed_entries": None,
+            "completed": False,
+            "journal": [],
+            "points_gained": {},
+        }
+
+    def load(self, current_date: str) -> Optional[Dict]:
+        """Load the checkpoint for today, ignoring checkpoints from other days."""
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt checkpoint file: {self.checkpoint_path}")
+            return None
+
+        if checkpoint.get("date") != current_date:
+            return None
+        checkpoint["journal"] = self._read_journal()
+        checkpoint["points_gained"] = {
+            entry["username"]: entry["update"]["points_gained"]
+            for entry in checkpoint["journal"]
+        }
+        return checkpoint
+
+    def _read_journal(self) -> List[Dict]:
+        entries = []
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A partial last line from a crash mid-append
+                        break
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def save(self, checkpoint: Dict) -> None:
+        """Atomically write the checkpoint header; the journal is kept as is."""
+        header = {
+            key: value
+            for key, value in checkpoint.items()
+            if key not in ("journal", "points_gained")
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def start(self, checkpoint: Dict) -> None:
+        """Begin a new day's checkpoint, discarding the previous journal."""
+        self._remove(self.journal_path)
+        self.save(checkpoint)
+
+    @staticmethod
+    def encode(entries: List[Dict]) -> str:
+        """Serialize journal entries, ready for append."""
+        return "".join(json.dumps(entry) + "\n" for entry in entries)
+
+    def append(self, encoded: str) -> None:
+        """Append entries serialized by encode to the journal."""
+        with open(self.journal_path, "a") as f:
+            f.write(encoded)
+
+    def clear(self) -> None:
+        """Remove the checkpoint and its journal if they exist."""
+        self._remove(self.journal_path)
+        self._remove(self.checkpoint_path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def leaderboard_to_json(leaderboard: List[LeaderboardEntry]) -> List[Dict]:
+        """Serialize leaderboard entries for storage in a checkpoint."""
+        return [
+            {"username": entry.username, "points": entry.points}
+            for entry in leaderboard
+        ]
+
+    @staticmethod
+    def leaderboard_from_json(entries: List[Dict]) -> List[LeaderboardEntry]:
+        """Restore leaderboard entries stored in a checkpoint."""
+        return [LeaderboardEntry(**entry) for entry in entries]
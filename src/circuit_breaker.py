@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} circuit is open")
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str = "LeetCode API",
+        failure_threshold: float = 0.5,
+        min_calls: int = 5,
+        window_size: int = 20,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._outcomes = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the timeout passes."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through; half-open admits a single probe."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit after a good probe."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                print(f"{self.name} recovered, closing circuit")
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+                return
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit past the failure threshold."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        print(f"{self.name} is failing, opening circuit for {self.reset_timeout}s")
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._probe_in_flight = False
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import discord
+from discord import app_commands
+
+
+class CommandSyncCache:
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+
+    @staticmethod
+    def tree_hash(tree: app_commands.CommandTree, guild: discord.abc.Snowflake) -> str:
+        """Stable hash of the commands registered for a guild, as Discord sees them."""
+        payload = sorted(
+            (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+            key=lambda command: (command["type"], command["name"]),
+        )
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt command sync cache: {self.cache_path}")
+            return {}
+
+    def _save(self, hashes: Dict[str, str]) -> None:
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def get(self, guild_id: int) -> Optional[str]:
+        """The hash of the command tree last synced to a guild, if known."""
+        return self._load().get(str(guild_id))
+
+    def store(self, guild_id: int, tree_hash: str) -> None:
+        """Remember the hash of the command tree just synced to a guild."""
+        hashes = self._load()
+        hashes[str(guild_id)] = tree_hash
+        self._save(hashes)
+
+    def forget(self, guild_id: int) -> None:
+        """Drop a guild's hash so the next startup syncs unconditionally."""
+        hashes = self._load()
+        if hashes.pop(str(guild_id), None) is not None:
+            self._save(hashes)
+
+    async def sync_if_changed(
+        self,
+        tree: app_commands.CommandTree,
+        guild: discord.abc.Snowflake,
+        force: bool = False,
+    ) -> Optional[int]:
+        """
+        Sync the guild's commands only if they changed since the last sync.
+        Returns the number of synced commands, or None if the sync was skipped.
+        """
+        # Rebuilding the guild's local tree costs no API calls
+        tree.clear_commands(guild=guild)
+        tree.copy_global_to(guild=guild)
+
+        tree_hash = self.tree_hash(tree, guild)
+        if not force and self.get(guild.id) == tree_hash:
+            return None
+        synced = await tree.sync(guild=guild)
+        self.store(guild.id, tree_hash)
+        return len(synced)
@@ -1,9 +1,20 @@
+import fcntl
 import json
 import os
-from typing import Dict
+import shutil
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from copy import deepcopy
 
-from .models import UserData
+from .binary_store import BinaryUserStore
+from .goal_index import GoalIndex
+from .migrations import SchemaMigrator, SCHEMA_VERSION
+from .models import UserData, SCHEMA_VERSION_KEY
+
+
+class Unchanged(Exception):
+    """Raised inside a transaction to leave the stored database as it was."""
 
 
 class DatabaseManager:
@@ -11,21 +22,381 @@ class DatabaseManager:
         if db_path is None:
             db_path = os.path.join(os.path.dirname(__file__), "db.json")
         self.db_path = db_path
+        self.lock_path = f"{db_path}.lock"
+        root, ext = os.path.splitext(db_path)
+        self.snapshot_path = f"{root}.base{ext}"
+        # Active goals by end date, kept in step with every save_db
+        self.goal_index_path = f"{db_path}.goals"
+
+    @property
+    def is_binary(self) -> bool:
+        """Whether the database uses the binary format (a `.bin` path)."""
+        return self.db_path.endswith(".bin")
 
     def get_db(self) -> Dict[str, UserData]:
-        """Load the database from JSON file."""
+        """
+        Load the database from JSON file.
+        Records are always returned in the current schema; data stamped with
+        an older version is migrated in memory until the next save persists it.
+        """
+        if self.is_binary:
+            try:
+                with BinaryUserStore(self.db_path) as store:
+                    db = store.to_dict()
+                    version = store.schema_version
+            except FileNotFoundError:
+                return {}
+        else:
+            try:
+                with open(self.db_path, "r") as f:
+                    db = json.load(f)
+            except FileNotFoundError:
+                return {}
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON in database file: {self.db_path}")
+            version = db.pop(SCHEMA_VERSION_KEY, 0)
+        return SchemaMigrator.migrate(db, version)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Hold the lock that serializes writers across processes.
+        Not reentrant: don't call another locking method while holding it.
+        """
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def transaction(
+        self, fence: Optional[Callable[[], None]] = None
+    ) -> Iterator[Dict[str, UserData]]:
+        """
+        Load the database under the lock and save it when the block exits
+        cleanly. Keep the block short; do network work outside of it.
+        A block that changed nothing raises Unchanged to skip the write.
+        A fence is called once the lock is held and raises to refuse the write.
+        """
+        with self.lock():
+            if fence is not None:
+                fence()
+            db = self.get_db()
+            try:
+                yield db
+            except Unchanged:
+                return
+            self.save_db(db)
+
+    def ensure_schema(self) -> Dict[str, UserData]:
+        """Upgrade the stored database to the current schema once, and load it."""
+        with self.lock():
+            return self._ensure_schema()
+
+    def _ensure_schema(self) -> Dict[str, UserData]:
+        db = self.get_db()
+        if self.stored_schema_version() < SCHEMA_VERSION and os.path.exists(
+            self.db_path
+        ):
+            self.save_db(db)
+        return db
+
+    def take_snapshot(self) -> None:
+        """
+        Record the stored database as the base of a long-running update,
+        upgrading its schema first. The snapshot is a hard link to the current
+        file, which stays intact because every save replaces the file.
+        """
+        with self.lock():
+            if self.stored_schema_version() < SCHEMA_VERSION:
+                self._ensure_schema()
+            self._remove_snapshot()
+            if not os.path.exists(self.db_path):
+                # Give users registered during the update a base to merge against
+                self.save_db({})
+            try:
+                os.link(self.db_path, self.snapshot_path)
+            except OSError:
+                shutil.copyfile(self.db_path, self.snapshot_path)
+
+    def has_snapshot(self) -> bool:
+        """Whether a snapshot from an earlier take_snapshot is still pending."""
+        return os.path.exists(self.snapshot_path)
+
+    def snapshot(self) -> "DatabaseManager":
+        """The database as it was when the snapshot was taken."""
+        return DatabaseManager(self.snapshot_path)
+
+    def commit(
+        self,
+        db: Dict[str, UserData],
+        goal_index: Optional[GoalIndex] = None,
+        fence: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, UserData]:
+        """
+        Save the result of an update started with take_snapshot. Changes other
+        processes saved in the meantime are kept; see merge_changes.
+        A goal index maintained alongside db is saved with it, unless a merge
+        means it no longer matches. A fence is called once the lock is held,
+        so a replica that lost its lease can't save over its successor.
+        Returns the database as saved.
+        """
+        with self.lock():
+            if fence is not None:
+                fence()
+            if not self._changed_since_snapshot():
+                self.save_db(db, goal_index)
+            else:
+                db = self.merge_changes(self.snapshot().get_db(), db, self.get_db())
+                self.save_db(db)
+            self._remove_snapshot()
+        return db
+
+    def commit_file(
+        self, path: str, fence: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Like commit, for a fully written JSON database file at path."""
+        with self.lock():
+            if fence is not None:
+                try:
+                    fence()
+                except Exception:
+                    os.unlink(path)
+                    raise
+            if not self._changed_since_snapshot():
+                os.replace(path, self.db_path)
+            else:
+                # Rare: only reached when another process saved mid-stream
+                ours = DatabaseManager(path).get_db()
+                os.unlink(path)
+                self.save_db(
+                    self.merge_changes(self.snapshot().get_db(), ours, self.get_db())
+                )
+            self._remove_snapshot()
+
+    @staticmethod
+    def merge_changes(
+        base: Dict[str, UserData],
+        ours: Dict[str, UserData],
+        theirs: Dict[str, UserData],
+    ) -> Dict[str, UserData]:
+        """
+        Three-way merge of two databases derived from base. A field changed in
+        ours is applied only if theirs still has the base value, so concurrent
+        edits such as a new goal win. Users added on either side are kept;
+        users removed by theirs stay removed.
+        """
+        merged = dict(theirs)
+        for username, user_data in ours.items():
+            original = base.get(username)
+            current = theirs.get(username)
+            if original is None:
+                if current is None:
+                    merged[username] = user_data
+                continue
+            if current is None or user_data == original:
+                continue
+            updated = dict(current)
+            for field, value in user_data.items():
+                if original.get(field) != value and current.get(field) == original.get(
+                    field
+                ):
+                    updated[field] = value
+            # Fields ours removed, such as a cleared cursor, stay removed
+            for field in original.keys() - user_data.keys():
+                if field in current and current[field] == original[field]:
+                    del updated[field]
+            merged[username] = updated
+        return merged
+
+    def _changed_since_snapshot(self) -> bool:
+        # Without a snapshot there is nothing to merge against
+        if not self.has_snapshot():
+            return False
         try:
-            with open(self.db_path, "r") as f:
-                return json.load(f)
+            return not os.path.samefile(self.db_path, self.snapshot_path)
         except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in database file: {self.db_path}")
+            return True
 
-    def save_db(self, db: Dict[str, UserData]) -> None:
-        """Save the database to JSON file."""
-        with open(self.db_path, "w") as f:
-            json.dump(db, f, indent=4)
+    def _remove_snapshot(self) -> None:
+        try:
+            os.unlink(self.snapshot_path)
+        except FileNotFoundError:
+            pass
+
+    def stored_schema_version(self) -> int:
+        """Read the schema version stamped on the stored database."""
+        if self.is_binary:
+            try:
+                with BinaryUserStore(self.db_path) as store:
+                    return store.schema_version
+            except FileNotFoundError:
+                return 0
+        for key, value in self._iter_json_entries():
+            # save_db writes the version first, so this stops after one entry
+            return value if key == SCHEMA_VERSION_KEY else 0
+        return 0
+
+    def get_user(self, username: str) -> Optional[UserData]:
+        """Load a single user's record, without a full parse for binary databases."""
+        if self.is_binary:
+            try:
+                with BinaryUserStore(self.db_path) as store:
+                    user_data = store.get_user(username)
+                    version = store.schema_version
+            except FileNotFoundError:
+                return None
+            if user_data is not None:
+                SchemaMigrator.migrate_record(user_data, version)
+            return user_data
+        return self.get_db().get(username)
+
+    def iter_users(self, chunk_size: int = 65536) -> Iterator[Tuple[str, UserData]]:
+        """Lazily yield (username, user_data) pairs without loading the whole file."""
+        if self.is_binary:
+            try:
+                store = BinaryUserStore(self.db_path)
+            except FileNotFoundError:
+                return
+            with store:
+                for username, user_data in store.iter_users():
+                    SchemaMigrator.migrate_record(user_data, store.schema_version)
+                    yield username, user_data
+            return
+
+        version = 0
+        for key, value in self._iter_json_entries(chunk_size):
+            if key == SCHEMA_VERSION_KEY:
+                version = value
+                continue
+            yield key, SchemaMigrator.migrate_record(value, version)
+
+    def _iter_json_entries(
+        self, chunk_size: int = 65536
+    ) -> Iterator[Tuple[str, object]]:
+        """Incrementally parse the top-level entries of the JSON database file."""
+        decoder = json.JSONDecoder()
+        try:
+            f = open(self.db_path, "r")
+        except FileNotFoundError:
+            return
+
+        with f:
+            buf = ""
+            pos = 0
+            eof = False
+
+            def fill() -> bool:
+                nonlocal buf, pos, eof
+                if eof:
+                    return False
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    eof = True
+                    return False
+                buf = buf[pos:] + chunk
+                pos = 0
+                return True
+
+            def next_char() -> str:
+                nonlocal pos
+                while True:
+                    while pos < len(buf) and buf[pos].isspace():
+                        pos += 1
+                    if pos < len(buf):
+                        return buf[pos]
+                    if not fill():
+                        raise ValueError(
+                            f"Invalid JSON in database file: {self.db_path}"
+                        )
+
+            def next_value():
+                nonlocal pos
+                next_char()
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buf, pos)
+                        # A value touching the end of the buffer may be truncated
+                        if end < len(buf) or eof:
+                            pos = end
+                            return value
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise ValueError(
+                                f"Invalid JSON in database file: {self.db_path}"
+                            )
+                    fill()
+
+            if next_char() != "{":
+                raise ValueError(f"Invalid JSON in database file: {self.db_path}")
+            pos += 1
+            if next_char() == "}":
+                return
+
+            while True:
+                username = next_value()
+                if next_char() != ":":
+                    raise ValueError(f"Invalid JSON in database file: {self.db_path}")
+                pos += 1
+                yield username, next_value()
+
+                separator = next_char()
+                pos += 1
+                if separator == "}":
+                    return
+                if separator != ",":
+                    raise ValueError(f"Invalid JSON in database file: {self.db_path}")
+
+    def stream_writer(
+        self, fence: Optional[Callable[[], None]] = None
+    ) -> "StreamingDatabaseWriter":
+        """Open a writer that saves users one at a time, replacing the file on close."""
+        if self.is_binary:
+            raise ValueError("Streaming writes are only supported for JSON databases")
+        return StreamingDatabaseWriter(
+            self.db_path, partial(self.commit_file, fence=fence)
+        )
+
+    def save_db(
+        self, db: Dict[str, UserData], goal_index: Optional[GoalIndex] = None
+    ) -> None:
+        """
+        Save the database to JSON file, replacing it atomically, along with
+        its goal index. Pass goal_index if one is already maintained for db.
+        """
+        if self.is_binary:
+            BinaryUserStore.write(db, self.db_path, SCHEMA_VERSION)
+        else:
+            tmp_path = f"{self.db_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({SCHEMA_VERSION_KEY: SCHEMA_VERSION, **db}, f, indent=4)
+            os.replace(tmp_path, self.db_path)
+        if goal_index is None:
+            goal_index = GoalIndex.from_db(db)
+        goal_index.save(self.goal_index_path, self.file_stamp(self.db_path))
+
+    @staticmethod
+    def file_stamp(path: str) -> Optional[List]:
+        """Identify one version of a file; every save replaces the file, changing it."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+    def load_goal_index(
+        self, db: Dict[str, UserData], source_path: Optional[str] = None
+    ) -> GoalIndex:
+        """
+        The saved goal index if it describes the file db was read from
+        (the database itself by default, or its snapshot), else one built from db.
+        source_path must not be replaced while db is in use, as a snapshot isn't.
+        """
+        stamp = self.file_stamp(source_path or self.db_path)
+        index = GoalIndex.load(self.goal_index_path, stamp)
+        return index if index is not None else GoalIndex.from_db(db)
 
     def initialize_weekly_points(self, db: Dict[str, UserData]) -> Dict[str, UserData]:
         """Initialize weekly_points for users who don't have it."""
@@ -52,20 +423,35 @@ class DatabaseManager:
         points: int,
         points_gained: int,
     ) -> Dict[str, UserData]:
-        """Update user's stats and weekly points."""
-        updated_db = deepcopy(db)
-        if username in updated_db:
-            updated_db[username]["easySolved"] = easy_solved
-            updated_db[username]["mediumSolved"] = medium_solved
-            updated_db[username]["hardSolved"] = hard_solved
-            updated_db[username]["points"] = points
-            updated_db[username]["weekly_points"] += points_gained
-        return updated_db
+        """
+        Update user's stats and weekly points.
+        The database is updated in place, so updating every user stays linear.
+        """
+        if username in db:
+            db[username]["easySolved"] = easy_solved
+            db[username]["mediumSolved"] = medium_solved
+            db[username]["hardSolved"] = hard_solved
+            db[username]["points"] = points
+            db[username]["weekly_points"] += points_gained
+        return db
 
     def clear_expired_goals(
-        self, db: Dict[str, UserData], current_date: str
+        self,
+        db: Dict[str, UserData],
+        current_date: str,
+        goal_index: Optional[GoalIndex] = None,
     ) -> Dict[str, UserData]:
-        """Clear goals that have expired."""
+        """
+        Clear goals that have expired.
+        With a goal index, only the users whose goals actually expired are
+        touched and the database is updated in place.
+        """
+        if goal_index is not None:
+            for username in goal_index.pop_expired(current_date):
+                if username in db:
+                    db[username]["goal"] = []
+            return db
+
         updated_db = deepcopy(db)
         for username, user_data in updated_db.items():
             if (
@@ -75,3 +461,34 @@ class DatabaseManager:
             ):
                 updated_db[username]["goal"] = []
         return updated_db
+
+
+class StreamingDatabaseWriter:
+    def __init__(self, db_path: str, commit: Optional[Callable[[str], None]] = None):
+        self.db_path = db_path
+        # Distinct from save_db's temp file, which a concurrent save may be using
+        self.tmp_path = f"{db_path}.stream.tmp"
+        self.commit = commit
+        self._file = None
+
+    def __enter__(self) -> "StreamingDatabaseWriter":
+        self._file = open(self.tmp_path, "w")
+        self._file.write(f"{{\n    {json.dumps(SCHEMA_VERSION_KEY)}: {SCHEMA_VERSION}")
+        return self
+
+    def write_user(self, username: str, user_data: UserData) -> None:
+        """Append a single user record, formatted like save_db."""
+        record = json.dumps(user_data, indent=4).replace("\n", "\n    ")
+        self._file.write(f",\n    {json.dumps(username)}: {record}")
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._file.close()
+            os.unlink(self.tmp_path)
+            return
+        self._file.write("\n}")
+        self._file.close()
+        if self.commit is not None:
+            self.commit(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.db_path)
@@ -4,6 +4,7 @@ from typing import List
 
 from .models import UserToTag, LeaderboardEntry
 from .leaderboard import LeaderboardManager
+from .message_scheduler import MessageScheduler, LEADERBOARD_PRIORITY, TAG_PRIORITY
 
 
 class DiscordBot:
@@ -14,9 +15,10 @@ class DiscordBot:
         intents = discord.Intents.default()
         intents.members = True
         self.bot = commands.Bot(command_prefix="!", intents=intents)
+        self.scheduler = MessageScheduler()
 
-    async def send_tags(self, users_to_tag: List[UserToTag]) -> None:
-        """Send tag messages for users who didn't meet their goals."""
+    def queue_tags(self, users_to_tag: List[UserToTag]) -> None:
+        """Queue tag messages for users who didn't meet their goals."""
         channel = self.bot.get_channel(self.channel_id)
         if not channel:
             print(f"Could not find channel with ID {self.channel_id}")
@@ -30,8 +32,11 @@ class DiscordBot:
 
                 if member:
                     word = "point" if user_to_tag.daily_goal == 1 else "points"
-                    await channel.send(
-                        f"@everyone <@{member.id}> has failed to gain {user_to_tag.daily_goal} {word} yesterday, this is why they are unemployed"
+                    self.scheduler.enqueue(
+                        channel.id,
+                        channel.send,
+                        f"@everyone <@{member.id}> has failed to gain {user_to_tag.daily_goal} {word} yesterday, this is why they are unemployed",
+                        TAG_PRIORITY,
                     )
                 else:
                     print(
@@ -40,8 +45,8 @@ class DiscordBot:
         else:
             print("No reminders needed")
 
-    async def send_leaderboard(self, leaderboard: List[LeaderboardEntry]) -> None:
-        """Send weekly leaderboard to Discord."""
+    def queue_leaderboard(self, leaderboard: List[LeaderboardEntry]) -> None:
+        """Queue the weekly leaderboard ahead of any tag messages."""
         channel = self.bot.get_channel(self.channel_id)
         if not channel:
             print(f"Could not find channel with ID {self.channel_id}")
@@ -50,7 +55,23 @@ class DiscordBot:
         message = LeaderboardManager.format_leaderboard_message(
             leaderboard, channel.guild
         )
-        await channel.send(message)
+        self.scheduler.enqueue(channel.id, channel.send, message, LEADERBOARD_PRIORITY)
+
+    async def flush_messages(self) -> None:
+        """Send all queued messages, respecting Discord rate limits."""
+        failed = await self.scheduler.flush()
+        if failed:
+            print(f"Gave up on {len(failed)} message(s)")
+
+    async def send_tags(self, users_to_tag: List[UserToTag]) -> None:
+        """Send tag messages for users who didn't meet their goals."""
+        self.queue_tags(users_to_tag)
+        await self.flush_messages()
+
+    async def send_leaderboard(self, leaderboard: List[LeaderboardEntry]) -> None:
+        """Send weekly leaderboard to Discord."""
+        self.queue_leaderboard(leaderboard)
+        await self.flush_messages()
 
     async def connect_and_execute(self, execute_func) -> None:
         """Connect to Discord and execute the provided function."""
@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class EndpointStats:
+    def __init__(self, window_size: int = 50):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.attempts = 0
+        self.samples = deque(maxlen=window_size)
+
+
+class EndpointSelector:
+    def __init__(
+        self,
+        endpoints: List[str],
+        alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        hedge_percentile: float = 0.95,
+        min_samples: int = 5,
+        default_hedge_delay: float = 1.0,
+    ):
+        self.endpoints = endpoints
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.stats: Dict[str, EndpointStats] = {
+            endpoint: EndpointStats() for endpoint in endpoints
+        }
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        """Fold a finished request into the endpoint's moving averages."""
+        with self._lock:
+            stats = self.stats[endpoint]
+            stats.attempts += 1
+            stats.error_rate += self.alpha * ((0.0 if ok else 1.0) - stats.error_rate)
+            if not ok:
+                return
+            # Only successful requests say anything about an endpoint's speed
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency += self.alpha * (latency - stats.latency)
+            stats.samples.append(latency)
+
+    def is_healthy(self, endpoint: str) -> bool:
+        """Whether the endpoint's recent error rate is below the limit."""
+        return self.stats[endpoint].error_rate < self.max_error_rate
+
+    def ranked(self) -> List[str]:
+        """
+        Endpoints ordered best first: healthy before unhealthy, then by
+        average latency. Endpoints never tried yet come first, and ones that
+        have never succeeded come last.
+        """
+        with self._lock:
+            return sorted(self.endpoints, key=self._rank_key)
+
+    def _rank_key(self, endpoint: str):
+        stats = self.stats[endpoint]
+        if stats.latency is not None:
+            latency = stats.latency
+        else:
+            latency = 0.0 if stats.attempts == 0 else float("inf")
+        return not self.is_healthy(endpoint), latency
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """How long to wait on the endpoint before sending a hedged duplicate."""
+        with self._lock:
+            samples = sorted(self.stats[endpoint].samples)
+        if len(samples) < self.min_samples:
+            return self.default_hedge_delay
+        return samples[int(self.hedge_percentile * (len(samples) - 1))]
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 
+from .goal_index import GoalIndex
 from .models import UserData, UserToTag
 
 
@@ -37,22 +38,37 @@ class GoalChecker:
         db: Dict[str, UserData],
         points_gained_by_user: Dict[str, int],
         current_date: str,
+        goal_index: Optional[GoalIndex] = None,
+        unfetched: Optional[Set[str]] = None,
     ) -> List[UserToTag]:
-        """Get list of users who should be tagged for not meeting their goals."""
+        """
+        Get list of users who should be tagged for not meeting their goals.
+        With a goal index, only users with active goals are visited. Users in
+        `unfetched` are never tagged, since their progress is unknown.
+        """
         users_to_tag = []
 
-        for username, user_data in db.items():
+        usernames = db if goal_index is None else goal_index.active_users()
+        for username in usernames:
+            user_data = db.get(username)
+            goal = user_data.get("goal") if user_data else None
+
             # Skip users without active goals
-            if not GoalChecker.has_active_goal(user_data):
+            if goal is None or len(goal) < 2:
                 print(f"Skipping {username} because goal is not active")
                 continue
 
+            daily_goal, goal_end_date = goal[0], goal[1]
+
             # Skip users with expired goals
-            if GoalChecker.is_goal_expired(user_data, current_date):
+            if current_date > goal_end_date:
                 print(f"Skipping {username} because goal is expired")
                 continue
 
-            daily_goal = GoalChecker.get_daily_goal(user_data)
+            if unfetched and username in unfetched:
+                print(f"Skipping {username} because their stats could not be fetched")
+                continue
+
             points_gained = points_gained_by_user.get(username, 0)
 
             if not GoalChecker.check_goal_achievement(points_gained, daily_goal):
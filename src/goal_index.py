@@ -0,0 +1,103 @@
+import heapq
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import UserData
+
+
+class GoalIndex:
+    def __init__(self):
+        self._heap: List[Tuple[str, str]] = []
+        self._end_dates: Dict[str, str] = {}
+
+    @classmethod
+    def from_db(cls, db: Dict[str, UserData]) -> "GoalIndex":
+        """Build an index of users with active goals, ordered by end date."""
+        end_dates = {}
+        for username, user_data in db.items():
+            goal = user_data.get("goal")
+            if goal is not None and len(goal) >= 2:
+                end_dates[username] = goal[1]
+        return cls.from_end_dates(end_dates)
+
+    @classmethod
+    def from_end_dates(cls, end_dates: Dict[str, str]) -> "GoalIndex":
+        index = cls()
+        index._end_dates = dict(end_dates)
+        index._heap = [(end_date, username) for username, end_date in end_dates.items()]
+        heapq.heapify(index._heap)
+        return index
+
+    @classmethod
+    def load(cls, path: str, stamp: Optional[List]) -> Optional["GoalIndex"]:
+        """
+        Load an index saved for the database file identified by stamp.
+        Returns None if there is none, or it describes another version of the file.
+        """
+        if stamp is None:
+            return None
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if saved.get("stamp") != stamp:
+            return None
+        return cls.from_end_dates(saved["end_dates"])
+
+    def save(self, path: str, stamp: List) -> None:
+        """Atomically write the index, stamped with the database file it describes."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"stamp": stamp, "end_dates": self._end_dates}, f)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self._end_dates)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._end_dates
+
+    def end_date(self, username: str) -> Optional[str]:
+        """Get the indexed goal end date for a user, if they have an active goal."""
+        return self._end_dates.get(username)
+
+    def update(self, username: str, goal: Optional[List]) -> None:
+        """Record a user's new goal, or drop them from the index if it is empty."""
+        if goal is None or len(goal) < 2:
+            self.remove(username)
+            return
+        if self._end_dates.get(username) == goal[1]:
+            return
+        self._end_dates[username] = goal[1]
+        heapq.heappush(self._heap, (goal[1], username))
+        self._compact()
+
+    def remove(self, username: str) -> None:
+        """Drop a user from the index; their heap entry is discarded lazily."""
+        self._end_dates.pop(username, None)
+        self._compact()
+
+    def pop_expired(self, current_date: str) -> List[str]:
+        """Remove and return users whose goals ended before current_date."""
+        expired = []
+        while self._heap and self._heap[0][0] < current_date:
+            end_date, username = heapq.heappop(self._heap)
+            # Skip entries superseded by a later update or removal
+            if self._end_dates.get(username) == end_date:
+                del self._end_dates[username]
+                expired.append(username)
+        return expired
+
+    def active_users(self) -> Iterator[str]:
+        """Iterate over users with an indexed goal."""
+        return iter(list(self._end_dates))
+
+    def _compact(self) -> None:
+        # Rebuild once stale entries outnumber live ones, keeping pops O(log n)
+        if len(self._heap) > 2 * len(self._end_dates) + 16:
+            self._heap = [
+                (end_date, username) for username, end_date in self._end_dates.items()
+            ]
+            heapq.heapify(self._heap)
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import json
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+
+from .goal_checker import GoalChecker
+from .ranking import RankingView
+
+
+class CachedResponse:
+    def __init__(self, payload):
+        self.body = json.dumps(payload).encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzipped(self) -> bytes:
+        """The body gzip-compressed, computed once on first use."""
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, mtime=0)
+        return self._gzipped
+
+
+class StatsHttpApi:
+    def __init__(self, ranking_view: RankingView):
+        self.ranking_view = ranking_view
+        self._cache: Dict[str, CachedResponse] = {}
+        # View generation the cached responses were built from
+        self._cache_generation: Optional[int] = None
+
+    def create_app(self) -> web.Application:
+        """Build the read-only aiohttp application."""
+        app = web.Application()
+        app.router.add_get("/leaderboard", self.leaderboard)
+        app.router.add_get("/users", self.users)
+        app.router.add_get("/users/{username}", self.user)
+        return app
+
+    async def start(self, host: str, port: int) -> web.AppRunner:
+        """Serve the API on host:port from the running event loop."""
+        runner = web.AppRunner(self.create_app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"Serving read-only API on http://{host}:{port}")
+        return runner
+
+    async def _refresh(self) -> None:
+        # Responses are rebuilt only after the view changes. The view is shared
+        # with the bot's commands, which may have picked up a change first.
+        await self.ranking_view.refresh_async()
+        if self._cache_generation != self.ranking_view.generation:
+            self._cache.clear()
+            self._cache_generation = self.ranking_view.generation
+
+    async def _cached(self, key: str, build: Callable[[], object]) -> CachedResponse:
+        await self._refresh()
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = CachedResponse(build())
+        return cached
+
+    @staticmethod
+    def _respond(request: web.Request, cached: CachedResponse) -> web.Response:
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("If-None-Match", "")
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if cached.etag in tags or "*" in tags:
+            return web.Response(status=304, headers=headers)
+
+        body = cached.body
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = cached.gzipped
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def _user_payload(self, username: str) -> Dict:
+        user_data = self.ranking_view.users[username]
+        goal = user_data.get("goal")
+        return {
+            "username": username,
+            "easySolved": user_data["easySolved"],
+            "mediumSolved": user_data["mediumSolved"],
+            "hardSolved": user_data["hardSolved"],
+            "points": user_data["points"],
+            "weekly_points": user_data["weekly_points"],
+            "weekly_rank": self.ranking_view.ranking.rank(username),
+            "goal": (
+                {"daily_points": goal[0], "end_date": goal[1]}
+                if GoalChecker.has_active_goal(user_data)
+                else None
+            ),
+        }
+
+    async def leaderboard(self, request: web.Request) -> web.Response:
+        """GET /leaderboard: this week's top users."""
+
+        def build():
+            ranking = self.ranking_view.ranking
+            return [
+                {
+                    "rank": ranking.rank(entry.username),
+                    "username": entry.username,
+                    "points": entry.points,
+                }
+                for entry in ranking.top()
+            ]
+
+        return self._respond(request, await self._cached("leaderboard", build))
+
+    async def users(self, request: web.Request) -> web.Response:
+        """GET /users: stats and goals of every tracked user."""
+
+        def build():
+            return [
+                self._user_payload(username) for username in self.ranking_view.users
+            ]
+
+        return self._respond(request, await self._cached("users", build))
+
+    async def user(self, request: web.Request) -> web.Response:
+        """GET /users/{username}: one user's stats and goal."""
+        username = request.match_info["username"]
+        await self._refresh()
+        if username not in self.ranking_view.users:
+            return web.json_response({"error": "unknown user"}, status=404)
+        return self._respond(
+            request,
+            await self._cached(
+                f"users/{username}", lambda: self._user_payload(username)
+            ),
+        )
@@ -0,0 +1,156 @@
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class LeaseLostError(Exception):
+    def __init__(self, token: int):
+        super().__init__(f"Lease with fencing token {token} is no longer held")
+        self.token = token
+
+
+class FileLease:
+    def __init__(
+        self,
+        lease_path: str,
+        holder: Optional[str] = None,
+        ttl: float = 30.0,
+        clock=time.time,
+    ):
+        self.lease_path = lease_path
+        self.lock_path = f"{lease_path}.lock"
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        self.clock = clock
+
+    @contextmanager
+    def _lock(self):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.lease_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt lease file: {self.lease_path}")
+            return {}
+
+    def _write(self, state: Dict) -> None:
+        tmp_path = f"{self.lease_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.lease_path)
+
+    def _is_live(self, state: Dict) -> bool:
+        return bool(state) and not state["released"] and state["expires"] > self.clock()
+
+    def acquire(self, run_key: Optional[str] = None) -> Optional[int]:
+        """
+        Take the lease if it is free, expired or already ours.
+        Returns a fencing token that increases with every new holder, or
+        None if another replica holds the lease or already completed run_key.
+        """
+        with self._lock():
+            state = self._read()
+            if run_key is not None and state.get("completed") == run_key:
+                return None
+            if self._is_live(state) and state["holder"] != self.holder:
+                return None
+
+            token = state.get("token", 0)
+            if not self._is_live(state):
+                token += 1
+            self._write(
+                {
+                    "holder": self.holder,
+                    "token": token,
+                    "expires": self.clock() + self.ttl,
+                    "released": False,
+                    "completed": state.get("completed"),
+                }
+            )
+            return token
+
+    def renew(self, token: int) -> bool:
+        """Extend the lease. Returns False if another holder has taken it over."""
+        with self._lock():
+            state = self._read()
+            if state.get("token") != token or state["released"]:
+                return False
+            state["expires"] = self.clock() + self.ttl
+            self._write(state)
+            return True
+
+    def check(self, token: int) -> None:
+        """
+        Raise LeaseLostError unless the lease is still live under this token.
+        Call it while holding the lock of whatever is about to be written, so
+        a successor's writes can't interleave with ours.
+        """
+        with self._lock():
+            state = self._read()
+        if state.get("token") != token or not self._is_live(state):
+            raise LeaseLostError(token)
+
+    def release(self, token: int, completed: Optional[str] = None) -> None:
+        """
+        Give up the lease so a standby can take over at once. Marking run
+        `completed` stops standbys waiting on that run from repeating it.
+        """
+        with self._lock():
+            state = self._read()
+            if state.get("token") != token:
+                return
+            state["released"] = True
+            state["expires"] = self.clock()
+            if completed is not None:
+                state["completed"] = completed
+            self._write(state)
+
+    def wait(
+        self, run_key: str, poll_interval: float = 1.0, sleep=time.sleep
+    ) -> Optional[int]:
+        """
+        Stand by until this replica takes the lease for run_key, or another
+        replica completes it. Returns the fencing token, or None if the run
+        was completed elsewhere.
+        """
+        while True:
+            token = self.acquire(run_key)
+            if token is not None:
+                return token
+            if self._read().get("completed") == run_key:
+                return None
+            sleep(poll_interval)
+
+    @contextmanager
+    def hold(self, token: int, interval: Optional[float] = None):
+        """Renew the lease in the background until the block exits."""
+        interval = self.ttl / 3 if interval is None else interval
+        stopped = threading.Event()
+
+        def renew_until_stopped():
+            while not stopped.wait(interval):
+                if not self.renew(token):
+                    print(f"Lost lease {self.lease_path} to another replica")
+                    return
+
+        renewer = threading.Thread(target=renew_until_stopped, daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            renewer.join()
@@ -1,22 +1,166 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Union
+
 import requests
-from typing import Optional
 
-from .models import UserStats
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .endpoint_selector import EndpointSelector
+from .models import UserStats, AcceptedSubmission
 
 
 class LeetCodeAPI:
-    def __init__(self, api_url: str):
-        self.api_url = api_url
+    def __init__(
+        self,
+        api_url: Union[str, List[str]],
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        selector: Optional[EndpointSelector] = None,
+        request_timeout: float = 30.0,
+    ):
+        if isinstance(api_url, str):
+            # A comma-separated list names several mirrors of the stats proxy
+            api_url = [url.strip() for url in api_url.split(",") if url.strip()]
+        if not api_url:
+            raise ValueError(
+                "No LeetCode API URL configured; set LEETCODE_API_URL to the "
+                "stats proxy or a comma-separated list of mirrors"
+            )
+        self.endpoints = api_url
+        self.api_url = api_url[0]
+        self.circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
+        self.selector = selector if selector is not None else EndpointSelector(api_url)
+        self.request_timeout = request_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def close(self) -> None:
+        """Stop the threads used to hedge requests across mirrors."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _is_server_failure(error: requests.RequestException) -> bool:
+        # Client errors such as an unknown user don't mean the API is down
+        response = getattr(error, "response", None)
+        return response is None or response.status_code >= 500
+
+    def _get(self, path: str) -> requests.Response:
+        """GET a path through the circuit breaker, failing fast while it is open."""
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(self.circuit_breaker.name)
+        try:
+            if len(self.endpoints) == 1:
+                response = requests.get(
+                    f"{self.api_url}{path}", timeout=self.request_timeout
+                )
+                response.raise_for_status()
+            else:
+                response = self._hedged_get(path)
+        except requests.RequestException as e:
+            if self._is_server_failure(e):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        self.circuit_breaker.record_success()
+        return response
+
+    def _fetch(self, endpoint: str, path: str) -> requests.Response:
+        """GET a path from one endpoint, recording its latency and health."""
+        start = time.monotonic()
+        try:
+            response = requests.get(f"{endpoint}{path}", timeout=self.request_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self.selector.record(
+                endpoint, time.monotonic() - start, not self._is_server_failure(e)
+            )
+            raise
+        self.selector.record(endpoint, time.monotonic() - start, True)
+        return response
+
+    def _hedged_get(self, path: str) -> requests.Response:
+        """
+        Send the request to the best endpoint. If it is slower than that
+        endpoint's hedge percentile, send a duplicate to the next best and use
+        whichever answers first. Server failures fail over to the next endpoint.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints))
+
+        ranked = self.selector.ranked()
+        backups = iter(ranked[1:])
+        pending = {self._executor.submit(self._fetch, ranked[0], path)}
+        hedge_delay = self.selector.hedge_delay(ranked[0])
+        last_error: Optional[requests.RequestException] = None
+
+        def launch_backup() -> bool:
+            endpoint = next(backups, None)
+            if endpoint is None:
+                return False
+            pending.add(self._executor.submit(self._fetch, endpoint, path))
+            return True
+
+        while pending:
+            done, pending = wait(pending, hedge_delay, return_when=FIRST_COMPLETED)
+            if not done:
+                # The request is in the slow tail; hedge it once
+                launch_backup()
+                hedge_delay = None
+                continue
+            for future in done:
+                try:
+                    return future.result()
+                except requests.RequestException as e:
+                    if not self._is_server_failure(e):
+                        raise
+                    last_error = e
+            if not pending:
+                launch_backup()
+        raise last_error
 
     def get_user_stats(self, lc_id: str) -> Optional[UserStats]:
         """Fetch user statistics from LeetCode API."""
         try:
-            response = requests.get(f"{self.api_url}/{lc_id}/solved")
-            response.raise_for_status()
+            response = self._get(f"/{lc_id}/solved")
             return response.json()
+        except CircuitOpenError:
+            return None
         except requests.RequestException as e:
             print(f"Error fetching stats for {lc_id}: {e}")
             return None
         except Exception as e:
             print(f"Unexpected error fetching stats for {lc_id}: {e}")
             return None
+
+    def get_recent_accepted(
+        self, lc_id: str, limit: int = 20
+    ) -> Optional[List[AcceptedSubmission]]:
+        """Fetch a user's most recent accepted submissions, newest first."""
+        try:
+            response = self._get(f"/{lc_id}/acSubmission?limit={limit}")
+            return response.json()["submission"]
+        except CircuitOpenError:
+            return None
+        except requests.RequestException as e:
+            print(f"Error fetching submissions for {lc_id}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error fetching submissions for {lc_id}: {e}")
+            return None
+
+    def get_problem_difficulty(self, title_slug: str) -> Optional[str]:
+        """Fetch a problem's difficulty ("Easy", "Medium" or "Hard")."""
+        try:
+            response = self._get(f"/select?titleSlug={title_slug}")
+            return response.json()["difficulty"]
+        except CircuitOpenError:
+            return None
+        except requests.RequestException as e:
+            print(f"Error fetching problem {title_slug}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error fetching problem {title_slug}: {e}")
+            return None
@@ -1,91 +1,538 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from .database import DatabaseManager
 from .leetcode_api import LeetCodeAPI
 from .points_calculator import PointsCalculator
 from .goal_checker import GoalChecker
 from .leaderboard import LeaderboardManager
-from .models import UserToTag, LeaderboardEntry, UserData
+from .checkpoint import CheckpointManager
+from .circuit_breaker import CircuitBreaker
+from .goal_index import GoalIndex
+from .stats_cache import StatsCache
+from .problem_catalog import ProblemCatalog
+from .poll_scheduler import PollScheduler
+from .progress_run import ProgressRun
+from .profiler import NullProfiler
+from .scoring import Rescorer
+from .source_scheduler import SourceScheduler
+from .stats_sources import LeetCodeSource, StatsSource
+from .models import (
+    UserToTag,
+    LeaderboardEntry,
+    UserData,
+    UserStats,
+    UserUpdate,
+    ScoringScheme,
+    DEFAULT_SCORING_SCHEME,
+)
 
 
 class LeetCodeService:
-    def __init__(self, api_url: str, db_path: str = None):
+    def __init__(
+        self,
+        api_url: str,
+        db_path: str = None,
+        checkpoint_interval: int = 25,
+        stats_cache: Optional[StatsCache] = None,
+        max_stats_age: float = 60 * 60,
+        incremental: bool = False,
+        problem_cache_path: Optional[str] = None,
+        submission_limit: int = 20,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        poll_scheduler: Optional[PollScheduler] = None,
+        clock=time.time,
+        profiler=None,
+        fence: Optional[Callable[[], None]] = None,
+        scoring_scheme: ScoringScheme = DEFAULT_SCORING_SCHEME,
+        sources: Sequence[StatsSource] = (),
+        linked_fetch_timeout: float = 10 * 60,
+    ):
         self.db_manager = DatabaseManager(db_path)
-        self.leetcode_api = LeetCodeAPI(api_url)
+        self.leetcode_api = LeetCodeAPI(api_url, circuit_breaker)
         self.points_calculator = PointsCalculator()
         self.goal_checker = GoalChecker()
         self.leaderboard_manager = LeaderboardManager()
+        self.checkpoint_manager = CheckpointManager(
+            f"{self.db_manager.db_path}.checkpoint"
+        )
+        self.checkpoint_interval = checkpoint_interval
+        self.stats_cache = stats_cache
+        self.max_stats_age = max_stats_age
+        # Platforms besides LeetCode whose gains count towards the same goals
+        self.sources = list(sources)
+        # All fetches share its rate limits, batching and the poller's cache
+        self.scheduler = SourceScheduler(
+            [LeetCodeSource(self.leetcode_api), *self.sources],
+            stats_cache,
+            max_stats_age,
+        )
+        self.incremental = incremental
+        self.submission_limit = submission_limit
+        self.problem_catalog = (
+            ProblemCatalog(self.leetcode_api, problem_cache_path)
+            if incremental
+            else None
+        )
+        self.poll_scheduler = poll_scheduler
+        self.clock = clock
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        # Raises if this replica lost its lease, before anything is written
+        self.fence = fence
+        self.scoring_scheme = scoring_scheme
+        # Longest wait for a user's linked accounts when a run has no deadline
+        self.linked_fetch_timeout = linked_fetch_timeout
+        self.rescorer = Rescorer(self.db_manager, scoring_scheme, fence)
+        # Users the last run didn't reach before its deadline
+        self.carried_over: List[str] = []
+
+    def close(self) -> None:
+        """Release the worker threads used for fetching."""
+        self.scheduler.close()
+        self.leetcode_api.close()
+
+    def get_user_stats(self, lc_id: str) -> Optional[UserStats]:
+        """Get a user's stats, preferring ones refreshed recently by the poller."""
+        return self.scheduler.fetch(LeetCodeSource.name, lc_id)
+
+    def check_fence(self) -> None:
+        """Stop a replica that lost its lease from writing results."""
+        if self.fence is not None:
+            self.fence()
+
+    def ensure_scoring_current(self, update_db: bool) -> bool:
+        """
+        Rescore stored points if the scoring scheme changed since they were
+        computed, so gains are measured on one scale. Returns whether it
+        changed, in which case copies of records not read from the stored
+        database after this call, such as a resumed run's snapshot, must be
+        rescored in memory.
+        """
+        if not self.rescorer.needs_rescore():
+            return False
+        if update_db:
+            self.rescorer.rescore()
+        return True
+
+    def is_due(self, username: str, user_data: UserData, current_date: str) -> bool:
+        """Whether the poll schedule, if any, wants the user fetched today."""
+        if self.poll_scheduler is None:
+            return True
+        return self.poll_scheduler.should_fetch(username, user_data, current_date)
+
+    def record_poll(self, username: str, points_gained: int, current_date: str) -> None:
+        """Feed a completed fetch into the poll schedule, if any."""
+        if self.poll_scheduler is not None:
+            self.poll_scheduler.record(username, points_gained, current_date)
+
+    def evaluate_user(
+        self, user_data: UserData, deadline: Optional[float] = None
+    ) -> Optional[UserUpdate]:
+        """
+        Fetch a user's latest progress and score it against their stored record.
+        Linked accounts on other platforms are fetched alongside LeetCode and
+        their gains are added to the user's, if they arrive by the deadline.
+        """
+        linked = self.scheduler.submit_linked(user_data, skip=[LeetCodeSource.name])
+        if self.incremental:
+            update = self._evaluate_submissions(user_data)
+        else:
+            update = self._evaluate_totals(user_data)
+        if update is not None and linked:
+            self._add_linked_gains(user_data, update, linked, deadline)
+        return update
+
+    def prefetch_linked(self, users: Iterable[UserData]) -> None:
+        """
+        Start fetching users' linked accounts in the order given, so waiting
+        on rate-limited platforms overlaps with fetching LeetCode.
+        """
+        if not self.sources:
+            return
+        for user_data in users:
+            self.scheduler.submit_linked(user_data, skip=[LeetCodeSource.name])
+
+    def _add_linked_gains(
+        self,
+        user_data: UserData,
+        update: UserUpdate,
+        linked: Dict[str, Future],
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Score each linked account against its stored counts. The first counts
+        fetched for an account are its baseline; a failed fetch, or one still
+        waiting at the deadline, gains nothing. Its stored counts are kept, so
+        the gain is counted by the next run instead.
+        """
+        if deadline is None:
+            deadline = self.clock() + self.linked_fetch_timeout
+        for name, future in linked.items():
+            try:
+                counts = future.result(timeout=max(0.0, deadline - self.clock()))
+            except FutureTimeoutError:
+                print(f"Timed out waiting for {name} stats; counting no gains from it")
+                continue
+            except Exception as e:
+                print(f"Error fetching {name} stats: {e}")
+                counts = None
+            if counts is None:
+                print(f"Failed to fetch {name} stats; counting no gains from it")
+                continue
+
+            account = user_data["sources"][name]
+            if "easySolved" in account:
+                # Both sides use the current scheme, so it can change freely
+                update.points_gained += self.points_calculator.calculate_points_gained(
+                    self.points_calculator.calculate_points(
+                        counts, self.scoring_scheme
+                    ),
+                    self.points_calculator.calculate_points(
+                        account, self.scoring_scheme
+                    ),
+                )
+            update.sources[name] = {
+                "handle": account["handle"],
+                "easySolved": counts["easySolved"],
+                "mediumSolved": counts["mediumSolved"],
+                "hardSolved": counts["hardSolved"],
+            }
+
+    def _evaluate_totals(
+        self,
+        user_data: UserData,
+        submission_cursor: Optional[int] = None,
+        fresh: bool = False,
+    ) -> Optional[UserUpdate]:
+        # Totals stored alongside a submission cursor must be no older than
+        # the submissions it covers, and goal holders are judged on today's
+        # progress, so both bypass the poller's cache
+        if fresh or self.goal_checker.has_active_goal(user_data):
+            fetched_stats = self.leetcode_api.get_user_stats(user_data["lc_id"])
+        else:
+            fetched_stats = self.get_user_stats(user_data["lc_id"])
+        if fetched_stats is None:
+            return None
+
+        # Calculate points
+        previous_points = user_data["points"]
+        current_points = self.points_calculator.calculate_points(
+            fetched_stats, self.scoring_scheme
+        )
+        points_gained = self.points_calculator.calculate_points_gained(
+            current_points, previous_points
+        )
+        # A newly linked account's totals become its baseline, not a gain
+        if user_data.get("baseline_pending"):
+            points_gained = 0
+        return UserUpdate(
+            easy_solved=fetched_stats["easySolved"],
+            medium_solved=fetched_stats["mediumSolved"],
+            hard_solved=fetched_stats["hardSolved"],
+            points=current_points,
+            points_gained=points_gained,
+            submission_cursor=(
+                submission_cursor
+                if submission_cursor is not None
+                else user_data.get("submission_cursor")
+            ),
+        )
+
+    def _evaluate_submissions(self, user_data: UserData) -> Optional[UserUpdate]:
+        """
+        Score only accepted submissions newer than the user's cursor, counting
+        no more new solves than the user's totals gained, so stored counts
+        never exceed the real ones. Without a cursor yet, or if every returned
+        submission is new (so older ones may have been cut off), or a
+        difficulty cannot be looked up, fall back to the aggregate totals;
+        a pending baseline still counts nothing as gained.
+        """
+        lc_id = user_data["lc_id"]
+        submissions = self.leetcode_api.get_recent_accepted(
+            lc_id, self.submission_limit
+        )
+        if submissions is None:
+            return None
+
+        cursor = user_data.get("submission_cursor")
+        newest = max(
+            [int(s["timestamp"]) for s in submissions] + [cursor or 0], default=0
+        )
+
+        if cursor is None:
+            return self._evaluate_totals(user_data, newest, fresh=True)
+
+        new_slugs = {
+            s["titleSlug"] for s in submissions if int(s["timestamp"]) > cursor
+        }
+        if len(submissions) >= self.submission_limit and all(
+            int(s["timestamp"]) > cursor for s in submissions
+        ):
+            return self._evaluate_totals(user_data, newest, fresh=True)
+
+        solved = {"easy": 0, "medium": 0, "hard": 0}
+        for slug in new_slugs:
+            difficulty = self.problem_catalog.get_difficulty(slug)
+            if difficulty is None:
+                return self._evaluate_totals(user_data, newest, fresh=True)
+            solved[difficulty.lower()] += 1
+
+        if new_slugs:
+            # Re-accepting an already solved problem doesn't move the totals,
+            # so gains are capped at how far each total moved. Fresh totals,
+            # fetched after the submissions, include every new solve.
+            totals = self.leetcode_api.get_user_stats(lc_id)
+            if totals is None:
+                return None
+            for difficulty in solved:
+                key = f"{difficulty}Solved"
+                solved[difficulty] = min(
+                    solved[difficulty], max(0, totals[key] - user_data[key])
+                )
+
+        points_gained = self.points_calculator.calculate_difficulty_points(
+            solved, self.scoring_scheme
+        )
+        return UserUpdate(
+            easy_solved=user_data["easySolved"] + solved["easy"],
+            medium_solved=user_data["mediumSolved"] + solved["medium"],
+            hard_solved=user_data["hardSolved"] + solved["hard"],
+            points=user_data["points"] + points_gained,
+            points_gained=points_gained,
+            submission_cursor=newest,
+        )
+
+    @staticmethod
+    def prioritized(db: Dict[str, UserData], goal_index: GoalIndex) -> List[str]:
+        """
+        Usernames in fetch order: users with active goals first, then users
+        who can place on the weekly leaderboard (most points first), then
+        everyone else.
+        """
+
+        def priority(username: str) -> Tuple[int, int]:
+            if username in goal_index:
+                return 0, 0
+            weekly_points = db[username]["weekly_points"]
+            if weekly_points > 0:
+                return 1, -weekly_points
+            return 2, 0
+
+        return sorted(db, key=priority)
 
     def check_and_update_progress(
-        self, update_db: bool = True
+        self, update_db: bool = True, deadline: Optional[float] = None
     ) -> Tuple[List[UserToTag], List[LeaderboardEntry], bool]:
         """
         Main method to check progress and update database.
+        When updating, progress is checkpointed every `checkpoint_interval`
+        users so that a rerun on the same day resumes instead of starting over.
+        Users whose stats could not be fetched are not tagged.
+        With a `deadline` (a `clock()` timestamp), users are fetched in
+        priority order and those not reached in time are carried over: they
+        are listed in `carried_over`, not tagged, and picked up by a rerun.
+        Returns: (users_to_tag, leaderboard, is_monday)
+        """
+        run = ProgressRun(self, datetime.now(), update_db, deadline)
+        run.start()
+        for username, user_data in run.users_to_fetch():
+            try:
+                update = run.fetch(user_data)
+            except Exception as e:
+                run.record_error(username, e)
+                continue
+            if run.record(username, update):
+                run.save_checkpoint()
+
+        self.carried_over = run.carried_over
+        return run.finish()
+
+    async def check_and_update_progress_async(
+        self, update_db: bool = True, deadline: Optional[float] = None
+    ) -> Tuple[List[UserToTag], List[LeaderboardEntry], bool]:
+        """
+        Async variant of check_and_update_progress for use on an event loop.
+        Fetches and file I/O run in worker threads, and control returns to
+        the loop between users, so a long run never blocks the bot.
+        Returns: (users_to_tag, leaderboard, is_monday)
+        """
+        run = ProgressRun(self, datetime.now(), update_db, deadline)
+        await asyncio.to_thread(run.start)
+        for username, user_data in run.users_to_fetch():
+            try:
+                update = await asyncio.to_thread(run.fetch, user_data)
+            except Exception as e:
+                run.record_error(username, e)
+                continue
+            if run.record(username, update):
+                await asyncio.to_thread(run.save_checkpoint)
+            await asyncio.sleep(0)
+
+        self.carried_over = run.carried_over
+        return await asyncio.to_thread(run.finish)
+
+    @staticmethod
+    def apply_update(user_data: UserData, update: UserUpdate) -> None:
+        """Store a user's fetched update in their record, in place."""
+        user_data["easySolved"] = update.easy_solved
+        user_data["mediumSolved"] = update.medium_solved
+        user_data["hardSolved"] = update.hard_solved
+        user_data["points"] = update.points
+        user_data["weekly_points"] += update.points_gained
+        if update.submission_cursor is not None:
+            user_data["submission_cursor"] = update.submission_cursor
+        if update.sources:
+            # A new dict, so merging sees the change against the snapshot
+            user_data["sources"] = {**user_data.get("sources", {}), **update.sources}
+        user_data.pop("baseline_pending", None)
+
+    def stream_and_update_progress(
+        self, update_db: bool = True, window: int = 8
+    ) -> Tuple[List[UserToTag], List[LeaderboardEntry], bool]:
+        """
+        Streaming variant of check_and_update_progress.
+        Users are read lazily and flow through fetch -> score -> goal check ->
+        write stages one record at a time, so memory is bounded by `window`
+        in-flight fetches rather than by user count. The database file is
+        replaced only once the whole stream has been written, merging in any
+        changes saved by other processes meanwhile.
         Returns: (users_to_tag, leaderboard, is_monday)
         """
-        db = self.db_manager.get_db()
         today = datetime.now()
         is_monday = today.weekday() == 0
         current_date = today.strftime("%Y-%m-%d")
 
-        # Initialize weekly points if needed
-        db = self.db_manager.initialize_weekly_points(db)
+        leaderboard: List[LeaderboardEntry] = []
+        users_to_tag: List[UserToTag] = []
 
-        # Handle Monday leaderboard and reset
-        leaderboard = []
-        if is_monday:
-            leaderboard = self.leaderboard_manager.get_weekly_leaderboard(db)
+        # The stages interleave, so the whole pipeline is profiled as one phase
+        with self.profiler.phase("stream"):
+            rescore_in_memory = self.ensure_scoring_current(update_db) and not update_db
             if update_db:
-                db = self.db_manager.reset_weekly_points(db)
+                self.db_manager.take_snapshot()
+                users = self.db_manager.snapshot().iter_users()
+            else:
+                users = self.db_manager.iter_users()
+            if rescore_in_memory:
+                users = self._rescored(users)
+            fetched = self._fetch_stage(users, window, current_date)
+            scored = self._score_stage(
+                fetched, is_monday, leaderboard, update_db, current_date
+            )
+            checked = self._goal_stage(scored, current_date, users_to_tag, update_db)
 
-        # Process each user
-        points_gained_by_user = {}
+            if update_db:
+                with self.db_manager.stream_writer(self.fence) as writer:
+                    for username, user_data in checked:
+                        writer.write_user(username, user_data)
+                    self.check_fence()
+            else:
+                for _ in checked:
+                    pass
 
-        for username, user_data in db.items():
-            try:
-                lc_id = user_data["lc_id"]
-                fetched_stats = self.leetcode_api.get_user_stats(lc_id)
-
-                if fetched_stats is None:
-                    print(f"Failed to fetch stats for {username}")
-                    points_gained_by_user[username] = 0  # Set to 0 for failed API calls
-                    continue
-
-                # Calculate points
-                previous_points = user_data.get("points", 0)
-                current_points = self.points_calculator.calculate_points(fetched_stats)
-                points_gained = self.points_calculator.calculate_points_gained(
-                    current_points, previous_points
-                )
-                points_gained_by_user[username] = points_gained
+            if self.problem_catalog is not None:
+                self.problem_catalog.save()
+            if update_db and self.poll_scheduler is not None:
+                self.poll_scheduler.save()
 
-                print(f"{username} has gained {points_gained} points")
+        leaderboard.sort(key=lambda x: x.points, reverse=True)
+        return users_to_tag, leaderboard, is_monday
 
-                # Update database if requested
-                if update_db:
-                    db = self.db_manager.update_user_stats(
-                        db,
-                        username,
-                        fetched_stats["easySolved"],
-                        fetched_stats["mediumSolved"],
-                        fetched_stats["hardSolved"],
-                        current_points,
-                        points_gained,
+    def _rescored(
+        self, users: Iterable[Tuple[str, UserData]]
+    ) -> Iterator[Tuple[str, UserData]]:
+        for username, user_data in users:
+            Rescorer.rescore_db({username: user_data}, self.scoring_scheme)
+            yield username, user_data
+
+    def _fetch_stage(
+        self, users: Iterable[Tuple[str, UserData]], window: int, current_date: str
+    ) -> Iterator[Tuple[str, UserData, Optional[UserUpdate]]]:
+        """Fetch updates with at most `window` requests in flight, preserving order."""
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            for username, user_data in users:
+                future = None
+                if not user_data["lc_id"]:
+                    print(f"Skipping {username} because they have no LeetCode id")
+                elif not self.is_due(username, user_data, current_date):
+                    print(f"Skipping {username} until their next scheduled fetch")
+                else:
+                    future = executor.submit(self.evaluate_user, user_data)
+                in_flight.append((username, user_data, future))
+                if len(in_flight) >= window:
+                    yield self._resolve_fetch(*in_flight.popleft())
+            while in_flight:
+                yield self._resolve_fetch(*in_flight.popleft())
+
+    @staticmethod
+    def _resolve_fetch(username: str, user_data: UserData, future):
+        if future is None:
+            return username, user_data, None
+        try:
+            update = future.result()
+            if update is None:
+                print(f"Failed to fetch stats for {username}")
+            return username, user_data, update
+        except Exception as e:
+            print(f"Error processing {username}: {e}")
+            return username, user_data, None
+
+    def _score_stage(
+        self,
+        fetched: Iterable[Tuple[str, UserData, Optional[UserUpdate]]],
+        is_monday: bool,
+        leaderboard: List[LeaderboardEntry],
+        update_db: bool,
+        current_date: str,
+    ) -> Iterator[Tuple[str, UserData, Optional[int]]]:
+        """Apply the weekly reset and each user's fetched update."""
+        for username, user_data, update in fetched:
+            if is_monday:
+                leaderboard.append(
+                    LeaderboardEntry(
+                        username=username, points=user_data["weekly_points"]
                     )
+                )
+                if update_db:
+                    user_data["weekly_points"] = 0
 
-            except Exception as e:
-                print(f"Error processing {username}: {e}")
+            if update is None:
+                # Users without a LeetCode id gain nothing; skipped or failed
+                # fetches are unknown
+                yield username, user_data, None if user_data["lc_id"] else 0
                 continue
 
-        # Clear expired goals and save database
-        if update_db:
-            db = self.db_manager.clear_expired_goals(db, current_date)
-            self.db_manager.save_db(db)
+            print(f"{username} has gained {update.points_gained} points")
 
-        # Get users to tag based on goals
-        users_to_tag = self.goal_checker.get_users_to_tag(
-            db, points_gained_by_user, current_date
-        )
+            if update_db:
+                self.apply_update(user_data, update)
+                self.record_poll(username, update.points_gained, current_date)
 
-        return users_to_tag, leaderboard, is_monday
+            yield username, user_data, update.points_gained
+
+    def _goal_stage(
+        self,
+        scored: Iterable[Tuple[str, UserData, Optional[int]]],
+        current_date: str,
+        users_to_tag: List[UserToTag],
+        update_db: bool,
+    ) -> Iterator[Tuple[str, UserData]]:
+        """Collect users who missed their goal and clear expired goals."""
+        for username, user_data, points_gained in scored:
+            # Users whose stats could not be fetched are not tagged
+            if points_gained is not None:
+                users_to_tag.extend(
+                    self.goal_checker.get_users_to_tag(
+                        {username: user_data}, {username: points_gained}, current_date
+                    )
+                )
+            if update_db and self.goal_checker.has_active_goal(user_data):
+                if self.goal_checker.is_goal_expired(user_data, current_date):
+                    user_data["goal"] = []
+            yield username, user_data
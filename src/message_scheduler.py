@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+LEADERBOARD_PRIORITY = 0
+TAG_PRIORITY = 1
+
+
+@dataclass(order=True)
+class OutboundMessage:
+    priority: int
+    sequence: int
+    channel_key: Hashable = field(compare=False)
+    content: str = field(compare=False)
+    send: Callable[[str], Awaitable] = field(compare=False, repr=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class ChannelBucket:
+    def __init__(self, capacity: int, period: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.period = period
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+        self.blocked_until = 0.0
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self.updated_at
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.capacity / self.period
+        )
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        """Seconds until a message may be sent on this channel."""
+        self._refill()
+        now = self.clock()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.period / self.capacity
+
+    def consume(self) -> None:
+        """Spend one token for a message about to be sent."""
+        self._refill()
+        self.tokens -= 1
+
+    def block_for(self, seconds: float) -> None:
+        """Hold the bucket closed, e.g. after Discord returns a 429."""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+        self.tokens = 0.0
+
+
+class MessageScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        bucket_capacity: int = 5,
+        bucket_period: float = 5.0,
+        sleep=asyncio.sleep,
+        clock=time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.bucket_capacity = bucket_capacity
+        self.bucket_period = bucket_period
+        self.sleep = sleep
+        self.clock = clock
+        self._pending: Dict[Hashable, List[OutboundMessage]] = {}
+        self._buckets: Dict[Hashable, ChannelBucket] = {}
+        self._sequence = itertools.count()
+
+    def enqueue(
+        self,
+        channel_key: Hashable,
+        send: Callable[[str], Awaitable],
+        content: str,
+        priority: int = TAG_PRIORITY,
+    ) -> None:
+        """Queue a message; `send` is awaited with the content when it goes out."""
+        message = OutboundMessage(
+            priority, next(self._sequence), channel_key, content, send
+        )
+        heapq.heappush(self._pending.setdefault(channel_key, []), message)
+
+    def pending_count(self) -> int:
+        """Number of messages waiting to be sent."""
+        return sum(len(queue) for queue in self._pending.values())
+
+    async def flush(self) -> List[OutboundMessage]:
+        """
+        Send every queued message. Each channel is drained in priority order,
+        and different channels are sent to concurrently up to `max_concurrency`.
+        Returns the messages that could not be sent.
+        """
+        pending, self._pending = self._pending, {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(
+                self._drain_channel(channel_key, queue, semaphore)
+                for channel_key, queue in pending.items()
+            )
+        )
+        return [message for failed in results for message in failed]
+
+    def _bucket(self, channel_key: Hashable) -> ChannelBucket:
+        bucket = self._buckets.get(channel_key)
+        if bucket is None:
+            bucket = ChannelBucket(self.bucket_capacity, self.bucket_period, self.clock)
+            self._buckets[channel_key] = bucket
+        return bucket
+
+    async def _drain_channel(
+        self,
+        channel_key: Hashable,
+        queue: List[OutboundMessage],
+        semaphore: asyncio.Semaphore,
+    ) -> List[OutboundMessage]:
+        failed = []
+        bucket = self._bucket(channel_key)
+        while queue:
+            message = heapq.heappop(queue)
+            if not await self._send_with_retry(message, bucket, semaphore):
+                failed.append(message)
+        return failed
+
+    async def _send_with_retry(
+        self,
+        message: OutboundMessage,
+        bucket: ChannelBucket,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        while True:
+            wait = bucket.wait_time()
+            while wait > 0:
+                await self.sleep(wait)
+                wait = bucket.wait_time()
+
+            message.attempts += 1
+            bucket.consume()
+            try:
+                async with semaphore:
+                    await message.send(message.content)
+                return True
+            except Exception as e:
+                delay = self._retry_delay(e, message.attempts)
+                if delay is None or message.attempts > self.max_retries:
+                    print(f"Failed to send message to {message.channel_key}: {e}")
+                    return False
+                print(f"Retrying message to {message.channel_key} in {delay:.1f}s: {e}")
+                if getattr(e, "status", None) == 429:
+                    bucket.block_for(delay)
+                else:
+                    await self.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempts: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is permanent."""
+        status = getattr(error, "status", None)
+        if status == 429:
+            retry_after = getattr(error, "retry_after", None)
+            if retry_after is None:
+                response = getattr(error, "response", None)
+                headers = getattr(response, "headers", None) or {}
+                retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                return float(retry_after)
+        elif status is not None and status < 500:
+            return None
+        return self.base_backoff * 2 ** (attempts - 1)
@@ -0,0 +1,58 @@
+from typing import Callable, Dict, List, Optional
+
+from .models import UserData
+from .points_calculator import PointsCalculator
+
+
+def _normalize_record(user_data: UserData) -> None:
+    """v0 -> v1: give every record the full set of fields."""
+    user_data.setdefault("lc_id", None)
+    user_data.setdefault("goal", [])
+    user_data.setdefault("easySolved", 0)
+    user_data.setdefault("mediumSolved", 0)
+    user_data.setdefault("hardSolved", 0)
+    if "points" not in user_data:
+        user_data["points"] = PointsCalculator.calculate_points(user_data)
+    user_data.setdefault("weekly_points", 0)
+
+
+# MIGRATIONS[i] upgrades a record from schema version i to i + 1
+MIGRATIONS: List[Callable[[UserData], None]] = [
+    _normalize_record,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+class SchemaMigrator:
+    @staticmethod
+    def needs_migration(version: int) -> bool:
+        """Check if data stamped with `version` is older than the current schema."""
+        return version < SCHEMA_VERSION
+
+    @staticmethod
+    def migrate_record(user_data: UserData, from_version: int) -> UserData:
+        """Upgrade a single record in place to the current schema version."""
+        for migration in MIGRATIONS[from_version:]:
+            migration(user_data)
+        return user_data
+
+    @staticmethod
+    def migrate(db: Dict[str, UserData], from_version: int) -> Dict[str, UserData]:
+        """Upgrade every record in place to the current schema version."""
+        if SchemaMigrator.needs_migration(from_version):
+            print(
+                f"Migrating database from schema v{from_version} to v{SCHEMA_VERSION}"
+            )
+            for user_data in db.values():
+                SchemaMigrator.migrate_record(user_data, from_version)
+        return db
+
+
+def new_user_record(
+    lc_id: Optional[str] = None, goal: Optional[List] = None
+) -> UserData:
+    """Create a record in the current schema for a newly registered user."""
+    return SchemaMigrator.migrate_record(
+        {"lc_id": lc_id, "goal": goal if goal is not None else []}, 0
+    )
@@ -1,6 +1,6 @@
 from typing import TypedDict, List, Dict, Optional, Tuple
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class DifficultyStat(TypedDict):
@@ -18,14 +18,54 @@ class UserStats(TypedDict):
     acSubmissionNum: List[DifficultyStat]
 
 
+class AcceptedSubmission(TypedDict):
+    title: str
+    titleSlug: str
+    timestamp: str  # Unix seconds, as returned by the API
+    statusDisplay: str
+    lang: str
+
+
+class SolvedCounts(TypedDict):
+    easySolved: int
+    mediumSolved: int
+    hardSolved: int
+
+
+class LinkedAccount(TypedDict, total=False):
+    handle: str
+    # Counts as of the last run; missing until the first run sets the baseline
+    easySolved: int
+    mediumSolved: int
+    hardSolved: int
+
+
 class UserData(TypedDict):
-    lc_id: str
+    lc_id: Optional[str]  # None until the user links a LeetCode account
     goal: List  # [daily_points, end_date]
     easySolved: int
     mediumSolved: int
     hardSolved: int
     points: int
     weekly_points: int
+    # Newest accepted submission already scored; only set by incremental scoring
+    submission_cursor: Optional[int]
+    # Set while a newly linked account's baseline totals are still unknown
+    baseline_pending: bool
+    # Accounts on other platforms, by source name, e.g. {"codeforces": {...}}
+    sources: Dict[str, LinkedAccount]
+
+
+@dataclass
+class UserUpdate:
+    easy_solved: int
+    medium_solved: int
+    hard_solved: int
+    points: int
+    points_gained: int
+    submission_cursor: Optional[int] = None
+    # Latest counts of the user's other platforms, by source name
+    sources: Dict[str, LinkedAccount] = field(default_factory=dict)
 
 
 @dataclass
@@ -40,8 +80,41 @@ class LeaderboardEntry:
     points: int
 
 
+@dataclass
+class OnboardingResult:
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Ids that could not be validated: unknown to LeetCode, or the API failed
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ScoringScheme:
+    version: int  # Bump whenever the weights change
+    easy: int
+    medium: int
+    hard: int
+
+
+@dataclass(frozen=True)
+class SourceLimits:
+    max_batch: int = 1  # Accounts one request can ask about
+    max_concurrency: int = 1  # Requests in flight at once
+    requests_per_second: Optional[float] = None  # None means no limit
+
+
+DEFAULT_SCORING_SCHEME = ScoringScheme(version=1, easy=1, medium=2, hard=3)
+
+# Deprecated: only the default weights, kept for existing imports. Points are
+# scored with the scheme in scoring.json; see scoring.load_scoring_scheme.
 PROBLEM_SCALE = {
-    "easy": 1,
-    "medium": 2,
-    "hard": 3,
+    "easy": DEFAULT_SCORING_SCHEME.easy,
+    "medium": DEFAULT_SCORING_SCHEME.medium,
+    "hard": DEFAULT_SCORING_SCHEME.hard,
 }
+
+
+# Top-level key in db.json holding the schema version; "$" cannot appear in
+# Discord usernames, so it never collides with a user record
+SCHEMA_VERSION_KEY = "$schema_version"
@@ -0,0 +1,116 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .database import DatabaseManager
+from .leetcode_api import LeetCodeAPI
+from .migrations import new_user_record
+from .models import (
+    OnboardingResult,
+    UserStats,
+    ScoringScheme,
+    DEFAULT_SCORING_SCHEME,
+)
+from .points_calculator import PointsCalculator
+from .scoring import Rescorer
+
+
+class BulkOnboarder:
+    def __init__(
+        self,
+        leetcode_api: LeetCodeAPI,
+        db_manager: DatabaseManager,
+        workers: int = 32,
+        scheme: ScoringScheme = DEFAULT_SCORING_SCHEME,
+    ):
+        self.leetcode_api = leetcode_api
+        self.db_manager = db_manager
+        self.workers = workers
+        self.scheme = scheme
+        self.rescorer = Rescorer(db_manager, scheme)
+
+    @staticmethod
+    def parse_mappings(lines: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Parse `discord_name,lc_id` lines. Blank lines, `#` comments and a
+        `discord_name,lc_id` header are ignored.
+        """
+        mappings = []
+        for row in csv.reader(lines):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            if len(row) != 2:
+                raise ValueError(
+                    f"Expected discord_name,lc_id but got: {','.join(row)}"
+                )
+            username, lc_id = row[0].strip(), row[1].strip()
+            if (username, lc_id) == ("discord_name", "lc_id"):
+                continue
+            mappings.append((username, lc_id))
+        return mappings
+
+    def onboard(self, mappings: List[Tuple[str, str]]) -> OnboardingResult:
+        """
+        Validate each lc_id against the API concurrently, then write every
+        valid user with their current totals as the baseline in a single
+        transaction, so their first daily run counts no fake gains. Users
+        already linked to the same lc_id are left untouched.
+        """
+        result = OnboardingResult()
+        current = self.db_manager.get_db()
+        # The last mapping for a user wins
+        pending: Dict[str, str] = {}
+        for username, lc_id in mappings:
+            pending[username] = lc_id
+        for username, lc_id in list(pending.items()):
+            if username in current and current[username]["lc_id"] == lc_id:
+                result.unchanged.append(username)
+                del pending[username]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            baselines: List[Optional[UserStats]] = list(
+                executor.map(self.leetcode_api.get_user_stats, pending.values())
+            )
+
+        validated = {}
+        for (username, lc_id), stats in zip(pending.items(), baselines):
+            if stats is None:
+                result.failed.append((username, lc_id))
+            else:
+                validated[username] = (lc_id, stats)
+
+        # Network work is done; only the write happens under the lock
+        with self.db_manager.transaction() as db:
+            # Baselines match the stored points until the checker rescores
+            scheme = self.rescorer.stored_scheme()
+            for username, (lc_id, stats) in validated.items():
+                if username in db:
+                    user_data = db[username]
+                    # A cursor belongs to the previous account
+                    user_data.pop("submission_cursor", None)
+                    result.updated.append(username)
+                else:
+                    user_data = db[username] = new_user_record()
+                    result.added.append(username)
+                user_data["lc_id"] = lc_id
+                user_data["easySolved"] = stats["easySolved"]
+                user_data["mediumSolved"] = stats["mediumSolved"]
+                user_data["hardSolved"] = stats["hardSolved"]
+                user_data["points"] = PointsCalculator.calculate_points(stats, scheme)
+                user_data.pop("baseline_pending", None)
+        return result
+
+    @staticmethod
+    def format_summary(result: OnboardingResult, max_failures: int = 20) -> str:
+        """Describe the outcome of an onboarding run."""
+        lines = [
+            f"Added {len(result.added)}, updated {len(result.updated)}, "
+            f"unchanged {len(result.unchanged)}, failed {len(result.failed)}"
+        ]
+        if result.failed:
+            lines.append("Could not validate (unknown id or API failure):")
+            for username, lc_id in result.failed[:max_failures]:
+                lines.append(f"- {username}: {lc_id}")
+            if len(result.failed) > max_failures:
+                lines.append(f"...and {len(result.failed) - max_failures} more")
+        return "\n".join(lines)
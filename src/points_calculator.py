@@ -1,17 +1,32 @@
-from .models import UserStats, PROBLEM_SCALE
+from typing import Dict
+
+from .models import UserStats, ScoringScheme, DEFAULT_SCORING_SCHEME
 
 
 class PointsCalculator:
     @staticmethod
-    def calculate_points(stats: UserStats) -> int:
+    def calculate_points(
+        stats: UserStats, scheme: ScoringScheme = DEFAULT_SCORING_SCHEME
+    ) -> int:
         """Calculate total points based on solved problems."""
         return (
-            stats["easySolved"] * PROBLEM_SCALE["easy"]
-            + stats["mediumSolved"] * PROBLEM_SCALE["medium"]
-            + stats["hardSolved"] * PROBLEM_SCALE["hard"]
+            stats["easySolved"] * scheme.easy
+            + stats["mediumSolved"] * scheme.medium
+            + stats["hardSolved"] * scheme.hard
         )
 
     @staticmethod
     def calculate_points_gained(current_points: int, previous_points: int) -> int:
         """Calculate points gained since last check."""
         return max(0, current_points - previous_points)  # Ensure non-negative
+
+    @staticmethod
+    def calculate_difficulty_points(
+        solved_by_difficulty: Dict[str, int],
+        scheme: ScoringScheme = DEFAULT_SCORING_SCHEME,
+    ) -> int:
+        """Calculate points for newly solved problems counted per difficulty."""
+        return sum(
+            count * getattr(scheme, difficulty.lower())
+            for difficulty, count in solved_by_difficulty.items()
+        )
@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from .goal_checker import GoalChecker
+from .models import UserData
+
+SUNDAY = 6
+
+
+class PollScheduler:
+    def __init__(
+        self,
+        schedule_path: Optional[str] = None,
+        alpha: float = 0.2,
+        max_interval: int = 7,
+        refresh_weekday: int = SUNDAY,
+    ):
+        self.schedule_path = schedule_path
+        self.alpha = alpha
+        self.max_interval = max_interval
+        self.refresh_weekday = refresh_weekday
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+
+    def load(self) -> "PollScheduler":
+        """Load the schedule from disk, starting empty if the file is missing or corrupt."""
+        if self.schedule_path is None:
+            return self
+        try:
+            with open(self.schedule_path, "r") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt poll schedule: {self.schedule_path}")
+            self.entries = {}
+        return self
+
+    def save(self) -> None:
+        """Atomically write the schedule to disk if it changed."""
+        if self.schedule_path is None or not self._dirty:
+            return
+        tmp_path = f"{self.schedule_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.schedule_path)
+        self._dirty = False
+
+    def interval(self, username: str) -> int:
+        """
+        Days between fetches for a user: daily while they gain points on most
+        fetches, stretching to `max_interval` as their activity fades.
+        """
+        entry = self.entries.get(username)
+        if entry is None:
+            return 1
+        activity = max(entry["activity"], 1 / self.max_interval)
+        return min(self.max_interval, int(1 / activity))
+
+    def should_fetch(
+        self, username: str, user_data: UserData, current_date: str
+    ) -> bool:
+        """Whether a user is due for a fetch on current_date."""
+        # Goals are checked daily, and everyone is refreshed before the
+        # Monday leaderboard so weekly points are complete
+        if GoalChecker.has_active_goal(user_data):
+            return True
+        today = datetime.strptime(current_date, "%Y-%m-%d")
+        if today.weekday() == self.refresh_weekday:
+            return True
+
+        entry = self.entries.get(username)
+        if entry is None:
+            return True
+        last_fetched = datetime.strptime(entry["last_fetched"], "%Y-%m-%d")
+        return (today - last_fetched).days >= self.interval(username)
+
+    def record(self, username: str, points_gained: int, current_date: str) -> None:
+        """Fold a completed fetch into the user's activity average."""
+        entry = self.entries.get(username)
+        # New users start out as active until they prove otherwise
+        activity = 1.0 if entry is None else entry["activity"]
+        active = 1.0 if points_gained > 0 else 0.0
+        self.entries[username] = {
+            "activity": activity + self.alpha * (active - activity),
+            "last_fetched": current_date,
+        }
+        self._dirty = True
@@ -0,0 +1,39 @@
+import json
+import os
+from typing import Dict, Optional
+
+from .leetcode_api import LeetCodeAPI
+
+
+class ProblemCatalog:
+    def __init__(self, leetcode_api: LeetCodeAPI, cache_path: Optional[str] = None):
+        self.leetcode_api = leetcode_api
+        self.cache_path = cache_path
+        self.difficulties: Dict[str, str] = {}
+        self._dirty = False
+        if cache_path:
+            try:
+                with open(cache_path, "r") as f:
+                    self.difficulties = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.difficulties = {}
+
+    def get_difficulty(self, title_slug: str) -> Optional[str]:
+        """Get a problem's difficulty, fetching it once and caching it forever."""
+        difficulty = self.difficulties.get(title_slug)
+        if difficulty is None:
+            difficulty = self.leetcode_api.get_problem_difficulty(title_slug)
+            if difficulty is not None:
+                self.difficulties[title_slug] = difficulty
+                self._dirty = True
+        return difficulty
+
+    def save(self) -> None:
+        """Persist newly learned difficulties."""
+        if not self.cache_path or not self._dirty:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.difficulties, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
@@ -0,0 +1,124 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# Phases of a progress run, in the order they are reported
+PHASES = ["load", "fetch", "score", "goal check", "save", "send"]
+
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.allocated = 0
+        self.peak = 0
+        self.profile = cProfile.Profile()
+
+
+class NullProfiler:
+    # Shared so a disabled phase costs no allocation
+    _null_phase = nullcontext()
+
+    def start(self) -> None:
+        pass
+
+    def phase(self, name: str):
+        return self._null_phase
+
+    def stop(self) -> None:
+        pass
+
+
+class Profiler:
+    def __init__(self, output_path: str, top: int = 25, frames: int = 10):
+        self.output_path = output_path
+        self.top = top
+        self.frames = frames
+        self.phases: Dict[str, PhaseStats] = {}
+        self._active: Optional[str] = None
+
+    @property
+    def pstats_path(self) -> str:
+        return f"{self.output_path}.pstats"
+
+    @property
+    def report_path(self) -> str:
+        return f"{self.output_path}.txt"
+
+    def start(self) -> None:
+        """Start tracing allocations."""
+        tracemalloc.start(self.frames)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time, profile and measure allocations for a block of one phase.
+        Phases never overlap, so the block may run in any thread. A phase
+        entered inside another is folded into the outer one.
+        """
+        if self._active is not None:
+            yield
+            return
+
+        stats = self.phases.setdefault(name, PhaseStats())
+        self._active = name
+        tracemalloc.reset_peak()
+        allocated_before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        stats.profile.enable()
+        try:
+            yield
+        finally:
+            stats.profile.disable()
+            stats.seconds += time.perf_counter() - started
+            allocated_after, peak = tracemalloc.get_traced_memory()
+            stats.calls += 1
+            stats.allocated += allocated_after - allocated_before
+            stats.peak = max(stats.peak, peak - allocated_before)
+            self._active = None
+
+    def stop(self) -> None:
+        """Stop tracing and write the pstats file and the report."""
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        profiles = [stats.profile for stats in self.phases.values()]
+        if profiles:
+            pstats.Stats(*profiles).dump_stats(self.pstats_path)
+
+        with open(self.report_path, "w") as f:
+            f.write(self.report(snapshot))
+        print(f"Wrote profile to {self.pstats_path} and {self.report_path}")
+
+    def _ordered_phases(self) -> List[str]:
+        known = [name for name in PHASES if name in self.phases]
+        return known + sorted(name for name in self.phases if name not in PHASES)
+
+    def report(self, snapshot: tracemalloc.Snapshot) -> str:
+        """Per-phase timings, allocations and hot functions, then top allocations."""
+        out = io.StringIO()
+        out.write(
+            f"{'phase':<12}{'calls':>8}{'seconds':>12}{'net KiB':>12}{'peak KiB':>12}\n"
+        )
+        for name in self._ordered_phases():
+            stats = self.phases[name]
+            out.write(
+                f"{name:<12}{stats.calls:>8}{stats.seconds:>12.3f}"
+                f"{stats.allocated / 1024:>12.1f}{stats.peak / 1024:>12.1f}\n"
+            )
+
+        for name in self._ordered_phases():
+            stats = self.phases[name]
+            out.write(f"\n=== {name} ===\n")
+            pstats.Stats(stats.profile, stream=out).sort_stats(
+                pstats.SortKey.CUMULATIVE
+            ).print_stats(self.top)
+
+        out.write("\n=== Top allocations ===\n")
+        for stat in snapshot.statistics("lineno")[: self.top]:
+            out.write(f"{stat}\n")
+        return out.getvalue()
@@ -0,0 +1,277 @@
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .goal_index import GoalIndex
+from .scoring import Rescorer
+from .models import UserToTag, LeaderboardEntry, UserData, UserUpdate
+
+
+class ProgressRun:
+    def __init__(
+        self,
+        service,
+        today: datetime,
+        update_db: bool = True,
+        deadline: Optional[float] = None,
+    ):
+        self.service = service
+        self.update_db = update_db
+        self.deadline = deadline
+        self.is_monday = today.weekday() == 0
+        self.current_date = today.strftime("%Y-%m-%d")
+        self.db: Dict[str, UserData] = {}
+        self.checkpoint: Optional[Dict] = None
+        self.leaderboard: List[LeaderboardEntry] = []
+        self.goal_index = GoalIndex()
+        self.points_gained_by_user: Dict[str, int] = {}
+        self.unfetched: Set[str] = set()
+        self.carried_over: List[str] = []
+        # Whether a run today already finished and carried users over to this one
+        self.continuing = False
+        self._unsaved: List[Dict] = []
+        self._journaled = 0
+
+    def start(self) -> None:
+        """Load the database or resume today's checkpoint, and do the Monday reset."""
+        with self.service.profiler.phase("load"):
+            self._load()
+
+    def _load(self) -> None:
+        service = self.service
+        db_manager = service.db_manager
+        checkpoint_manager = service.checkpoint_manager
+
+        rescore_in_memory = service.ensure_scoring_current(self.update_db)
+        goal_index = None
+        if self.update_db:
+            checkpoint = checkpoint_manager.load(self.current_date)
+            if checkpoint is None:
+                checkpoint = checkpoint_manager.new_checkpoint(self.current_date)
+                self._write_checkpoint(checkpoint, start=True)
+                resuming = False
+            elif not db_manager.has_snapshot():
+                # The snapshot goes once a commit saved every journaled update
+                checkpoint["committed_entries"] = len(checkpoint["journal"])
+                resuming = False
+            else:
+                resuming = True
+
+            # Updates work on a snapshot without holding the database lock;
+            # commit merges in anything saved meanwhile, such as a /setgoal
+            if resuming:
+                print(f"Resuming run from checkpoint for {self.current_date}")
+            else:
+                if checkpoint["committed_entries"] is not None:
+                    print(
+                        f"Continuing run for {self.current_date} with carried over users"
+                    )
+                # Records are normalized once by the schema migration, not per run
+                db_manager.take_snapshot()
+            db = db_manager.snapshot().get_db()
+            # Saved with the database, so /setgoal keeps it current
+            goal_index = db_manager.load_goal_index(db, db_manager.snapshot_path)
+            db = self._replay(checkpoint, db)
+            self.continuing = checkpoint["committed_entries"] is not None
+            self._journaled = len(checkpoint["journal"])
+        else:
+            checkpoint = checkpoint_manager.new_checkpoint(self.current_date)
+            db = db_manager.get_db()
+
+        if rescore_in_memory:
+            Rescorer.rescore_db(db, service.scoring_scheme)
+
+        # Handle Monday leaderboard and reset
+        if self.is_monday:
+            if checkpoint["weekly_reset_done"]:
+                # A finished run today already posted it
+                if not self.continuing:
+                    self.leaderboard = checkpoint_manager.leaderboard_from_json(
+                        checkpoint["leaderboard"]
+                    )
+            else:
+                self.leaderboard = service.leaderboard_manager.get_weekly_leaderboard(
+                    db
+                )
+                if self.update_db:
+                    db = db_manager.reset_weekly_points(db)
+                    checkpoint["weekly_reset_done"] = True
+                    checkpoint["leaderboard"] = checkpoint_manager.leaderboard_to_json(
+                        self.leaderboard
+                    )
+                    self._write_checkpoint(checkpoint)
+
+        # Gains an unfinished attempt applied are reused as-is; those of a
+        # finished run were already reported
+        committed = checkpoint["committed_entries"] or 0
+        self.points_gained_by_user = {
+            entry["username"]: entry["update"]["points_gained"]
+            for entry in checkpoint["journal"][committed:]
+        }
+        self.checkpoint = checkpoint
+        self.db = db
+        self.goal_index = (
+            goal_index if goal_index is not None else GoalIndex.from_db(db)
+        )
+
+    def _replay(self, checkpoint: Dict, db: Dict[str, UserData]) -> Dict[str, UserData]:
+        """Reapply the journaled updates not yet saved to the database."""
+        committed = checkpoint["committed_entries"]
+        if committed is None:
+            if checkpoint["weekly_reset_done"]:
+                db = self.service.db_manager.reset_weekly_points(db)
+            committed = 0
+        # The snapshot index stays valid: updates don't change goals
+        for entry in checkpoint["journal"][committed:]:
+            username = entry["username"]
+            update = UserUpdate(**entry["update"])
+            self.service.apply_update(db[username], update)
+            self.service.record_poll(username, update.points_gained, self.current_date)
+        return db
+
+    def users_to_fetch(self) -> Iterator[Tuple[str, UserData]]:
+        """
+        Yield the users still to fetch, in priority order when there is a
+        deadline. Users reached after the deadline are carried over instead.
+        Accounts they linked on other platforms start fetching up front.
+        """
+        service = self.service
+        applied_gains = self.checkpoint["points_gained"]
+        if self.deadline is None:
+            usernames = list(self.db)
+        else:
+            usernames = service.prioritized(self.db, self.goal_index)
+
+        due = []
+        for username in usernames:
+            user_data = self.db[username]
+            if username in applied_gains:
+                continue
+            if user_data["lc_id"] is None:
+                print(f"Skipping {username} because they have no LeetCode id")
+                continue
+            if not service.is_due(username, user_data, self.current_date):
+                print(f"Skipping {username} until their next scheduled fetch")
+                continue
+            due.append(username)
+
+        service.prefetch_linked(self.db[username] for username in due)
+        for username in due:
+            if self.deadline is not None and service.clock() >= self.deadline:
+                self.carried_over.append(username)
+                continue
+            yield username, self.db[username]
+
+    def fetch(self, user_data: UserData) -> Optional[UserUpdate]:
+        """Fetch and score a user's latest progress."""
+        with self.service.profiler.phase("fetch"):
+            return self.service.evaluate_user(user_data, self.deadline)
+
+    def record(self, username: str, update: Optional[UserUpdate]) -> bool:
+        """
+        Apply a user's fetched update in place.
+        Returns whether enough updates accumulated to save a checkpoint.
+        """
+        if update is None:
+            print(f"Failed to fetch stats for {username}")
+            self.unfetched.add(username)
+            return False
+
+        self.points_gained_by_user[username] = update.points_gained
+        print(f"{username} has gained {update.points_gained} points")
+
+        if not self.update_db:
+            return False
+        with self.service.profiler.phase("score"):
+            self.service.apply_update(self.db[username], update)
+            self.service.record_poll(username, update.points_gained, self.current_date)
+        self.checkpoint["points_gained"][username] = update.points_gained
+        self._unsaved.append({"username": username, "update": asdict(update)})
+        return len(self._unsaved) >= self.service.checkpoint_interval
+
+    def record_error(self, username: str, error: Exception) -> None:
+        """Note a user whose update failed unexpectedly."""
+        print(f"Error processing {username}: {error}")
+        self.unfetched.add(username)
+
+    def _write_checkpoint(self, checkpoint: Dict, start: bool = False) -> None:
+        # Fenced under the database lock, which a successor's writes also take
+        checkpoint_manager = self.service.checkpoint_manager
+        with self.service.db_manager.lock():
+            self.service.check_fence()
+            if start:
+                checkpoint_manager.start(checkpoint)
+            else:
+                checkpoint_manager.save(checkpoint)
+
+    def save_checkpoint(self) -> None:
+        """Journal the updates applied since the last checkpoint."""
+        if not self._unsaved:
+            return
+        checkpoint_manager = self.service.checkpoint_manager
+        with self.service.profiler.phase("save"):
+            # Only the short append happens under the lock
+            encoded = checkpoint_manager.encode(self._unsaved)
+            with self.service.db_manager.lock():
+                self.service.check_fence()
+                checkpoint_manager.append(encoded)
+        self._journaled += len(self._unsaved)
+        self._unsaved = []
+
+    def finish(self) -> Tuple[List[UserToTag], List[LeaderboardEntry], bool]:
+        """
+        Save the results and work out who to tag.
+        Returns: (users_to_tag, leaderboard, is_monday)
+        """
+        service = self.service
+        if self.unfetched:
+            print(
+                f"Could not fetch {len(self.unfetched)} user(s); they will not be tagged"
+            )
+        if self.carried_over:
+            print(
+                f"Deadline reached before {len(self.carried_over)} user(s); "
+                f"carrying them over to the next run: {', '.join(self.carried_over)}"
+            )
+
+        with service.profiler.phase("save"):
+            if self.update_db:
+                service.check_fence()
+            if service.problem_catalog is not None:
+                service.problem_catalog.save()
+
+            # Clear expired goals and save database
+            if self.update_db:
+                # Journaled first, so a rerun skips users whose update is saved
+                self.save_checkpoint()
+                db = service.db_manager.clear_expired_goals(
+                    self.db, self.current_date, self.goal_index
+                )
+                self.db = service.db_manager.commit(
+                    db, self.goal_index, fence=service.fence
+                )
+                if service.poll_scheduler is not None:
+                    service.poll_scheduler.save()
+                # Progress so far is saved, so a rerun for carried over users
+                # starts from the database rather than replaying the journal
+                self.checkpoint["committed_entries"] = self._journaled
+                self.checkpoint["completed"] = not self.carried_over
+                self._write_checkpoint(self.checkpoint)
+
+        # Get users to tag based on goals
+        with service.profiler.phase("goal check"):
+            users_to_tag = service.goal_checker.get_users_to_tag(
+                self.db,
+                self.points_gained_by_user,
+                self.current_date,
+                self.goal_index,
+                self.unfetched | set(self.carried_over),
+            )
+        if self.continuing:
+            # The run that carried them over settled everyone else
+            users_to_tag = [
+                user
+                for user in users_to_tag
+                if user.username in self.points_gained_by_user
+            ]
+        return users_to_tag, self.leaderboard, self.is_monday
@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .database import DatabaseManager
+from .models import UserData, LeaderboardEntry
+
+
+class FenwickTree:
+    def __init__(self, size: int = 64):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        """Add delta to the count stored at index, growing the tree as needed."""
+        if index >= self.size:
+            self._grow(index + 1)
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of counts at positions 0..index inclusive."""
+        i = min(index, self.size - 1) + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, min_size: int) -> None:
+        counts = [self.prefix_sum(i) - self.prefix_sum(i - 1) for i in range(self.size)]
+        new_size = self.size
+        while new_size < min_size:
+            new_size *= 2
+        self.size = new_size
+        self.tree = [0] * (new_size + 1)
+        for index, count in enumerate(counts):
+            if count:
+                self.add(index, count)
+
+
+class RankingIndex:
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.points: Dict[str, int] = {}
+        self._counts = FenwickTree()
+        self._top_cache: Optional[List[LeaderboardEntry]] = None
+
+    @classmethod
+    def from_db(cls, db: Dict[str, UserData], top_n: int = 10) -> "RankingIndex":
+        """Build a ranking of users by weekly points."""
+        index = cls(top_n)
+        for username, user_data in db.items():
+            index.update(username, user_data["weekly_points"])
+        return index
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def update(self, username: str, points: int) -> None:
+        """Record a user's current weekly points in O(log n)."""
+        points = max(0, points)
+        previous = self.points.get(username)
+        if previous == points:
+            return
+        if previous is not None:
+            self._counts.add(previous, -1)
+        self._counts.add(points, 1)
+        self.points[username] = points
+        self._invalidate_top(username, points)
+
+    def remove(self, username: str) -> None:
+        """Drop a user from the ranking."""
+        previous = self.points.pop(username, None)
+        if previous is not None:
+            self._counts.add(previous, -1)
+            self._invalidate_top(username, previous)
+
+    def rank(self, username: str) -> Optional[int]:
+        """1-based competition rank of a user (ties share a rank), or None."""
+        points = self.points.get(username)
+        if points is None:
+            return None
+        return len(self.points) - self._counts.prefix_sum(points) + 1
+
+    def top(self) -> List[LeaderboardEntry]:
+        """The cached top-N leaderboard, ordered like the weekly leaderboard."""
+        if self._top_cache is None:
+            best = heapq.nlargest(
+                self.top_n, self.points.items(), key=lambda item: item[1]
+            )
+            self._top_cache = [
+                LeaderboardEntry(username=username, points=points)
+                for username, points in best
+            ]
+        return self._top_cache
+
+    def _invalidate_top(self, username: str, points: int) -> None:
+        cache = self._top_cache
+        if cache is None:
+            return
+        # Changes below a full top-N's lowest score cannot affect it
+        if (
+            len(cache) < self.top_n
+            or points >= cache[-1].points
+            or any(entry.username == username for entry in cache)
+        ):
+            self._top_cache = None
+
+
+class RankingView:
+    def __init__(self, db_manager: DatabaseManager, top_n: int = 10):
+        self.db_manager = db_manager
+        self.ranking = RankingIndex(top_n)
+        self.users: Dict[str, UserData] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._refresh_lock = asyncio.Lock()
+        # Bumped on every reload, so readers can tell their copies are stale
+        self.generation = 0
+
+    def _stored_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.db_manager.db_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_changes(self) -> Optional[Tuple[Tuple[int, int], Dict[str, UserData]]]:
+        signature = self._stored_signature()
+        if signature == self._signature:
+            return None
+        return signature, self.db_manager.get_db()
+
+    def _apply(self, signature: Tuple[int, int], db: Dict[str, UserData]) -> None:
+        for username in list(self.users):
+            if username not in db:
+                self.ranking.remove(username)
+        for username, user_data in db.items():
+            self.ranking.update(username, user_data["weekly_points"])
+
+        self.users = db
+        self._signature = signature
+        self.generation += 1
+
+    def refresh(self) -> bool:
+        """
+        Apply changes from the stored database, if it changed since the last
+        refresh. Only users whose weekly points changed touch the ranking.
+        Returns whether anything was reloaded.
+        """
+        changes = self._load_changes()
+        if changes is None:
+            return False
+        self._apply(*changes)
+        return True
+
+    async def refresh_async(self) -> bool:
+        """
+        Like refresh, but reads and parses the database on a worker thread so
+        the event loop keeps serving while a large database reloads.
+        """
+        # Concurrent handlers share one reload instead of racing to apply theirs
+        async with self._refresh_lock:
+            changes = await asyncio.to_thread(self._load_changes)
+            if changes is None:
+                return False
+            self._apply(*changes)
+            return True
+
+    def user_stats(self, username: str) -> Optional[Tuple[UserData, int]]:
+        """A user's record and weekly rank as of the last refresh, or None."""
+        user_data = self.users.get(username)
+        if user_data is None:
+            return None
+        return user_data, self.ranking.rank(username)
+
+    def leaderboard(self) -> List[LeaderboardEntry]:
+        """The top-N weekly leaderboard as of the last refresh."""
+        return self.ranking.top()
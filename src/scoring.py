@@ -0,0 +1,104 @@
+import json
+import os
+from dataclasses import asdict
+from typing import Callable, Dict, Optional
+
+from .database import DatabaseManager
+from .models import ScoringScheme, UserData, DEFAULT_SCORING_SCHEME
+from .points_calculator import PointsCalculator
+
+
+def load_scoring_scheme(path: Optional[str]) -> ScoringScheme:
+    """
+    Read a scheme such as {"version": 2, "easy": 1, "medium": 3, "hard": 5}.
+    Returns the default scheme when there is no file.
+    """
+    if path is None:
+        return DEFAULT_SCORING_SCHEME
+    try:
+        with open(path, "r") as f:
+            return ScoringScheme(**json.load(f))
+    except FileNotFoundError:
+        return DEFAULT_SCORING_SCHEME
+
+
+class Rescorer:
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        scheme: ScoringScheme,
+        fence: Optional[Callable[[], None]] = None,
+    ):
+        self.db_manager = db_manager
+        self.scheme = scheme
+        # Raises if this replica lost its lease, checked under the database lock
+        self.fence = fence
+        # The scheme the stored points were computed with
+        self.state_path = f"{db_manager.db_path}.scoring"
+
+    def stored_scheme(self) -> ScoringScheme:
+        """
+        The scheme of the stored points; databases predating schemes used the
+        default. Read it under the database lock before writing points.
+        """
+        try:
+            with open(self.state_path, "r") as f:
+                return ScoringScheme(**json.load(f))
+        except FileNotFoundError:
+            return DEFAULT_SCORING_SCHEME
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self.scheme), f)
+        os.replace(tmp_path, self.state_path)
+
+    def needs_rescore(self) -> bool:
+        """Whether stored points were computed with a different scheme."""
+        stored = self.stored_scheme()
+        if stored == self.scheme:
+            return False
+        if stored.version == self.scheme.version:
+            raise ValueError(
+                f"Scoring scheme v{stored.version} changed its weights; "
+                "bump its version to rescore"
+            )
+        return True
+
+    @staticmethod
+    def rescore_db(db: Dict[str, UserData], scheme: ScoringScheme) -> int:
+        """
+        Recompute every user's points from their solved counts, in place.
+        Returns the number of users whose points changed.
+        """
+        changed = 0
+        for user_data in db.values():
+            points = PointsCalculator.calculate_points(user_data, scheme)
+            if points != user_data["points"]:
+                user_data["points"] = points
+                changed += 1
+        return changed
+
+    def rescore(self) -> int:
+        """
+        Rescore the stored database in one transaction, without API calls.
+        Weekly points have no per-difficulty history and are kept as is.
+        Returns the number of users whose points changed.
+        """
+        # Both files are written under the lock, so writers of baselines,
+        # which read the stored scheme in their transaction, see them agree
+        with self.db_manager.lock():
+            if self.fence is not None:
+                self.fence()
+            previous = self.stored_scheme()
+            db = self.db_manager.get_db()
+            changed = self.rescore_db(db, self.scheme)
+            self.db_manager.save_db(db)
+            # Written after the database: if interrupted in between, the next
+            # run rescores again, which gives the same result
+            self._save_state()
+        print(
+            f"Rescored {changed} user(s) from scoring scheme "
+            f"v{previous.version} to v{self.scheme.version}"
+        )
+        return changed
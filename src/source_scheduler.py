@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from .models import SolvedCounts, UserData
+from .stats_cache import StatsCache
+from .stats_sources import StatsSource
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_second: Optional[float],
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.interval = 1 / requests_per_second if requests_per_second else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until another request may start, spacing requests evenly."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+
+class SourceScheduler:
+    def __init__(
+        self,
+        sources: Iterable[StatsSource],
+        cache: Optional[StatsCache] = None,
+        max_age: float = 60 * 60,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.sources: Dict[str, StatsSource] = {
+            source.name: source for source in sources
+        }
+        self.cache = cache
+        self.max_age = max_age
+        self._limiters = {
+            name: RateLimiter(source.limits.requests_per_second, clock, sleep)
+            for name, source in self.sources.items()
+        }
+        self._slots = {
+            name: threading.Semaphore(source.limits.max_concurrency)
+            for name, source in self.sources.items()
+        }
+        # Requests waiting for a slot, sent together by whichever gets one
+        self._pending: Dict[str, deque] = {name: deque() for name in self.sources}
+        # Background fetches, so each account is fetched once per scheduler
+        self._submitted: Dict[Tuple[str, str], Future] = {}
+        # One pool per source, so a slow source only holds up its own requests
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Stop the background fetch workers, dropping queued fetches."""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cached(self, source: StatsSource, handle: str) -> Optional[SolvedCounts]:
+        if self.cache is None:
+            return None
+        return self.cache.get(source.cache_key(handle), self.max_age)
+
+    def fetch(self, name: str, handle: str) -> Optional[SolvedCounts]:
+        """
+        Get one account's solved counts from a source, preferring fresh ones
+        cached by the poller. Requests queued while the source's slots are busy are sent
+        together, up to its batch size, and every request waits for the
+        source's rate limit.
+        """
+        source = self.sources[name]
+        cached = self._cached(source, handle)
+        if cached is not None:
+            return cached
+
+        future = Future()
+        with self._lock:
+            self._pending[name].append((handle, future))
+        self._drain(source, future)
+        return future.result()
+
+    def submit(self, name: str, handle: str) -> Future:
+        """Fetch an account in the background, once."""
+        source = self.sources[name]
+        with self._lock:
+            future = self._submitted.get((name, handle))
+            if future is not None:
+                return future
+            future = self._submitted[(name, handle)] = Future()
+            cached = self._cached(source, handle)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+            self._pending[name].append((handle, future))
+            if name not in self._executors:
+                self._executors[name] = ThreadPoolExecutor(
+                    max_workers=source.limits.max_concurrency
+                )
+            self._executors[name].submit(self._drain, source)
+        return future
+
+    def submit_linked(
+        self, user_data: UserData, skip: Iterable[str] = ()
+    ) -> Dict[str, Future]:
+        """Start fetching every account the user linked, by source name."""
+        futures = {}
+        for name, source in self.sources.items():
+            if name in skip:
+                continue
+            handle = source.handle(user_data)
+            if handle:
+                futures[name] = self.submit(name, handle)
+        return futures
+
+    def _drain(self, source: StatsSource, future: Optional[Future] = None) -> None:
+        with self._slots[source.name]:
+            self._send_batch(source)
+            # The caller's own request may be queued behind a full batch
+            while future is not None and not (future.running() or future.done()):
+                self._send_batch(source)
+
+    def _send_batch(self, source: StatsSource) -> None:
+        with self._lock:
+            pending = self._pending[source.name]
+            batch = [
+                pending.popleft()
+                for _ in range(min(source.limits.max_batch, len(pending)))
+            ]
+            for _, future in batch:
+                future.set_running_or_notify_cancel()
+        if not batch:
+            return
+
+        self._limiters[source.name].wait()
+        try:
+            results = source.fetch_batch([handle for handle, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        # Results are not cached: the cache is the poller's, and a daily run
+        # holding every payload until it ends would not be bounded in memory
+        for handle, future in batch:
+            future.set_result(results.get(handle))
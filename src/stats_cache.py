@@ -0,0 +1,55 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from .models import UserStats
+
+
+class StatsCache:
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict] = {}
+
+    def load(self) -> "StatsCache":
+        """Load cached stats from disk, starting empty if the file is missing or corrupt."""
+        try:
+            with open(self.cache_path, "r") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError:
+            print(f"Ignoring corrupt stats cache: {self.cache_path}")
+            self.entries = {}
+        return self
+
+    def save(self) -> None:
+        """Atomically write the cache to disk."""
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def get(
+        self, lc_id: str, max_age: float, now: Optional[float] = None
+    ) -> Optional[UserStats]:
+        """Get cached stats for a user if they were fetched within max_age seconds."""
+        entry = self.entries.get(lc_id)
+        if entry is None:
+            return None
+        now = time.time() if now is None else now
+        if now - entry["fetched_at"] > max_age:
+            return None
+        return entry["stats"]
+
+    def put(self, lc_id: str, stats: UserStats, now: Optional[float] = None) -> None:
+        """Store freshly fetched stats for a user."""
+        self.entries[lc_id] = {
+            "stats": stats,
+            "fetched_at": time.time() if now is None else now,
+        }
+
+    def fetched_at(self, lc_id: str) -> float:
+        """When a user's stats were last fetched, or 0 if never."""
+        entry = self.entries.get(lc_id)
+        return entry["fetched_at"] if entry else 0.0
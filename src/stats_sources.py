@@ -0,0 +1,186 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from .leetcode_api import LeetCodeAPI
+from .models import SolvedCounts, SourceLimits, UserData
+
+
+class StatsSource(ABC):
+    # Also the key of the user's account under UserData["sources"]
+    name = ""
+    limits = SourceLimits()
+
+    def handle(self, user_data: UserData) -> Optional[str]:
+        """The user's account on this platform, if they linked one."""
+        return user_data.get("sources", {}).get(self.name, {}).get("handle")
+
+    def cache_key(self, handle: str) -> str:
+        return f"{self.name}:{handle}"
+
+    @abstractmethod
+    def fetch_batch(self, handles: List[str]) -> Dict[str, Optional[SolvedCounts]]:
+        """
+        Fetch solved counts for up to `limits.max_batch` accounts.
+        Accounts that could not be fetched map to None or are left out.
+        """
+
+    @staticmethod
+    def count_by_difficulty(difficulties: Iterable[str]) -> SolvedCounts:
+        counts = {"easySolved": 0, "mediumSolved": 0, "hardSolved": 0}
+        for difficulty in difficulties:
+            counts[f"{difficulty}Solved"] += 1
+        return counts
+
+
+class LeetCodeSource(StatsSource):
+    name = "leetcode"
+    # The stats proxy publishes no limit; its circuit breaker backs off instead
+    limits = SourceLimits(max_concurrency=16)
+
+    def __init__(self, leetcode_api: LeetCodeAPI):
+        self.leetcode_api = leetcode_api
+
+    def handle(self, user_data: UserData) -> Optional[str]:
+        return user_data.get("lc_id")
+
+    def cache_key(self, handle: str) -> str:
+        # Shared with the background poller, which keys stats by LeetCode id
+        return handle
+
+    def fetch_batch(self, handles: List[str]) -> Dict[str, Optional[SolvedCounts]]:
+        return {handle: self.leetcode_api.get_user_stats(handle) for handle in handles}
+
+
+class CodeforcesSource(StatsSource):
+    name = "codeforces"
+    # The API allows one call every two seconds, and user.status takes one handle
+    limits = SourceLimits(requests_per_second=0.5)
+
+    def __init__(
+        self,
+        api_url: str = "https://codeforces.com/api",
+        request_timeout: float = 30.0,
+    ):
+        self.api_url = api_url
+        self.request_timeout = request_timeout
+
+    @staticmethod
+    def difficulty(rating: Optional[int]) -> str:
+        """Bucket a problem rating; unrated problems count as easy."""
+        if rating is None or rating < 1400:
+            return "easy"
+        if rating < 2000:
+            return "medium"
+        return "hard"
+
+    def fetch_batch(self, handles: List[str]) -> Dict[str, Optional[SolvedCounts]]:
+        return {handle: self.get_solved(handle) for handle in handles}
+
+    def get_solved(self, handle: str) -> Optional[SolvedCounts]:
+        """Count a user's distinct accepted problems by difficulty."""
+        try:
+            response = requests.get(
+                f"{self.api_url}/user.status",
+                params={"handle": handle},
+                timeout=self.request_timeout,
+            )
+            response.raise_for_status()
+            submissions = response.json()["result"]
+        except requests.RequestException as e:
+            print(f"Error fetching Codeforces stats for {handle}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error fetching Codeforces stats for {handle}: {e}")
+            return None
+
+        ratings = {}
+        for submission in submissions:
+            if submission.get("verdict") == "OK":
+                problem = submission["problem"]
+                key = (problem.get("contestId"), problem["index"])
+                ratings[key] = problem.get("rating")
+        return self.count_by_difficulty(map(self.difficulty, ratings.values()))
+
+
+class AtCoderSource(StatsSource):
+    name = "atcoder"
+    # AtCoder Problems asks for at least a second between requests
+    limits = SourceLimits(requests_per_second=1.0)
+    page_size = 500
+
+    def __init__(
+        self,
+        api_url: str = "https://kenkoooo.com/atcoder/atcoder-api/v3",
+        request_timeout: float = 30.0,
+        sleep=time.sleep,
+    ):
+        self.api_url = api_url
+        self.request_timeout = request_timeout
+        self.sleep = sleep
+
+    @staticmethod
+    def difficulty(point: Optional[float]) -> str:
+        """Bucket a problem by its score: A/B easy, C/D medium, the rest hard."""
+        if point is None or point <= 200:
+            return "easy"
+        if point <= 400:
+            return "medium"
+        return "hard"
+
+    def fetch_batch(self, handles: List[str]) -> Dict[str, Optional[SolvedCounts]]:
+        return {handle: self.get_solved(handle) for handle in handles}
+
+    def get_solved(self, handle: str) -> Optional[SolvedCounts]:
+        """Count a user's distinct accepted problems by difficulty."""
+        points = {}
+        from_second = 0
+        try:
+            while True:
+                response = requests.get(
+                    f"{self.api_url}/user/submissions",
+                    params={"user": handle, "from_second": from_second},
+                    timeout=self.request_timeout,
+                )
+                response.raise_for_status()
+                page = response.json()
+                for submission in page:
+                    if submission["result"] == "AC":
+                        points[submission["problem_id"]] = submission.get("point")
+                if len(page) < self.page_size:
+                    break
+                # Later pages are further requests to the same rate-limited API
+                from_second = max(s["epoch_second"] for s in page) + 1
+                self.sleep(1 / self.limits.requests_per_second)
+        except requests.RequestException as e:
+            print(f"Error fetching AtCoder stats for {handle}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error fetching AtCoder stats for {handle}: {e}")
+            return None
+        return self.count_by_difficulty(map(self.difficulty, points.values()))
+
+
+# Platforms that can be enabled besides LeetCode, by source name
+SOURCE_TYPES = {
+    CodeforcesSource.name: CodeforcesSource,
+    AtCoderSource.name: AtCoderSource,
+}
+
+
+def create_sources(names: Iterable[str]) -> List[StatsSource]:
+    """Create the named sources, e.g. from a "codeforces,atcoder" setting."""
+    sources = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in SOURCE_TYPES:
+            raise ValueError(
+                f"Unknown stats source {name!r}; "
+                f"expected one of {', '.join(SOURCE_TYPES)}"
+            )
+        sources.append(SOURCE_TYPES[name]())
+    return sources
@@ -0,0 +1,94 @@
+import time
+from typing import List, Optional
+
+from .database import DatabaseManager
+from .leetcode_api import LeetCodeAPI
+from .stats_cache import StatsCache
+
+
+class TricklePoller:
+    def __init__(
+        self,
+        leetcode_api: LeetCodeAPI,
+        db_manager: DatabaseManager,
+        stats_cache: StatsCache,
+        period: float = 24 * 60 * 60,
+        sleep=time.sleep,
+        clock=time.time,
+        save_every: int = 50,
+        save_interval: float = 60.0,
+    ):
+        self.leetcode_api = leetcode_api
+        self.db_manager = db_manager
+        self.stats_cache = stats_cache
+        self.period = period
+        self.sleep = sleep
+        self.clock = clock
+        # Rewriting the whole cache per fetch is wasteful with many users;
+        # unsaved fetches are written after this many or this many seconds
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._unsaved = 0
+        self._last_save = clock()
+
+    def tracked_lc_ids(self) -> List[str]:
+        """LeetCode ids of every user in the database, stalest first."""
+        lc_ids = {
+            user_data["lc_id"]
+            for _, user_data in self.db_manager.iter_users()
+            if user_data.get("lc_id")
+        }
+        return sorted(lc_ids, key=self.stats_cache.fetched_at)
+
+    def poll_once(self, lc_id: str) -> bool:
+        """Refresh one user's stats in the cache. Returns whether the fetch succeeded."""
+        stats = self.leetcode_api.get_user_stats(lc_id)
+        if stats is None:
+            return False
+        self.stats_cache.put(lc_id, stats, self.clock())
+        self._unsaved += 1
+        if (
+            self._unsaved >= self.save_every
+            or self.clock() - self._last_save >= self.save_interval
+        ):
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        """Write fetches not yet saved to the cache file."""
+        if self._unsaved:
+            self.stats_cache.save()
+            self._unsaved = 0
+        self._last_save = self.clock()
+
+    def run_cycle(self) -> int:
+        """
+        Refresh every user once, spreading the fetches evenly across `period`.
+        Returns the number of successful fetches.
+        """
+        lc_ids = self.tracked_lc_ids()
+        if not lc_ids:
+            self.sleep(self.period)
+            return 0
+
+        interval = self.period / len(lc_ids)
+        refreshed = 0
+        for lc_id in lc_ids:
+            started = self.clock()
+            if self.poll_once(lc_id):
+                refreshed += 1
+            self.sleep(max(0.0, interval - (self.clock() - started)))
+        self.flush()
+        print(f"Refreshed {refreshed}/{len(lc_ids)} users")
+        return refreshed
+
+    def run(self, cycles: Optional[int] = None) -> None:
+        """Keep refreshing users on a rolling schedule, forever by default."""
+        completed = 0
+        try:
+            while cycles is None or completed < cycles:
+                self.run_cycle()
+                completed += 1
+        finally:
+            # Keep what was fetched before a shutdown
+            self.flush()
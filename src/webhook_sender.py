@@ -0,0 +1,234 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from .models import UserToTag, LeaderboardEntry
+from .leaderboard import LeaderboardManager
+from .message_scheduler import MessageScheduler, LEADERBOARD_PRIORITY, TAG_PRIORITY
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
+
+
+class DiscordRestError(Exception):
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Discord API returned {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class RestMember:
+    name: str
+    id: int
+
+
+@dataclass
+class RestGuild:
+    members: List[RestMember] = field(default_factory=list)
+
+
+class WebhookSender:
+    def __init__(
+        self,
+        token: Optional[str],
+        channel_id: int,
+        webhook_url: Optional[str] = None,
+        api_base: str = DISCORD_API_BASE,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_concurrent_lookups: int = 4,
+        max_lookup_attempts: int = 3,
+        sleep=asyncio.sleep,
+    ):
+        self.token = token
+        self.channel_id = channel_id
+        self.webhook_url = webhook_url
+        self.api_base = api_base
+        self.session = session
+        self.scheduler = MessageScheduler()
+        self.max_lookup_attempts = max_lookup_attempts
+        self.sleep = sleep
+        # Member search is rate limited per guild; a leaderboard resolves
+        # every tracked user, so only a few searches run at once
+        self._lookup_slots = asyncio.Semaphore(max_concurrent_lookups)
+        self._guild_id: Optional[int] = None
+        self._member_ids: Dict[str, Optional[int]] = {}
+        self._pending_tags: List[UserToTag] = []
+        self._pending_leaderboard: Optional[List[LeaderboardEntry]] = None
+
+    async def _request(self, method: str, url: str, authorized: bool = True, **kwargs):
+        headers = {}
+        if authorized and self.token:
+            headers["Authorization"] = f"Bot {self.token}"
+        async with self.session.request(
+            method, url, headers=headers, **kwargs
+        ) as response:
+            if response.status == 429:
+                data = await response.json()
+                raise DiscordRestError(429, "rate limited", data.get("retry_after"))
+            if response.status >= 400:
+                raise DiscordRestError(response.status, await response.text())
+            if response.status == 204:
+                return None
+            return await response.json()
+
+    async def post_message(self, content: str) -> None:
+        """Post a message through the webhook, or the channel REST endpoint."""
+        if self.webhook_url:
+            # Webhook URLs carry their own credentials
+            await self._request(
+                "POST", self.webhook_url, authorized=False, json={"content": content}
+            )
+            return
+        await self._request(
+            "POST",
+            f"{self.api_base}/channels/{self.channel_id}/messages",
+            json={"content": content},
+        )
+
+    async def _get_guild_id(self) -> Optional[int]:
+        if self._guild_id is None and self.token:
+            channel = await self._request(
+                "GET", f"{self.api_base}/channels/{self.channel_id}"
+            )
+            self._guild_id = int(channel["guild_id"])
+        return self._guild_id
+
+    async def _resolve_member_id(self, guild_id: int, username: str) -> Optional[int]:
+        """
+        Look up a member's id by username through the REST member search.
+        Rate-limited searches wait and retry; lookups that still fail are not
+        cached, so the next flush tries again.
+        """
+        if username in self._member_ids:
+            return self._member_ids[username]
+
+        async with self._lookup_slots:
+            for attempt in range(1, self.max_lookup_attempts + 1):
+                try:
+                    results = await self._request(
+                        "GET",
+                        f"{self.api_base}/guilds/{guild_id}/members/search"
+                        f"?query={quote(username)}&limit=10",
+                    )
+                    break
+                except DiscordRestError as e:
+                    if (
+                        e.status != 429
+                        or e.retry_after is None
+                        or attempt == self.max_lookup_attempts
+                    ):
+                        print(f"Could not look up member {username}: {e}")
+                        return None
+                    await self.sleep(float(e.retry_after))
+
+        member_id = None
+        for result in results:
+            if result["user"]["username"] == username:
+                member_id = int(result["user"]["id"])
+                break
+        self._member_ids[username] = member_id
+        return member_id
+
+    async def resolve_guild(self, usernames: List[str]) -> RestGuild:
+        """
+        Resolve the given usernames into a guild-like member list. Usernames
+        that can't be resolved are left out, so messages show them unmentioned.
+        """
+        unique = list(dict.fromkeys(usernames))
+        if not unique:
+            return RestGuild()
+        try:
+            # Look the guild up once before fanning out the member searches
+            guild_id = await self._get_guild_id()
+        except DiscordRestError as e:
+            print(f"Could not look up the channel's guild, not mentioning users: {e}")
+            return RestGuild()
+        if guild_id is None:
+            return RestGuild()
+        ids = await asyncio.gather(
+            *(self._resolve_member_id(guild_id, name) for name in unique)
+        )
+        return RestGuild(
+            [
+                RestMember(name, member_id)
+                for name, member_id in zip(unique, ids)
+                if member_id is not None
+            ]
+        )
+
+    def queue_tags(self, users_to_tag: List[UserToTag]) -> None:
+        """Queue tag messages; members are resolved when the queue is flushed."""
+        if not users_to_tag:
+            print("No reminders needed")
+        self._pending_tags.extend(users_to_tag)
+
+    def queue_leaderboard(self, leaderboard: List[LeaderboardEntry]) -> None:
+        """Queue the weekly leaderboard ahead of any tag messages."""
+        self._pending_leaderboard = leaderboard
+
+    async def flush_messages(self) -> None:
+        """Resolve mentions and send all queued messages over REST."""
+        tags, self._pending_tags = self._pending_tags, []
+        leaderboard, self._pending_leaderboard = self._pending_leaderboard, None
+
+        usernames = [user.username for user in tags]
+        if leaderboard:
+            usernames += [entry.username for entry in leaderboard]
+        guild = await self.resolve_guild(usernames)
+        member_ids = {member.name: member.id for member in guild.members}
+
+        if leaderboard is not None:
+            message = LeaderboardManager.format_leaderboard_message(leaderboard, guild)
+            self.scheduler.enqueue(
+                self.channel_id, self.post_message, message, LEADERBOARD_PRIORITY
+            )
+
+        for user_to_tag in tags:
+            member_id = member_ids.get(user_to_tag.username)
+            if member_id is None:
+                # As on the leaderboard, e.g. for a webhook without a bot token
+                print(
+                    f"Could not find member with username: {user_to_tag.username}, "
+                    "tagging by name"
+                )
+                mention = user_to_tag.username
+            else:
+                mention = f"<@{member_id}>"
+            word = "point" if user_to_tag.daily_goal == 1 else "points"
+            self.scheduler.enqueue(
+                self.channel_id,
+                self.post_message,
+                f"@everyone {mention} has failed to gain {user_to_tag.daily_goal} {word} yesterday, this is why they are unemployed",
+                TAG_PRIORITY,
+            )
+
+        failed = await self.scheduler.flush()
+        if failed:
+            print(f"Gave up on {len(failed)} message(s)")
+
+    async def send_tags(self, users_to_tag: List[UserToTag]) -> None:
+        """Send tag messages for users who didn't meet their goals."""
+        self.queue_tags(users_to_tag)
+        await self.flush_messages()
+
+    async def send_leaderboard(self, leaderboard: List[LeaderboardEntry]) -> None:
+        """Send weekly leaderboard to Discord."""
+        self.queue_leaderboard(leaderboard)
+        await self.flush_messages()
+
+    async def connect_and_execute(self, execute_func) -> None:
+        """Open a pooled HTTP session and execute the provided function."""
+        owns_session = self.session is None
+        if owns_session:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8)
+            )
+        try:
+            await execute_func(self)
+        finally:
+            if owns_session:
+                await self.session.close()
+                self.session = None
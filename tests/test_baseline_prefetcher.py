@@ -0,0 +1,146 @@
+import asyncio
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from baseline_prefetcher import BaselinePrefetcher
+from database import DatabaseManager
+from leetcode_service import LeetCodeService
+from migrations import new_user_record
+
+ALICE_STATS = {"easySolved": 10, "mediumSolved": 5, "hardSolved": 1}
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Create a database manager in a temporary directory, which also holds
+    its lock, checkpoint and other sidecar files."""
+    return DatabaseManager(str(tmp_path / "db.json"))
+
+
+def register(db_manager, username, lc_id):
+    with db_manager.transaction() as db:
+        db[username] = new_user_record(goal=[3, "2099-12-31"])
+        BaselinePrefetcher.link(db[username], lc_id)
+
+
+def test_link_marks_baseline_pending():
+    """Test linking a new account clears the cursor and waits for a baseline."""
+    user_data = new_user_record()
+    user_data["submission_cursor"] = 123
+
+    assert BaselinePrefetcher.link(user_data, "alice_lc")
+    assert user_data["lc_id"] == "alice_lc"
+    assert user_data["baseline_pending"] is True
+    assert "submission_cursor" not in user_data
+    # Relinking the same account changes nothing
+    assert not BaselinePrefetcher.link(user_data, "alice_lc")
+
+
+@pytest.mark.asyncio
+async def test_queued_user_gets_baseline_in_background(db_manager):
+    """Test the worker stores a queued user's totals as their baseline."""
+    register(db_manager, "alice", "alice_lc")
+    api = Mock()
+    api.get_user_stats = Mock(return_value=ALICE_STATS)
+    prefetcher = BaselinePrefetcher(api, db_manager)
+
+    task = prefetcher.start()
+    prefetcher.enqueue("alice", "alice_lc")
+    await asyncio.wait_for(prefetcher.queue.join(), timeout=5)
+    task.cancel()
+
+    user_data = db_manager.get_user("alice")
+    assert user_data["points"] == 10 + 5 * 2 + 1 * 3
+    assert user_data["easySolved"] == 10
+    assert "baseline_pending" not in user_data
+    assert user_data["goal"] == [3, "2099-12-31"]
+
+
+@pytest.mark.asyncio
+async def test_failed_prefetch_is_retried(db_manager):
+    """Test an API failure schedules a retry after the configured delay."""
+    register(db_manager, "alice", "alice_lc")
+    api = Mock()
+    api.get_user_stats = Mock(side_effect=[None, ALICE_STATS])
+    delays = []
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+
+    prefetcher = BaselinePrefetcher(
+        api, db_manager, retry_delays=[30], sleep=fake_sleep
+    )
+
+    assert not await prefetcher.prefetch("alice", "alice_lc")
+    assert len(prefetcher._retries) == 1
+    await asyncio.sleep(0)
+    assert delays == [30]
+    assert prefetcher.queue.qsize() == 1
+
+    username, lc_id, attempt = prefetcher.queue.get_nowait()
+    assert await prefetcher.prefetch(username, lc_id, attempt)
+    # Finished retries are dropped
+    assert not prefetcher._retries
+    # Retries are bounded
+    api.get_user_stats = Mock(return_value=None)
+    assert not await prefetcher.prefetch(username, lc_id, attempt)
+
+
+def test_store_baseline_skips_relinked_user(db_manager):
+    """Test a baseline for an account the user since unlinked is dropped."""
+    register(db_manager, "alice", "alice_lc")
+    with db_manager.transaction() as db:
+        BaselinePrefetcher.link(db["alice"], "alice_new_lc")
+    prefetcher = BaselinePrefetcher(Mock(), db_manager)
+
+    mtime = os.stat(db_manager.db_path).st_mtime_ns
+
+    assert not prefetcher.store_baseline("alice", "alice_lc", ALICE_STATS)
+    assert db_manager.get_user("alice")["points"] == 0
+    assert os.stat(db_manager.db_path).st_mtime_ns == mtime
+
+
+def test_enqueue_pending_after_restart(db_manager):
+    """Test users still waiting for a baseline are queued once."""
+    register(db_manager, "alice", "alice_lc")
+    with db_manager.transaction() as db:
+        db["bob"] = new_user_record("bob_lc")
+    prefetcher = BaselinePrefetcher(Mock(), db_manager)
+
+    assert prefetcher.enqueue_pending(db_manager.get_db()) == 1
+    prefetcher.enqueue("alice", "alice_lc")
+    assert prefetcher.queue.qsize() == 1
+
+
+def test_relink_while_queued_is_fetched(db_manager):
+    """Test relinking while the first fetch is still queued queues the new account."""
+    prefetcher = BaselinePrefetcher(Mock(), db_manager)
+
+    prefetcher.enqueue("alice", "alice_lc")
+    prefetcher.enqueue("alice", "alice_new_lc")
+
+    assert prefetcher.queue.qsize() == 2
+    assert prefetcher.queue.get_nowait()[1] == "alice_lc"
+    assert prefetcher.queue.get_nowait()[1] == "alice_new_lc"
+
+
+@patch("leetcode_service.datetime")
+def test_daily_run_sets_missing_baseline_without_gain(mock_datetime, db_manager):
+    """Test a user whose prefetch never ran is baselined, not credited their history."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+    register(db_manager, "alice", "alice_lc")
+
+    service = LeetCodeService("https://api.example.com", db_manager.db_path)
+    service.leetcode_api.get_user_stats = Mock(return_value=ALICE_STATS)
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True)
+
+    user_data = db_manager.get_user("alice")
+    assert user_data["points"] == 23
+    assert user_data["weekly_points"] == 0
+    assert "baseline_pending" not in user_data
+    # Gaining nothing on the day their goal starts still counts as a miss
+    assert [user.username for user in users_to_tag] == ["alice"]
@@ -0,0 +1,182 @@
+import gc
+import math
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from checkpoint import CheckpointManager
+from database import DatabaseManager
+from goal_checker import GoalChecker
+from leaderboard import LeaderboardManager
+from leetcode_service import LeetCodeService
+from models import ScoringScheme, UserUpdate
+from points_calculator import PointsCalculator
+from profiler import NullProfiler
+import progress_run
+from progress_run import ProgressRun
+from scoring import Rescorer
+
+# Fits use at least three sizes, so the 10k step is the first check and
+# quadratic behavior fails before the long 100k step
+SIZES = [1_000, 2_000, 10_000, 100_000]
+# A linear operation fits an exponent near 1, while O(n^2) behavior lands
+# near 2
+MAX_LINEAR_EXPONENT = 1.3
+# Sorting 100k records adds a log factor and cache misses on top
+MAX_SORT_EXPONENT = 1.5
+# Small sizes are repeated until this much time was measured, so timer
+# resolution and scheduling noise don't decide the fit
+MIN_MEASURED_SECONDS = 0.05
+MIN_FIT_SIZES = 3
+
+
+def make_db(n):
+    return {
+        f"user{i}": {
+            "lc_id": f"user{i}_lc",
+            "goal": [3, "2099-12-31"] if i % 4 == 0 else [],
+            "easySolved": i % 50,
+            "mediumSolved": i % 30,
+            "hardSolved": i % 10,
+            "points": i % 50 + 3 * (i % 30) + 5 * (i % 10),
+            "weekly_points": (i * 7919) % 100,
+        }
+        for i in range(n)
+    }
+
+
+def growth_exponent(sizes, timings):
+    """Least-squares slope of log(time) against log(size)."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(timing) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def time_operation(operation, size, repeats):
+    """
+    Best time of `operation` on a fresh database of `size` users, repeated
+    at least `repeats` times and until MIN_MEASURED_SECONDS were measured.
+    """
+    best = float("inf")
+    measured = 0.0
+    runs = 0
+    while measured < MIN_MEASURED_SECONDS or runs < repeats:
+        db = make_db(size)
+        # Like timeit, keep collector pauses, which grow with the heap, out
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            operation(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = min(best, elapsed)
+        measured += elapsed
+        runs += 1
+        # Noise hardly matters once a run takes this long
+        if best > 1.0:
+            break
+    return best
+
+
+def assert_linear(operation, repeats=3, max_exponent=MAX_LINEAR_EXPONENT):
+    """
+    Time `operation(db)` on each size and fail if the timings grow faster
+    than linearly. Sizes are measured smallest first and the fit is checked
+    after each one from the third on, so superlinear growth fails early.
+    """
+    timings = []
+    for size in SIZES:
+        timings.append(time_operation(operation, size, repeats))
+        if len(timings) >= MIN_FIT_SIZES:
+            exponent = growth_exponent(SIZES[: len(timings)], timings)
+            assert exponent < max_exponent, f"grows as n^{exponent:.2f}: " + ", ".join(
+                f"{n}: {t:.4f}s" for n, t in zip(SIZES, timings)
+            )
+
+
+def test_growth_exponent_fit():
+    """Test the fit recovers the exponent of exact power laws."""
+    assert growth_exponent(SIZES, [n * 1e-6 for n in SIZES]) == pytest.approx(1.0)
+    assert growth_exponent(SIZES, [n**2 * 1e-9 for n in SIZES]) == pytest.approx(2.0)
+
+
+@pytest.mark.benchmark
+def test_recording_every_user_is_linear(monkeypatch, tmp_path):
+    """Test a run applying and checkpointing every user's update scales linearly."""
+    db_path = str(tmp_path / "db.json")
+    service = SimpleNamespace(
+        profiler=NullProfiler(),
+        apply_update=LeetCodeService.apply_update,
+        record_poll=lambda *args: None,
+        checkpoint_interval=25,
+        db_manager=DatabaseManager(db_path),
+        checkpoint_manager=CheckpointManager(f"{db_path}.checkpoint"),
+        check_fence=lambda: None,
+    )
+    update = UserUpdate(
+        easy_solved=1, medium_solved=1, hard_solved=1, points=9, points_gained=2
+    )
+    # Per-user progress lines would time the output capture, not the run
+    monkeypatch.setattr(progress_run, "print", lambda *args: None, raising=False)
+
+    def record_all(db):
+        run = ProgressRun(service, datetime(2025, 1, 1))
+        run.db = db
+        run.checkpoint = {"points_gained": {}}
+        for username in db:
+            if run.record(username, update):
+                run.save_checkpoint()
+
+    assert_linear(record_all)
+
+
+@pytest.mark.benchmark
+def test_reset_weekly_points_is_linear():
+    """Test the weekly reset scales linearly."""
+    assert_linear(DatabaseManager().reset_weekly_points)
+
+
+@pytest.mark.benchmark
+def test_clear_expired_goals_is_linear():
+    """Test clearing expired goals without an index scales linearly."""
+    assert_linear(lambda db: DatabaseManager().clear_expired_goals(db, "2025-01-01"))
+
+
+@pytest.mark.benchmark
+def test_get_users_to_tag_is_linear():
+    """Test finding users to tag scales linearly."""
+    assert_linear(
+        lambda db: GoalChecker.get_users_to_tag(
+            db, {username: 1 for username in db}, "2025-01-01"
+        )
+    )
+
+
+@pytest.mark.benchmark
+def test_get_weekly_leaderboard_is_linear():
+    """Test building the weekly leaderboard scales (near) linearly."""
+    assert_linear(
+        LeaderboardManager.get_weekly_leaderboard, max_exponent=MAX_SORT_EXPONENT
+    )
+
+
+@pytest.mark.benchmark
+def test_calculate_points_is_linear():
+    """Test scoring every user scales linearly."""
+    assert_linear(
+        lambda db: [PointsCalculator.calculate_points(user) for user in db.values()]
+    )
+
+
+@pytest.mark.benchmark
+def test_rescore_db_is_linear():
+    """Test rescoring every user under a new scheme scales linearly."""
+    scheme = ScoringScheme(version=2, easy=1, medium=3, hard=5)
+    assert_linear(lambda db: Rescorer.rescore_db(db, scheme))
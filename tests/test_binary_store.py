@@ -0,0 +1,128 @@
+import pytest
+import tempfile
+import json
+import os
+from binary_store import BinaryUserStore, json_to_binary, binary_to_json
+from database import DatabaseManager
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for database files."""
+    directory = tempfile.mkdtemp()
+    yield directory
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+@pytest.fixture
+def sample_db():
+    """Sample database covering every record shape in use."""
+    return {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [3, "2025-12-31"],
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+            "weekly_points": 5,
+        },
+        "user2": {
+            "lc_id": "user2_lc",
+            "goal": [],
+            "easySolved": 10,
+            "mediumSolved": 5,
+            "hardSolved": 2,
+            "points": 26,
+        },
+        # Record created by /setgoal with no stats
+        "ünïcode.user": {"goal": [1, "2025-06-01"]},
+        # Unexpected shapes are preserved through the extras string
+        "user4": {"lc_id": None, "goal": [5], "points": None, "note": "hi"},
+    }
+
+
+def test_round_trip(temp_dir, sample_db):
+    """Test writing and reading back is lossless."""
+    path = os.path.join(temp_dir, "db.bin")
+    BinaryUserStore.write(sample_db, path)
+
+    with BinaryUserStore(path) as store:
+        assert len(store) == 4
+        assert store.to_dict() == sample_db
+        assert list(dict(store.iter_users())) == list(sample_db)
+
+
+def test_get_user(temp_dir, sample_db):
+    """Test single-user lookups through the hash index."""
+    path = os.path.join(temp_dir, "db.bin")
+    BinaryUserStore.write(sample_db, path)
+
+    with BinaryUserStore(path) as store:
+        assert store.get_user("user1") == sample_db["user1"]
+        assert store.get_user("ünïcode.user") == sample_db["ünïcode.user"]
+        assert store.get_user("missing") is None
+        assert "user4" in store
+        assert "missing" not in store
+
+
+def test_many_users(temp_dir):
+    """Test hash collisions are resolved across a larger table."""
+    db = {f"user{i}": {"lc_id": f"lc{i}", "goal": [], "points": i} for i in range(500)}
+    path = os.path.join(temp_dir, "db.bin")
+    BinaryUserStore.write(db, path)
+
+    with BinaryUserStore(path) as store:
+        for i in range(500):
+            assert store.get_user(f"user{i}")["points"] == i
+
+
+def test_empty_db(temp_dir):
+    """Test an empty database round-trips."""
+    path = os.path.join(temp_dir, "db.bin")
+    BinaryUserStore.write({}, path)
+
+    with BinaryUserStore(path) as store:
+        assert len(store) == 0
+        assert store.get_user("user1") is None
+        assert store.to_dict() == {}
+
+
+def test_invalid_file(temp_dir):
+    """Test opening a non-binary file raises ValueError."""
+    path = os.path.join(temp_dir, "db.bin")
+    with open(path, "w") as f:
+        f.write("{}")
+
+    with pytest.raises(ValueError, match="Invalid binary database"):
+        BinaryUserStore(path)
+
+
+def test_conversion_tools(temp_dir, sample_db):
+    """Test JSON -> binary -> JSON conversion is lossless."""
+    json_path = os.path.join(temp_dir, "db.json")
+    bin_path = os.path.join(temp_dir, "db.bin")
+    out_path = os.path.join(temp_dir, "out.json")
+    with open(json_path, "w") as f:
+        json.dump(sample_db, f)
+
+    assert json_to_binary(json_path, bin_path) == 4
+    assert binary_to_json(bin_path, out_path) == 4
+
+    with open(out_path, "r") as f:
+        assert json.load(f) == sample_db
+
+
+def test_database_manager_binary_path(temp_dir, sample_db):
+    """Test DatabaseManager reads and writes the binary format for .bin paths."""
+    db_manager = DatabaseManager(os.path.join(temp_dir, "db.bin"))
+    assert db_manager.get_db() == {}
+    assert db_manager.get_user("user1") is None
+
+    db_manager.save_db(sample_db)
+
+    assert db_manager.get_db() == sample_db
+    assert db_manager.get_user("user2") == sample_db["user2"]
+    assert dict(db_manager.iter_users()) == sample_db
@@ -0,0 +1,102 @@
+import pytest
+import tempfile
+import os
+from checkpoint import CheckpointManager
+from models import LeaderboardEntry
+
+
+@pytest.fixture
+def checkpoint_path():
+    """Create a temporary checkpoint path for testing."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "db.json.checkpoint")
+    yield path
+    for leftover in [path, f"{path}.journal"]:
+        if os.path.exists(leftover):
+            os.unlink(leftover)
+    os.rmdir(directory)
+
+
+def test_load_missing_checkpoint(checkpoint_path):
+    """Test load returns None when no checkpoint exists."""
+    manager = CheckpointManager(checkpoint_path)
+    assert manager.load("2025-01-01") is None
+
+
+def test_save_and_load_checkpoint(checkpoint_path):
+    """Test a saved checkpoint round-trips with its journaled updates."""
+    manager = CheckpointManager(checkpoint_path)
+    checkpoint = manager.new_checkpoint("2025-01-01")
+    checkpoint["weekly_reset_done"] = True
+    manager.start(checkpoint)
+    entry = {"username": "user1", "update": {"points": 10, "points_gained": 3}}
+    manager.append(manager.encode([entry]))
+
+    loaded = manager.load("2025-01-01")
+    assert loaded["weekly_reset_done"] is True
+    assert loaded["journal"] == [entry]
+    assert loaded["points_gained"] == {"user1": 3}
+    assert loaded["committed_entries"] is None
+    assert loaded["completed"] is False
+
+
+def test_save_keeps_the_journal(checkpoint_path):
+    """Test saving the header neither rewrites nor embeds the journal."""
+    manager = CheckpointManager(checkpoint_path)
+    checkpoint = manager.new_checkpoint("2025-01-01")
+    manager.start(checkpoint)
+    entry = {"username": "user1", "update": {"points_gained": 3}}
+    manager.append(manager.encode([entry]))
+    checkpoint["completed"] = True
+    manager.save(checkpoint)
+
+    with open(checkpoint_path, "r") as f:
+        assert "journal" not in f.read()
+    loaded = manager.load("2025-01-01")
+    assert loaded["completed"] is True
+    assert loaded["journal"] == [entry]
+
+
+def test_start_discards_the_previous_journal(checkpoint_path):
+    """Test a new day's checkpoint does not inherit yesterday's updates."""
+    manager = CheckpointManager(checkpoint_path)
+    manager.start(manager.new_checkpoint("2024-12-31"))
+    manager.append(manager.encode([{"username": "user1", "update": {}}]))
+
+    manager.start(manager.new_checkpoint("2025-01-01"))
+    assert manager.load("2025-01-01")["journal"] == []
+
+
+def test_load_ignores_a_partial_journal_line(checkpoint_path):
+    """Test an append cut short by a crash loses only that entry."""
+    manager = CheckpointManager(checkpoint_path)
+    manager.start(manager.new_checkpoint("2025-01-01"))
+    entry = {"username": "user1", "update": {"points_gained": 3}}
+    manager.append(manager.encode([entry]) + '{"username": "us')
+
+    assert manager.load("2025-01-01")["journal"] == [entry]
+
+
+def test_load_ignores_other_days(checkpoint_path):
+    """Test checkpoints from a previous day are not resumed."""
+    manager = CheckpointManager(checkpoint_path)
+    manager.save(manager.new_checkpoint("2024-12-31"))
+
+    assert manager.load("2025-01-01") is None
+
+
+def test_load_ignores_corrupt_checkpoint(checkpoint_path):
+    """Test a corrupt checkpoint is treated as missing."""
+    with open(checkpoint_path, "w") as f:
+        f.write("{not json")
+
+    manager = CheckpointManager(checkpoint_path)
+    assert manager.load("2025-01-01") is None
+
+
+def test_leaderboard_round_trip():
+    """Test leaderboard entries survive checkpoint serialization."""
+    leaderboard = [LeaderboardEntry("user1", 10), LeaderboardEntry("user2", 0)]
+    entries = CheckpointManager.leaderboard_to_json(leaderboard)
+
+    assert CheckpointManager.leaderboard_from_json(entries) == leaderboard
@@ -0,0 +1,91 @@
+import pytest
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Create a controllable clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    """Create a breaker that trips at 50% failures over at least 4 calls."""
+    return CircuitBreaker(
+        failure_threshold=0.5,
+        min_calls=4,
+        window_size=10,
+        reset_timeout=30,
+        clock=clock,
+    )
+
+
+def test_stays_closed_below_min_calls(breaker):
+    """Test a few failures don't trip the breaker before min_calls."""
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_at_failure_threshold(breaker):
+    """Test the breaker opens once the failure rate reaches the threshold."""
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_admits_single_probe(breaker, clock):
+    """Test one probe is allowed after the reset timeout."""
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(breaker, clock):
+    """Test a successful probe closes the circuit with a fresh window."""
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 30
+    breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens(breaker, clock):
+    """Test a failed probe reopens the circuit for another timeout."""
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 30
+    breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    clock.now = 59
+    assert breaker.state == OPEN
+    clock.now = 60
+    assert breaker.state == HALF_OPEN
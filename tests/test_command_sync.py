@@ -0,0 +1,82 @@
+import os
+import tempfile
+from unittest.mock import AsyncMock
+
+import discord
+import pytest
+from discord import app_commands
+from command_sync import CommandSyncCache
+
+GUILD = discord.Object(id=1234)
+
+
+@pytest.fixture
+def cache():
+    """Create a sync cache backed by a temporary file."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.unlink(path)
+    yield CommandSyncCache(path)
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def make_tree(description="Ping the bot"):
+    client = discord.Client(intents=discord.Intents.none())
+    tree = app_commands.CommandTree(client)
+
+    @tree.command(name="ping", description=description)
+    async def ping(interaction: discord.Interaction, times: int = 1):
+        pass
+
+    tree.sync = AsyncMock(side_effect=lambda guild: tree.get_commands(guild=guild))
+    return tree
+
+
+def test_tree_hash_is_stable():
+    """Test identical command trees hash the same and changes are detected."""
+    first, second = make_tree(), make_tree()
+    for tree in (first, second):
+        tree.copy_global_to(guild=GUILD)
+
+    changed = make_tree("Ping the bot, loudly")
+    changed.copy_global_to(guild=GUILD)
+
+    assert CommandSyncCache.tree_hash(first, GUILD) == CommandSyncCache.tree_hash(
+        second, GUILD
+    )
+    assert CommandSyncCache.tree_hash(first, GUILD) != CommandSyncCache.tree_hash(
+        changed, GUILD
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_skipped_when_unchanged(cache):
+    """Test a restart with the same commands doesn't sync again."""
+    assert await cache.sync_if_changed(make_tree(), GUILD) == 1
+
+    tree = make_tree()
+    assert await cache.sync_if_changed(tree, GUILD) is None
+    tree.sync.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sync_when_changed_or_forced(cache):
+    """Test changed commands and --force-sync both sync."""
+    await cache.sync_if_changed(make_tree(), GUILD)
+
+    changed = make_tree("Ping the bot, loudly")
+    assert await cache.sync_if_changed(changed, GUILD) == 1
+
+    forced = make_tree("Ping the bot, loudly")
+    assert await cache.sync_if_changed(forced, GUILD, force=True) == 1
+    forced.sync.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_forget_makes_next_startup_sync(cache):
+    """Test forgetting a guild's hash, as --delete does, forces a sync."""
+    await cache.sync_if_changed(make_tree(), GUILD)
+    cache.forget(GUILD.id)
+
+    assert await cache.sync_if_changed(make_tree(), GUILD) == 1
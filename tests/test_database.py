@@ -1,9 +1,12 @@
+import fcntl
 import pytest
 import tempfile
 import json
 import os
-from database import DatabaseManager
-from models import UserData
+from database import DatabaseManager, Unchanged
+from goal_index import GoalIndex
+from migrations import SCHEMA_VERSION
+from models import UserData, SCHEMA_VERSION_KEY
 
 
 @pytest.fixture
@@ -12,8 +15,9 @@ def temp_db_file():
     fd, path = tempfile.mkstemp(suffix=".json")
     os.close(fd)
     yield path
-    if os.path.exists(path):
-        os.unlink(path)
+    for leftover in [path, f"{path}.lock", f"{path}.goals"]:
+        if os.path.exists(leftover):
+            os.unlink(leftover)
 
 
 @pytest.fixture
@@ -76,6 +80,7 @@ def test_save_db(temp_db_file, sample_db):
 
     with open(temp_db_file, "r") as f:
         result = json.load(f)
+    assert result.pop(SCHEMA_VERSION_KEY) == SCHEMA_VERSION
     assert result == sample_db
 
 
@@ -111,6 +116,8 @@ def test_update_user_stats(sample_db):
     assert result["user1"]["hardSolved"] == 2
     assert result["user1"]["points"] == 20
     assert result["user1"]["weekly_points"] == 11  # 5 + 6
+    # Updated in place rather than copying the whole database per call
+    assert result is sample_db
 
 
 def test_update_user_stats_nonexistent_user(sample_db):
@@ -160,3 +167,302 @@ def test_clear_expired_goals():
     assert result["user1"]["goal"] == []  # Should be cleared
     assert result["user2"]["goal"] == [3, "2025-12-31"]  # Should remain
     assert result["user3"]["goal"] == []  # Should remain empty
+
+
+def test_iter_users_matches_get_db(temp_db_file, sample_db):
+    """Test iter_users yields the same records as get_db."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f, indent=4)
+
+    db_manager = DatabaseManager(temp_db_file)
+    # A tiny chunk size forces records to span several reads
+    result = dict(db_manager.iter_users(chunk_size=7))
+    assert result == sample_db
+
+
+def test_iter_users_empty_and_missing(temp_db_file):
+    """Test iter_users handles an empty object and a missing file."""
+    with open(temp_db_file, "w") as f:
+        f.write("{ }")
+
+    db_manager = DatabaseManager(temp_db_file)
+    assert list(db_manager.iter_users()) == []
+
+    os.unlink(temp_db_file)
+    assert list(db_manager.iter_users()) == []
+
+
+def test_iter_users_invalid_json(temp_db_file):
+    """Test iter_users raises error for truncated JSON."""
+    with open(temp_db_file, "w") as f:
+        f.write('{"user1": {"lc_id": "user1_lc"')
+
+    db_manager = DatabaseManager(temp_db_file)
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        list(db_manager.iter_users())
+
+
+def test_stream_writer_matches_save_db(temp_db_file, sample_db):
+    """Test stream_writer produces the same file as save_db."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    with open(temp_db_file, "r") as f:
+        expected = f.read()
+
+    with db_manager.stream_writer() as writer:
+        for username, user_data in sample_db.items():
+            writer.write_user(username, user_data)
+
+    with open(temp_db_file, "r") as f:
+        assert f.read() == expected
+
+
+def test_stream_writer_discards_on_error(temp_db_file, sample_db):
+    """Test stream_writer leaves the database untouched if writing fails."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+
+    with pytest.raises(RuntimeError):
+        with db_manager.stream_writer() as writer:
+            writer.write_user("user1", sample_db["user1"])
+            raise RuntimeError("crashed")
+
+    assert db_manager.get_db() == sample_db
+    assert not os.path.exists(f"{temp_db_file}.stream.tmp")
+
+
+def test_clear_expired_goals_with_goal_index():
+    """Test clear_expired_goals only touches expired users when given an index."""
+    db = {
+        "user1": {"lc_id": "user1_lc", "goal": [3, "2020-01-01"]},
+        "user2": {"lc_id": "user2_lc", "goal": [3, "2025-12-31"]},
+        "user3": {"lc_id": "user3_lc", "goal": []},
+    }
+    goal_index = GoalIndex.from_db(db)
+
+    db_manager = DatabaseManager()
+    result = db_manager.clear_expired_goals(db, "2025-01-01", goal_index)
+
+    assert result["user1"]["goal"] == []
+    assert result["user2"]["goal"] == [3, "2025-12-31"]
+    assert list(goal_index.active_users()) == ["user2"]
+
+
+def test_goal_index_is_saved_with_the_database(temp_db_file, sample_db):
+    """Test goal writes keep the saved index current, and other writes invalidate it."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    with db_manager.transaction() as db:
+        db["user3"] = {"lc_id": "user3_lc", "goal": [1, "2030-01-01"]}
+
+    index = db_manager.load_goal_index({})
+    assert index.end_date("user3") == "2030-01-01"
+    assert len(index) == len(GoalIndex.from_db(db_manager.get_db()))
+
+    # A file written behind the manager's back no longer matches the index
+    with open(temp_db_file, "w") as f:
+        json.dump({"user4": {"lc_id": None, "goal": [1, "2031-01-01"]}}, f)
+    rebuilt = db_manager.load_goal_index(db_manager.get_db())
+    assert list(rebuilt.active_users()) == ["user4"]
+
+
+def test_get_db_migrates_legacy_records(temp_db_file):
+    """Test unversioned records are normalized when loaded."""
+    with open(temp_db_file, "w") as f:
+        json.dump(
+            {
+                "user1": {"lc_id": "user1_lc", "easySolved": 2, "mediumSolved": 1},
+                "user2": {"goal": [1, "2025-12-31"]},
+            },
+            f,
+        )
+
+    db_manager = DatabaseManager(temp_db_file)
+    result = db_manager.get_db()
+
+    assert result["user1"] == {
+        "lc_id": "user1_lc",
+        "goal": [],
+        "easySolved": 2,
+        "mediumSolved": 1,
+        "hardSolved": 0,
+        "points": 4,
+        "weekly_points": 0,
+    }
+    assert result["user2"]["lc_id"] is None
+    assert result["user2"]["goal"] == [1, "2025-12-31"]
+    assert dict(db_manager.iter_users()) == result
+
+
+def test_ensure_schema_stamps_once(temp_db_file, sample_db):
+    """Test ensure_schema persists the upgrade and skips it afterwards."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    db_manager = DatabaseManager(temp_db_file)
+    assert db_manager.stored_schema_version() == 0
+
+    assert db_manager.ensure_schema() == sample_db
+    assert db_manager.stored_schema_version() == SCHEMA_VERSION
+
+    mtime = os.stat(temp_db_file).st_mtime_ns
+    db_manager.ensure_schema()
+    assert os.stat(temp_db_file).st_mtime_ns == mtime
+
+
+def test_transaction_saves_on_exit(temp_db_file, sample_db):
+    """Test changes made in a transaction are saved."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+
+    with db_manager.transaction() as db:
+        db["user2"]["goal"] = [1, "2025-06-30"]
+
+    assert db_manager.get_user("user2")["goal"] == [1, "2025-06-30"]
+
+
+def test_transaction_discards_on_error(temp_db_file, sample_db):
+    """Test a failed transaction leaves the database untouched."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+
+    with pytest.raises(RuntimeError):
+        with db_manager.transaction() as db:
+            db["user2"]["goal"] = [1, "2025-06-30"]
+            raise RuntimeError("crashed")
+
+    assert db_manager.get_db() == sample_db
+
+
+def test_unchanged_transaction_skips_the_write(temp_db_file, sample_db):
+    """Test a transaction that raises Unchanged leaves the file as it was."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    mtime = os.stat(temp_db_file).st_mtime_ns
+
+    with db_manager.transaction() as db:
+        assert db == sample_db
+        raise Unchanged
+
+    assert os.stat(temp_db_file).st_mtime_ns == mtime
+
+
+def test_merge_changes_keeps_concurrent_edits():
+    """Test a field edited concurrently wins over a stale copy."""
+    base = {
+        "user1": {"goal": [], "points": 10},
+        "user2": {"goal": [], "points": 5},
+        "gone": {"goal": [], "points": 1},
+    }
+    ours = {
+        "user1": {"goal": [], "points": 12},
+        "user2": {"goal": [], "points": 7},
+        "gone": {"goal": [], "points": 2},
+        "added": {"goal": [], "points": 0},
+    }
+    theirs = {
+        "user1": {"goal": [2, "2025-12-31"], "points": 10},
+        "user2": {"goal": [], "points": 5},
+        "new": {"goal": [1, "2025-12-31"], "points": 0},
+    }
+
+    merged = DatabaseManager.merge_changes(base, ours, theirs)
+
+    assert merged == {
+        "user1": {"goal": [2, "2025-12-31"], "points": 12},
+        "user2": {"goal": [], "points": 7},
+        "new": {"goal": [1, "2025-12-31"], "points": 0},
+        "added": {"goal": [], "points": 0},
+    }
+
+
+def test_merge_changes_keeps_removed_fields_removed():
+    """Test a field removed in ours is dropped unless theirs changed it."""
+    base = {
+        "user1": {"points": 0, "baseline_pending": True},
+        "user2": {"points": 0, "submission_cursor": 5},
+    }
+    ours = {"user1": {"points": 9}, "user2": {"points": 3}}
+    theirs = {
+        "user1": {"points": 0, "baseline_pending": True, "goal": [1, "2025-12-31"]},
+        "user2": {"points": 0, "submission_cursor": 8},
+    }
+
+    merged = DatabaseManager.merge_changes(base, ours, theirs)
+
+    assert merged == {
+        "user1": {"points": 9, "goal": [1, "2025-12-31"]},
+        "user2": {"points": 3, "submission_cursor": 8},
+    }
+
+
+def test_commit_merges_changes_saved_after_snapshot(temp_db_file, sample_db):
+    """Test a goal set during a long update survives its commit."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+
+    db_manager.take_snapshot()
+    db = db_manager.snapshot().get_db()
+    db["user2"]["points"] = 30
+
+    with db_manager.transaction() as current:
+        current["user2"]["goal"] = [1, "2025-06-30"]
+
+    db_manager.commit(db)
+
+    assert db_manager.get_user("user2")["goal"] == [1, "2025-06-30"]
+    assert db_manager.get_user("user2")["points"] == 30
+    assert not db_manager.has_snapshot()
+
+
+def test_stream_writer_merges_changes_saved_after_snapshot(temp_db_file, sample_db):
+    """Test a streamed update keeps changes saved while it was running."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    db_manager.take_snapshot()
+
+    with db_manager.stream_writer() as writer:
+        for username, user_data in db_manager.snapshot().iter_users():
+            user_data["weekly_points"] += 1
+            writer.write_user(username, user_data)
+            if username == "user1":
+                with db_manager.transaction() as current:
+                    current["user3"] = {**current["user2"], "lc_id": "user3_lc"}
+
+    result = db_manager.get_db()
+    assert result["user1"]["weekly_points"] == 6
+    assert result["user3"]["lc_id"] == "user3_lc"
+    assert not os.path.exists(f"{temp_db_file}.stream.tmp")
+
+
+def test_fence_is_checked_under_the_lock(temp_db_file, sample_db):
+    """Test a failing fence refuses commits while the database lock is held."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    checked_under_lock = []
+
+    def fence():
+        with open(db_manager.lock_path, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                checked_under_lock.append(False)
+            except BlockingIOError:
+                checked_under_lock.append(True)
+        raise RuntimeError("lease lost")
+
+    db_manager.take_snapshot()
+    db = db_manager.snapshot().get_db()
+    db["user1"]["points"] = 99
+    with pytest.raises(RuntimeError):
+        db_manager.commit(db, fence=fence)
+    with pytest.raises(RuntimeError):
+        with db_manager.stream_writer(fence) as writer:
+            writer.write_user("user1", db["user1"])
+    with pytest.raises(RuntimeError):
+        with db_manager.transaction(fence) as current:
+            current["user1"]["points"] = 99
+
+    assert checked_under_lock == [True, True, True]
+    assert db_manager.get_db() == sample_db
+    assert not os.path.exists(f"{temp_db_file}.stream.tmp")
+    os.unlink(db_manager.snapshot_path)
@@ -0,0 +1,54 @@
+from endpoint_selector import EndpointSelector
+
+
+def test_ranked_prefers_faster_endpoint():
+    """Test endpoints are ordered by average latency."""
+    selector = EndpointSelector(["https://a", "https://b"])
+    selector.record("https://a", 0.5, True)
+    selector.record("https://b", 0.1, True)
+
+    assert selector.ranked() == ["https://b", "https://a"]
+
+
+def test_ranked_tries_unsampled_endpoints_first():
+    """Test an endpoint without samples is explored before measured ones."""
+    selector = EndpointSelector(["https://a", "https://b"])
+    selector.record("https://a", 0.1, True)
+
+    assert selector.ranked() == ["https://b", "https://a"]
+
+
+def test_ranked_demotes_unhealthy_endpoint():
+    """Test a fast endpoint with a high error rate is ranked last."""
+    selector = EndpointSelector(["https://a", "https://b"], alpha=0.5)
+    selector.record("https://a", 0.1, True)
+    selector.record("https://b", 0.5, True)
+    selector.record("https://a", 0.1, False)
+    selector.record("https://a", 0.1, False)
+
+    assert not selector.is_healthy("https://a")
+    assert selector.ranked() == ["https://b", "https://a"]
+
+
+def test_error_rate_recovers_after_successes():
+    """Test the error rate decays as an endpoint starts succeeding again."""
+    selector = EndpointSelector(["https://a"], alpha=0.5)
+    selector.record("https://a", 0.1, False)
+    assert not selector.is_healthy("https://a")
+
+    selector.record("https://a", 0.1, True)
+
+    assert selector.is_healthy("https://a")
+
+
+def test_hedge_delay_uses_latency_percentile():
+    """Test the hedge delay is the configured percentile of recent latencies."""
+    selector = EndpointSelector(
+        ["https://a"], hedge_percentile=0.9, min_samples=5, default_hedge_delay=2.0
+    )
+    assert selector.hedge_delay("https://a") == 2.0
+
+    for latency in [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 5.0]:
+        selector.record("https://a", latency, True)
+
+    assert selector.hedge_delay("https://a") == 1.0
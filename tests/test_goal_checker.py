@@ -1,5 +1,6 @@
 import pytest
 from goal_checker import GoalChecker
+from goal_index import GoalIndex
 from models import UserData, UserToTag
 
 
@@ -177,3 +178,32 @@ def test_get_users_to_tag_expired_goal():
     users_to_tag = GoalChecker.get_users_to_tag(db, points_gained_by_user, "2025-01-01")
 
     assert len(users_to_tag) == 0
+
+
+def test_get_users_to_tag_with_goal_index():
+    """Test get_users_to_tag only visits users in the goal index."""
+    db = {
+        "user1": {"lc_id": "user1_lc", "goal": [3, "2025-12-31"]},
+        "user2": {"lc_id": "user2_lc", "goal": [2, "2025-12-31"]},
+        "user3": {"lc_id": "user3_lc", "goal": []},
+    }
+    goal_index = GoalIndex.from_db(db)
+    goal_index.remove("user2")
+
+    users_to_tag = GoalChecker.get_users_to_tag(db, {}, "2025-01-01", goal_index)
+
+    assert [user.username for user in users_to_tag] == ["user1"]
+
+
+def test_get_users_to_tag_skips_unfetched():
+    """Test users whose stats could not be fetched are not tagged."""
+    db = {
+        "user1": {"lc_id": "user1_lc", "goal": [3, "2025-12-31"]},
+        "user2": {"lc_id": "user2_lc", "goal": [2, "2025-12-31"]},
+    }
+
+    users_to_tag = GoalChecker.get_users_to_tag(
+        db, {"user1": 0}, "2025-01-01", unfetched={"user2"}
+    )
+
+    assert [user.username for user in users_to_tag] == ["user1"]
@@ -0,0 +1,76 @@
+import pytest
+from goal_index import GoalIndex
+
+
+@pytest.fixture
+def sample_db():
+    """Sample database with a mix of goal states."""
+    return {
+        "user1": {"lc_id": "user1_lc", "goal": [3, "2025-01-05"]},
+        "user2": {"lc_id": "user2_lc", "goal": [2, "2025-01-01"]},
+        "user3": {"lc_id": "user3_lc", "goal": []},
+        "user4": {"lc_id": "user4_lc", "goal": [1, "2025-01-03"]},
+        "user5": {"lc_id": "user5_lc"},
+    }
+
+
+def test_from_db_indexes_active_goals(sample_db):
+    """Test only users with active goals are indexed."""
+    index = GoalIndex.from_db(sample_db)
+
+    assert len(index) == 3
+    assert list(index.active_users()) == ["user1", "user2", "user4"]
+    assert "user3" not in index
+    assert index.end_date("user4") == "2025-01-03"
+
+
+def test_pop_expired_in_end_date_order(sample_db):
+    """Test pop_expired returns only goals that ended before the date."""
+    index = GoalIndex.from_db(sample_db)
+
+    assert index.pop_expired("2025-01-01") == []
+    assert index.pop_expired("2025-01-04") == ["user2", "user4"]
+    assert list(index.active_users()) == ["user1"]
+
+
+def test_update_supersedes_old_end_date(sample_db):
+    """Test extending a goal keeps the user indexed past the old end date."""
+    index = GoalIndex.from_db(sample_db)
+    index.update("user2", [2, "2025-02-01"])
+    index.update("user3", [5, "2025-01-02"])
+
+    assert index.pop_expired("2025-01-04") == ["user3", "user4"]
+    assert index.end_date("user2") == "2025-02-01"
+
+
+def test_remove_and_clear_goal(sample_db):
+    """Test removed or cleared goals are never reported as expired."""
+    index = GoalIndex.from_db(sample_db)
+    index.remove("user2")
+    index.update("user4", [])
+
+    assert index.pop_expired("2025-12-31") == ["user1"]
+    assert len(index) == 0
+
+
+def test_compaction_keeps_index_consistent():
+    """Test many updates do not leave stale entries behind."""
+    index = GoalIndex()
+    for day in range(1, 29):
+        index.update("user1", [1, f"2025-02-{day:02d}"])
+
+    assert len(index._heap) < 28
+    assert index.pop_expired("2025-02-28") == []
+    assert index.pop_expired("2025-03-01") == ["user1"]
+
+
+def test_save_and_load_for_the_same_file(sample_db, tmp_path):
+    """Test a saved index is only loaded for the file version it was stamped with."""
+    path = str(tmp_path / "db.json.goals")
+    GoalIndex.from_db(sample_db).save(path, [1, 2, 3])
+
+    loaded = GoalIndex.load(path, [1, 2, 3])
+    assert list(loaded.active_users()) == ["user1", "user2", "user4"]
+    assert loaded.pop_expired("2025-01-04") == ["user2", "user4"]
+    assert GoalIndex.load(path, [1, 2, 4]) is None
+    assert GoalIndex.load(str(tmp_path / "missing"), [1, 2, 3]) is None
@@ -0,0 +1,148 @@
+import gzip
+import json
+import os
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from database import DatabaseManager
+from http_api import StatsHttpApi
+from ranking import RankingView
+
+
+@pytest.fixture
+def sample_db():
+    """Sample database for testing."""
+    return {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [3, "2025-12-31"],
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+            "weekly_points": 5,
+        },
+        "user2": {
+            "lc_id": "user2_lc",
+            "goal": [],
+            "easySolved": 10,
+            "mediumSolved": 5,
+            "hardSolved": 2,
+            "points": 26,
+            "weekly_points": 8,
+        },
+    }
+
+
+@pytest.fixture
+def db_manager(sample_db, tmp_path):
+    """Create a database manager in a temporary directory, which also holds
+    its lock and goal index files."""
+    db_manager = DatabaseManager(str(tmp_path / "db.json"))
+    db_manager.save_db(sample_db)
+    return db_manager
+
+
+async def make_client(db_manager, ranking_view=None):
+    if ranking_view is None:
+        ranking_view = RankingView(db_manager)
+    client = TestClient(TestServer(StatsHttpApi(ranking_view).create_app()))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_leaderboard(db_manager):
+    """Test the leaderboard lists users by weekly points."""
+    client = await make_client(db_manager)
+    try:
+        response = await client.get("/leaderboard")
+        assert response.status == 200
+        assert await response.json() == [
+            {"rank": 1, "username": "user2", "points": 8},
+            {"rank": 2, "username": "user1", "points": 5},
+        ]
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_user_stats_and_unknown_user(db_manager):
+    """Test a user's stats include their goal and rank."""
+    client = await make_client(db_manager)
+    try:
+        response = await client.get("/users/user1")
+        assert await response.json() == {
+            "username": "user1",
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+            "weekly_points": 5,
+            "weekly_rank": 2,
+            "goal": {"daily_points": 3, "end_date": "2025-12-31"},
+        }
+
+        response = await client.get("/users/nobody")
+        assert response.status == 404
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation(db_manager):
+    """Test unchanged responses are answered with 304 until the store changes."""
+    client = await make_client(db_manager)
+    try:
+        response = await client.get("/users")
+        etag = response.headers["ETag"]
+
+        response = await client.get("/users", headers={"If-None-Match": etag})
+        assert response.status == 304
+
+        with db_manager.transaction() as db:
+            db["user1"]["weekly_points"] = 20
+
+        response = await client.get("/users", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert response.headers["ETag"] != etag
+        assert (await response.json())[0]["weekly_points"] == 20
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_change_picked_up_by_another_reader(db_manager):
+    """Test responses are rebuilt when a bot command refreshed the shared view first."""
+    view = RankingView(db_manager)
+    client = await make_client(db_manager, view)
+    try:
+        response = await client.get("/users/user1")
+        etag = response.headers["ETag"]
+
+        with db_manager.transaction() as db:
+            db["user1"]["weekly_points"] = 20
+        stat = os.stat(db_manager.db_path)
+        os.utime(db_manager.db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert view.refresh() is True
+
+        response = await client.get("/users/user1", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert (await response.json())["weekly_points"] == 20
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_gzip_encoding(db_manager):
+    """Test responses are gzip-compressed for clients that accept it."""
+    client = await make_client(db_manager)
+    try:
+        response = await client.get(
+            "/leaderboard", headers={"Accept-Encoding": "gzip"}, auto_decompress=False
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        body = gzip.decompress(await response.read())
+        assert json.loads(body)[0]["username"] == "user2"
+    finally:
+        await client.close()
@@ -0,0 +1,201 @@
+import json
+import os
+import tempfile
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from lease import FileLease, LeaseLostError
+from leetcode_service import LeetCodeService
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def lease_path():
+    """Create a temporary path for the lease file."""
+    directory = tempfile.mkdtemp()
+    yield os.path.join(directory, "db.json.lease")
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def make_replicas(lease_path, clock, ttl=30.0):
+    return (
+        FileLease(lease_path, holder="host-a", ttl=ttl, clock=clock),
+        FileLease(lease_path, holder="host-b", ttl=ttl, clock=clock),
+    )
+
+
+def test_only_one_replica_holds_the_lease(lease_path):
+    """Test a live lease cannot be taken by another replica."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+
+    assert primary.acquire() == 1
+    assert standby.acquire() is None
+    # Reacquiring our own lease keeps the same token
+    assert primary.acquire() == 1
+
+
+def test_standby_takes_over_expired_lease_with_higher_token(lease_path):
+    """Test a crashed holder's lease passes on after the TTL with a new token."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire()
+
+    clock.now += 31
+    new_token = standby.acquire()
+
+    assert new_token == token + 1
+    # The old holder is fenced off and cannot renew
+    with pytest.raises(LeaseLostError):
+        primary.check(token)
+    assert not primary.renew(token)
+    standby.check(new_token)
+
+
+def test_renew_keeps_the_lease(lease_path):
+    """Test renewing pushes back expiry so a standby cannot take over."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire()
+
+    clock.now += 20
+    assert primary.renew(token)
+    clock.now += 20
+
+    assert standby.acquire() is None
+    primary.check(token)
+
+
+def test_released_lease_is_free_at_once(lease_path):
+    """Test releasing without completing lets a standby take over immediately."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire()
+
+    primary.release(token)
+
+    assert standby.acquire("2025-01-01") == token + 1
+
+
+def test_wait_returns_none_once_run_is_completed(lease_path):
+    """Test a standby stops waiting when the holder completes the run."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire("2025-01-01")
+
+    def finish_primary(seconds):
+        clock.sleep(seconds)
+        primary.release(token, completed="2025-01-01")
+
+    assert standby.wait("2025-01-01", sleep=finish_primary) is None
+    # The next day's run is free to take
+    assert standby.acquire("2025-01-02") == token + 1
+
+
+def test_wait_takes_over_when_holder_dies(lease_path):
+    """Test a standby takes over within a poll interval of the TTL expiring."""
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock, ttl=10.0)
+    token = primary.acquire("2025-01-01")
+    started = clock.now
+
+    new_token = standby.wait("2025-01-01", poll_interval=1.0, sleep=clock.sleep)
+
+    assert new_token == token + 1
+    assert clock.now - started <= 11.0
+
+
+def test_hold_renews_in_background(lease_path):
+    """Test holding the lease keeps it alive past its TTL."""
+    primary = FileLease(lease_path, holder="host-a", ttl=0.3)
+    standby = FileLease(lease_path, holder="host-b", ttl=0.3)
+    token = primary.acquire()
+
+    with primary.hold(token, interval=0.05):
+        time.sleep(0.5)
+        assert standby.acquire() is None
+
+
+@patch("leetcode_service.datetime")
+def test_fenced_replica_does_not_commit(mock_datetime, lease_path):
+    """Test a replica that lost its lease leaves the database untouched."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    db_path = os.path.join(os.path.dirname(lease_path), "db.json")
+    db = {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 0,
+        }
+    }
+    with open(db_path, "w") as f:
+        json.dump(db, f)
+
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire()
+    service = LeetCodeService(
+        "https://api.example.com", db_path, fence=lambda: primary.check(token)
+    )
+
+    def fetch_then_stall(lc_id):
+        # The holder stalls past its TTL and a standby takes over
+        clock.now += 31
+        standby.acquire()
+        return {"easySolved": 1, "mediumSolved": 0, "hardSolved": 0}
+
+    service.leetcode_api.get_user_stats = fetch_then_stall
+
+    with pytest.raises(LeaseLostError):
+        service.check_and_update_progress(update_db=True)
+
+    with open(db_path, "r") as f:
+        assert json.load(f)["user1"]["points"] == 0
+
+
+@patch("leetcode_service.datetime")
+def test_fenced_replica_does_not_checkpoint_the_weekly_reset(mock_datetime, lease_path):
+    """Test a replica that lost its lease writes no Monday reset checkpoint."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 0  # Monday
+    mock_now.strftime.return_value = "2025-01-06"
+    mock_datetime.now.return_value = mock_now
+
+    db_path = os.path.join(os.path.dirname(lease_path), "db.json")
+    with open(db_path, "w") as f:
+        json.dump({}, f)
+
+    clock = FakeClock()
+    primary, standby = make_replicas(lease_path, clock)
+    token = primary.acquire()
+    clock.now += 31
+    standby.acquire()
+    service = LeetCodeService(
+        "https://api.example.com", db_path, fence=lambda: primary.check(token)
+    )
+
+    with pytest.raises(LeaseLostError):
+        service.check_and_update_progress(update_db=True)
+
+    assert not os.path.exists(f"{db_path}.checkpoint")
@@ -1,7 +1,11 @@
+import threading
+
 import pytest
 from unittest.mock import Mock, patch
 import requests
 from leetcode_api import LeetCodeAPI
+from circuit_breaker import CircuitBreaker
+from endpoint_selector import EndpointSelector
 from models import UserStats
 
 
@@ -35,7 +39,9 @@ def test_get_user_stats_success(mock_get, api, sample_user_stats):
     result = api.get_user_stats("testuser")
 
     assert result == sample_user_stats
-    mock_get.assert_called_once_with("https://api.example.com/testuser/solved")
+    mock_get.assert_called_once_with(
+        "https://api.example.com/testuser/solved", timeout=30.0
+    )
 
 
 @patch("leetcode_api.requests.get")
@@ -48,7 +54,9 @@ def test_get_user_stats_http_error(mock_get, api):
     result = api.get_user_stats("nonexistent")
 
     assert result is None
-    mock_get.assert_called_once_with("https://api.example.com/nonexistent/solved")
+    mock_get.assert_called_once_with(
+        "https://api.example.com/nonexistent/solved", timeout=30.0
+    )
 
 
 @patch("leetcode_api.requests.get")
@@ -59,7 +67,9 @@ def test_get_user_stats_connection_error(mock_get, api):
     result = api.get_user_stats("testuser")
 
     assert result is None
-    mock_get.assert_called_once_with("https://api.example.com/testuser/solved")
+    mock_get.assert_called_once_with(
+        "https://api.example.com/testuser/solved", timeout=30.0
+    )
 
 
 @patch("leetcode_api.requests.get")
@@ -73,4 +83,149 @@ def test_get_user_stats_json_decode_error(mock_get, api):
     result = api.get_user_stats("testuser")
 
     assert result is None
-    mock_get.assert_called_once_with("https://api.example.com/testuser/solved")
+    mock_get.assert_called_once_with(
+        "https://api.example.com/testuser/solved", timeout=30.0
+    )
+
+
+@patch("leetcode_api.requests.get")
+def test_get_recent_accepted_success(mock_get, api):
+    """Test fetching recent accepted submissions."""
+    submissions = [{"titleSlug": "two-sum", "timestamp": "1700000000"}]
+    mock_response = Mock()
+    mock_response.json.return_value = {"count": 1, "submission": submissions}
+    mock_response.raise_for_status.return_value = None
+    mock_get.return_value = mock_response
+
+    result = api.get_recent_accepted("testuser", limit=5)
+
+    assert result == submissions
+    mock_get.assert_called_once_with(
+        "https://api.example.com/testuser/acSubmission?limit=5", timeout=30.0
+    )
+
+
+@patch("leetcode_api.requests.get")
+def test_get_recent_accepted_error(mock_get, api):
+    """Test submission fetch failures return None."""
+    mock_get.side_effect = requests.ConnectionError("Connection failed")
+
+    assert api.get_recent_accepted("testuser") is None
+
+
+@patch("leetcode_api.requests.get")
+def test_get_problem_difficulty(mock_get, api):
+    """Test fetching a problem's difficulty."""
+    mock_response = Mock()
+    mock_response.json.return_value = {"titleSlug": "two-sum", "difficulty": "Easy"}
+    mock_response.raise_for_status.return_value = None
+    mock_get.return_value = mock_response
+
+    assert api.get_problem_difficulty("two-sum") == "Easy"
+    mock_get.assert_called_once_with(
+        "https://api.example.com/select?titleSlug=two-sum", timeout=30.0
+    )
+
+
+@patch("leetcode_api.requests.get")
+def test_circuit_opens_after_repeated_failures(mock_get):
+    """Test calls fail fast without hitting the network once the circuit opens."""
+    api = LeetCodeAPI(
+        "https://api.example.com", CircuitBreaker(min_calls=3, reset_timeout=60)
+    )
+    mock_get.side_effect = requests.ConnectionError("Connection failed")
+
+    results = [api.get_user_stats(f"user{i}") for i in range(5)]
+
+    assert results == [None] * 5
+    assert mock_get.call_count == 3
+    assert api.circuit_breaker.state == "open"
+
+
+@patch("leetcode_api.requests.get")
+def test_client_errors_do_not_open_circuit(mock_get):
+    """Test unknown users don't count as API failures."""
+    api = LeetCodeAPI("https://api.example.com", CircuitBreaker(min_calls=3))
+    mock_response = Mock()
+    mock_response.raise_for_status.side_effect = requests.HTTPError(
+        "404 Not Found", response=Mock(status_code=404)
+    )
+    mock_get.return_value = mock_response
+
+    for i in range(5):
+        assert api.get_user_stats(f"user{i}") is None
+
+    assert mock_get.call_count == 5
+    assert api.circuit_breaker.state == "closed"
+
+
+def test_comma_separated_endpoints():
+    """Test a comma-separated URL configures several endpoints."""
+    api = LeetCodeAPI("https://a.example.com, https://b.example.com")
+
+    assert api.endpoints == ["https://a.example.com", "https://b.example.com"]
+    assert api.api_url == "https://a.example.com"
+
+
+def test_missing_endpoint_is_rejected():
+    """Test an unset or empty API URL fails with a clear error."""
+    for api_url in [None, "", " , ", []]:
+        with pytest.raises(ValueError, match="LEETCODE_API_URL"):
+            LeetCodeAPI(api_url)
+
+
+@patch("leetcode_api.requests.get")
+def test_hedged_request_uses_faster_endpoint(mock_get, sample_user_stats):
+    """Test a slow request is hedged to the next endpoint."""
+    release = threading.Event()
+
+    def get(url, timeout):
+        if url.startswith("https://slow"):
+            release.wait(5)
+        response = Mock()
+        response.json.return_value = {**sample_user_stats, "url": url}
+        return response
+
+    mock_get.side_effect = get
+    selector = EndpointSelector(
+        ["https://slow.example.com", "https://fast.example.com"],
+        default_hedge_delay=0.05,
+    )
+    api = LeetCodeAPI(selector.endpoints, selector=selector)
+
+    try:
+        result = api.get_user_stats("testuser")
+    finally:
+        release.set()
+
+    assert result["url"] == "https://fast.example.com/testuser/solved"
+    assert mock_get.call_count == 2
+
+
+@patch("leetcode_api.requests.get")
+def test_server_error_fails_over_to_next_endpoint(mock_get, sample_user_stats):
+    """Test a server error on one endpoint is retried on the next."""
+
+    def get(url, timeout):
+        response = Mock()
+        if url.startswith("https://down"):
+            response.raise_for_status.side_effect = requests.HTTPError(
+                "502 Bad Gateway", response=Mock(status_code=502)
+            )
+        response.json.return_value = sample_user_stats
+        return response
+
+    mock_get.side_effect = get
+    api = LeetCodeAPI(["https://down.example.com", "https://up.example.com"])
+
+    assert api.get_user_stats("testuser") == sample_user_stats
+    assert api.selector.ranked() == [
+        "https://up.example.com",
+        "https://down.example.com",
+    ]
+
+    api.close()
+    assert api._executor is None
+    # A closed API starts a new pool if it is used again
+    assert api.get_user_stats("testuser") == sample_user_stats
+    api.close()
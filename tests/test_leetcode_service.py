@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 import pytest
 from unittest.mock import Mock, patch
 from datetime import datetime
@@ -6,7 +9,11 @@ import json
 import os
 
 from leetcode_service import LeetCodeService
-from models import UserStats, UserToTag, LeaderboardEntry
+from database import DatabaseManager
+from models import UserStats, UserToTag, LeaderboardEntry, SCHEMA_VERSION_KEY
+from stats_cache import StatsCache
+from poll_scheduler import PollScheduler
+from stats_sources import AtCoderSource, CodeforcesSource
 
 
 @pytest.fixture
@@ -16,6 +23,14 @@ def temp_db_file():
     os.close(fd)
     yield path
     os.unlink(path)
+    for leftover in [
+        f"{path}.checkpoint",
+        f"{path}.checkpoint.journal",
+        f"{path}.lock",
+        f"{path}.goals",
+    ]:
+        if os.path.exists(leftover):
+            os.unlink(leftover)
 
 
 @pytest.fixture
@@ -237,8 +252,8 @@ def test_check_and_update_progress_api_failure(temp_db_file, sample_db):
         update_db=True
     )
 
-    # Should tag users who have goals but gained 0 points due to API failure
-    assert len(users_to_tag) == 2  # user1 and user2 have goals, user3 doesn't
+    # Users whose stats could not be fetched are not tagged
+    assert users_to_tag == []
 
     # Database should remain unchanged except for weekly_points initialization
     with open(temp_db_file, "r") as f:
@@ -288,3 +303,747 @@ def test_check_and_update_progress_expired_goals(temp_db_file, sample_api_respon
         updated_db = json.load(f)
 
     assert updated_db["user1"]["goal"] == []
+
+
+@patch("leetcode_service.datetime")
+def test_check_and_update_progress_resumes_from_checkpoint(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test a crashed run resumes without refetching or double-applying gains."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    mock_now = Mock()
+    mock_now.weekday.return_value = 0  # Monday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, checkpoint_interval=1
+    )
+
+    # First attempt dies while fetching user2
+    def crashing_get_user_stats(lc_id):
+        if lc_id == "user2_lc":
+            raise KeyboardInterrupt
+        return sample_api_responses.get(lc_id)
+
+    service.leetcode_api.get_user_stats = crashing_get_user_stats
+    with pytest.raises(KeyboardInterrupt):
+        service.check_and_update_progress(update_db=True)
+
+    # User records in db.json were not touched by the failed attempt
+    with open(temp_db_file, "r") as f:
+        stored_db = json.load(f)
+    stored_db.pop(SCHEMA_VERSION_KEY, None)
+    assert stored_db == sample_db
+
+    fetched = []
+
+    def mock_get_user_stats(lc_id):
+        fetched.append(lc_id)
+        return sample_api_responses.get(lc_id)
+
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+    users_to_tag, leaderboard, is_monday = service.check_and_update_progress(
+        update_db=True
+    )
+
+    # user1 was checkpointed, so only the remaining users are fetched
+    assert fetched == ["user2_lc", "user3_lc"]
+
+    # Leaderboard comes from before the reset, and the reset is not repeated
+    assert [entry.points for entry in leaderboard] == [10, 5, 0]
+    assert [user.username for user in users_to_tag] == ["user1"]
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["weekly_points"] == 1
+    assert updated_db["user2"]["weekly_points"] == 2
+    assert updated_db["user3"]["weekly_points"] == 4
+
+
+@patch("leetcode_service.datetime")
+def test_check_and_update_progress_rerun_after_completion(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test a second run on the same day neither reapplies gains nor retags."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    mock_now = Mock()
+    mock_now.weekday.return_value = 1  # Tuesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = lambda lc_id: sample_api_responses.get(lc_id)
+    service.check_and_update_progress(update_db=True)
+
+    service.leetcode_api.get_user_stats = Mock()
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True)
+
+    service.leetcode_api.get_user_stats.assert_not_called()
+    # The first run already tagged user1
+    assert users_to_tag == []
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["weekly_points"] == 11
+    assert updated_db["user2"]["weekly_points"] == 7
+
+
+@patch("leetcode_service.datetime")
+def test_stream_and_update_progress_matches_batch_mode(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test the streaming pipeline produces the same results as the batch run."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 0  # Monday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    def mock_get_user_stats(lc_id):
+        return sample_api_responses.get(lc_id)
+
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+    expected = service.check_and_update_progress(update_db=True)
+    with open(temp_db_file, "r") as f:
+        expected_db = json.load(f)
+
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+    result = service.stream_and_update_progress(update_db=True, window=2)
+    with open(temp_db_file, "r") as f:
+        result_db = json.load(f)
+
+    assert result == expected
+    assert result_db == expected_db
+
+
+def test_stream_and_update_progress_no_update(
+    temp_db_file, sample_db, sample_api_responses
+):
+    """Test the streaming pipeline leaves the database alone with update_db=False."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = Mock(return_value=None)
+
+    service.stream_and_update_progress(update_db=False)
+
+    assert service.leetcode_api.get_user_stats.call_count == 3
+    with open(temp_db_file, "r") as f:
+        assert json.load(f) == sample_db
+
+
+def test_check_and_update_progress_uses_warm_stats(
+    temp_db_file, sample_db, sample_api_responses
+):
+    """Test fresh stats from the poller's cache are used instead of fetching,
+    except for goal holders."""
+    sample_db["user2"]["goal"] = []
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    cache = StatsCache(f"{temp_db_file}.stats")
+    cache.put("user1_lc", sample_api_responses["user1_lc"])  # Has a goal
+    cache.put("user2_lc", sample_api_responses["user2_lc"], now=0.0)  # Stale
+    cache.put("user3_lc", sample_api_responses["user3_lc"])
+
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, stats_cache=cache
+    )
+    service.leetcode_api.get_user_stats = Mock(
+        side_effect=lambda lc_id: sample_api_responses.get(lc_id)
+    )
+
+    service.check_and_update_progress(update_db=False)
+
+    fetched = [
+        call.args[0] for call in service.leetcode_api.get_user_stats.call_args_list
+    ]
+    assert fetched == ["user1_lc", "user2_lc"]
+
+
+def test_check_and_update_progress_migrates_legacy_records(
+    temp_db_file, sample_api_responses
+):
+    """Test records missing fields are normalized once and stamped."""
+    legacy_db = {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [],
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+        },
+        "user2": {"goal": [2, "2099-12-31"]},  # Created by /setgoal
+    }
+    with open(temp_db_file, "w") as f:
+        json.dump(legacy_db, f)
+
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = Mock(
+        side_effect=lambda lc_id: sample_api_responses.get(lc_id)
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    # Users without a LeetCode id are skipped rather than erroring
+    service.leetcode_api.get_user_stats.assert_called_once_with("user1_lc")
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db[SCHEMA_VERSION_KEY] == 1
+    assert updated_db["user1"]["weekly_points"] == 1
+    assert updated_db["user2"]["lc_id"] is None
+    assert updated_db["user2"]["weekly_points"] == 0
+
+
+def make_incremental_service(temp_db_file, db, submissions, difficulties, stats):
+    """Service in incremental mode with the API mocked out."""
+    with open(temp_db_file, "w") as f:
+        json.dump(db, f)
+
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, incremental=True, submission_limit=3
+    )
+    service.leetcode_api.get_recent_accepted = Mock(
+        side_effect=lambda lc_id, limit: submissions.get(lc_id)
+    )
+    service.leetcode_api.get_problem_difficulty = Mock(
+        side_effect=lambda slug: difficulties.get(slug)
+    )
+    service.leetcode_api.get_user_stats = Mock(side_effect=lambda lc_id: stats[lc_id])
+    return service
+
+
+def test_incremental_first_sight_sets_baseline(temp_db_file, sample_api_responses):
+    """Test a user whose baseline is pending gets no fake gain on first sight."""
+    db = {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [1, "2099-12-31"],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 0,
+            "baseline_pending": True,
+        }
+    }
+    submissions = {"user1_lc": [{"titleSlug": "two-sum", "timestamp": "1000"}]}
+    service = make_incremental_service(
+        temp_db_file, db, submissions, {}, sample_api_responses
+    )
+
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True)
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["points"] == 15  # 6 + 3 * 2 + 1 * 3
+    assert updated_db["user1"]["weekly_points"] == 0
+    assert updated_db["user1"]["submission_cursor"] == 1000
+    assert "baseline_pending" not in updated_db["user1"]
+    assert [user.username for user in users_to_tag] == ["user1"]
+
+
+@patch("leetcode_service.datetime")
+def test_incremental_first_run_counts_gains_since_baseline(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test switching to incremental mode keeps gains made since the last run."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 1  # Tuesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+    submissions = {"user1_lc": [{"titleSlug": "two-sum", "timestamp": "1000"}]}
+    service = make_incremental_service(
+        temp_db_file, sample_db, submissions, {}, sample_api_responses
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["points"] == 15
+    assert updated_db["user1"]["weekly_points"] == 11  # 10 + 1 easy
+    assert updated_db["user1"]["submission_cursor"] == 1000
+
+
+@patch("leetcode_service.datetime")
+def test_incremental_scores_new_submissions(mock_datetime, temp_db_file):
+    """Test only distinct problems accepted after the cursor are scored."""
+    db = {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [],
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+            "weekly_points": 2,
+            "submission_cursor": 1000,
+        }
+    }
+    submissions = {
+        "user1_lc": [
+            {"titleSlug": "lru-cache", "timestamp": "1300"},
+            {"titleSlug": "lru-cache", "timestamp": "1200"},
+            {"titleSlug": "median", "timestamp": "1100"},
+            {"titleSlug": "two-sum", "timestamp": "900"},
+        ]
+    }
+    difficulties = {"lru-cache": "Medium", "median": "Hard"}
+    stats = {"user1_lc": {"easySolved": 5, "mediumSolved": 4, "hardSolved": 2}}
+    service = make_incremental_service(
+        temp_db_file, db, submissions, difficulties, stats
+    )
+    mock_datetime.now.return_value = Mock(
+        weekday=Mock(return_value=1), strftime=Mock(return_value="2025-01-01")
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    service.leetcode_api.get_problem_difficulty.assert_called()
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["mediumSolved"] == 4
+    assert updated_db["user1"]["hardSolved"] == 2
+    assert updated_db["user1"]["points"] == 19
+    assert updated_db["user1"]["weekly_points"] == 7
+    assert updated_db["user1"]["submission_cursor"] == 1300
+
+
+@patch("leetcode_service.datetime")
+def test_incremental_ignores_re_accepted_problems(mock_datetime, temp_db_file):
+    """Test re-solving an already solved problem gains nothing."""
+    db = {
+        "user1": {
+            "lc_id": "user1_lc",
+            "goal": [],
+            "easySolved": 5,
+            "mediumSolved": 3,
+            "hardSolved": 1,
+            "points": 14,
+            "weekly_points": 2,
+            "submission_cursor": 1000,
+        }
+    }
+    submissions = {
+        "user1_lc": [
+            {"titleSlug": "lru-cache", "timestamp": "1200"},
+            {"titleSlug": "two-sum", "timestamp": "1100"},
+            {"titleSlug": "two-sum", "timestamp": "900"},
+        ]
+    }
+    difficulties = {"lru-cache": "Medium", "two-sum": "Easy"}
+    # Only lru-cache is a new solve; two-sum was solved before the cursor
+    stats = {"user1_lc": {"easySolved": 5, "mediumSolved": 4, "hardSolved": 1}}
+    service = make_incremental_service(
+        temp_db_file, db, submissions, difficulties, stats
+    )
+    mock_datetime.now.return_value = Mock(
+        weekday=Mock(return_value=1), strftime=Mock(return_value="2025-01-01")
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["easySolved"] == 5
+    assert updated_db["user1"]["mediumSolved"] == 4
+    assert updated_db["user1"]["points"] == 16
+    assert updated_db["user1"]["weekly_points"] == 4
+    assert updated_db["user1"]["submission_cursor"] == 1200
+
+
+@patch("leetcode_service.datetime")
+def test_incremental_falls_back_when_window_is_full(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test a full page of new submissions falls back to aggregate totals."""
+    sample_db["user1"]["submission_cursor"] = 1000
+    db = {"user1": sample_db["user1"]}
+    submissions = {
+        "user1_lc": [
+            {"titleSlug": f"problem-{i}", "timestamp": str(2000 - i)} for i in range(3)
+        ]
+    }
+    service = make_incremental_service(
+        temp_db_file, db, submissions, {}, sample_api_responses
+    )
+    mock_datetime.now.return_value = Mock(
+        weekday=Mock(return_value=1), strftime=Mock(return_value="2025-01-01")
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    service.leetcode_api.get_problem_difficulty.assert_not_called()
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user1"]["points"] == 15
+    assert updated_db["user1"]["weekly_points"] == 11
+    assert updated_db["user1"]["submission_cursor"] == 2000
+
+
+def test_check_and_update_progress_keeps_concurrent_goal(
+    temp_db_file, sample_db, sample_api_responses
+):
+    """Test a goal set by another process during the run isn't overwritten."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    db_manager = DatabaseManager(temp_db_file)
+
+    def mock_get_user_stats(lc_id):
+        if lc_id == "user1_lc":
+            # Simulate /setgoal from the bot while stats are being fetched
+            with db_manager.transaction() as db:
+                db["user3"]["goal"] = [2, "2099-12-31"]
+        return sample_api_responses.get(lc_id)
+
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+
+    service.check_and_update_progress(update_db=True)
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+
+    assert updated_db["user3"]["goal"] == [2, "2099-12-31"]
+    assert updated_db["user1"]["points"] == 15
+    assert not db_manager.has_snapshot()
+
+
+@patch("leetcode_service.datetime")
+def test_check_and_update_progress_skips_idle_users(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test users without goals are only fetched when their schedule is due."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    scheduler = PollScheduler()
+    scheduler.entries["user3"] = {"activity": 0.0, "last_fetched": "2024-12-30"}
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, poll_scheduler=scheduler
+    )
+    service.leetcode_api.get_user_stats = Mock(
+        side_effect=lambda lc_id: sample_api_responses.get(lc_id)
+    )
+
+    service.check_and_update_progress(update_db=True)
+
+    fetched = [
+        call.args[0] for call in service.leetcode_api.get_user_stats.call_args_list
+    ]
+    assert fetched == ["user1_lc", "user2_lc"]
+    assert scheduler.entries["user3"]["last_fetched"] == "2024-12-30"
+    assert scheduler.entries["user1"]["last_fetched"] == "2025-01-01"
+
+
+@patch("leetcode_service.datetime")
+def test_check_and_update_progress_deadline_carries_over(
+    mock_datetime, temp_db_file, sample_api_responses
+):
+    """Test goal holders are fetched first and unreached users are carried over."""
+    db = {
+        "idle": {
+            "lc_id": "idle_lc",
+            "goal": [],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 0,
+        },
+        "late_goal": {
+            "lc_id": "late_goal_lc",
+            "goal": [5, "2099-12-31"],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 0,
+        },
+        "contender": {
+            "lc_id": "contender_lc",
+            "goal": [],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 9,
+        },
+        "goal": {
+            "lc_id": "goal_lc",
+            "goal": [1, "2099-12-31"],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 0,
+        },
+    }
+    with open(temp_db_file, "w") as f:
+        json.dump(db, f)
+
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    stats = {"easySolved": 1, "mediumSolved": 0, "hardSolved": 0}
+    fetch_times = iter(range(100))
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, clock=lambda: next(fetch_times)
+    )
+    service.leetcode_api.get_user_stats = Mock(return_value=stats)
+
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True, deadline=3)
+
+    fetched = [
+        call.args[0] for call in service.leetcode_api.get_user_stats.call_args_list
+    ]
+    assert fetched == ["late_goal_lc", "goal_lc", "contender_lc"]
+    assert service.carried_over == ["idle"]
+    # late_goal gained 1 of 5 points; carried over users are never tagged
+    assert [user.username for user in users_to_tag] == ["late_goal"]
+
+    # A rerun the same day only fetches the carried over user, and does not
+    # tag late_goal again
+    service.leetcode_api.get_user_stats.reset_mock()
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True)
+    assert users_to_tag == []
+
+    fetched = [
+        call.args[0] for call in service.leetcode_api.get_user_stats.call_args_list
+    ]
+    assert fetched == ["idle_lc"]
+    assert service.carried_over == []
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+    assert updated_db["contender"]["weekly_points"] == 10
+    assert updated_db["idle"]["points"] == 1
+
+
+@patch("leetcode_service.datetime")
+def test_carried_over_rerun_does_not_repost_the_leaderboard(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test a Monday rerun for carried over users returns no leaderboard."""
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    mock_now = Mock()
+    mock_now.weekday.return_value = 0  # Monday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    fetch_times = iter(range(100))
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, clock=lambda: next(fetch_times)
+    )
+    service.leetcode_api.get_user_stats = sample_api_responses.get
+
+    _, leaderboard, _ = service.check_and_update_progress(update_db=True, deadline=1)
+    assert [entry.points for entry in leaderboard] == [10, 5, 0]
+    assert service.carried_over
+
+    users_to_tag, leaderboard, is_monday = service.check_and_update_progress(
+        update_db=True
+    )
+    assert is_monday
+    assert leaderboard == []
+    assert service.carried_over == []
+
+
+@pytest.mark.asyncio
+@patch("leetcode_service.datetime")
+async def test_check_and_update_progress_async_matches_sync(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test the async run produces the same results as the sync run."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 0  # Monday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    def mock_get_user_stats(lc_id):
+        return sample_api_responses.get(lc_id)
+
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+    expected = service.check_and_update_progress(update_db=True)
+    with open(temp_db_file, "r") as f:
+        expected_db = json.load(f)
+
+    os.remove(f"{temp_db_file}.checkpoint")
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = mock_get_user_stats
+    result = await service.check_and_update_progress_async(update_db=True)
+    with open(temp_db_file, "r") as f:
+        result_db = json.load(f)
+
+    assert result == expected
+    assert result_db == expected_db
+
+
+@pytest.mark.asyncio
+@patch("leetcode_service.datetime")
+async def test_check_and_update_progress_async_keeps_loop_responsive(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test other tasks keep running on the event loop during slow fetches."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    def slow_get_user_stats(lc_id):
+        time.sleep(0.05)
+        return sample_api_responses.get(lc_id)
+
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+    service = LeetCodeService("https://api.example.com", temp_db_file)
+    service.leetcode_api.get_user_stats = slow_get_user_stats
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        await service.check_and_update_progress_async(update_db=True)
+    finally:
+        ticker_task.cancel()
+
+    # Three blocking 50ms fetches leave plenty of room for 10ms ticks
+    assert ticks >= 5
+
+
+@patch("leetcode_service.datetime")
+def test_linked_platform_gains_count_towards_goals(
+    mock_datetime, temp_db_file, sample_db, sample_api_responses
+):
+    """Test gains on linked platforms are added to LeetCode's, after a baseline."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 1  # Tuesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    sample_db["user1"]["sources"] = {
+        "codeforces": {
+            "handle": "alice",
+            "easySolved": 0,
+            "mediumSolved": 1,
+            "hardSolved": 0,
+        }
+    }
+    # Linked since the last run, so the first counts are only a baseline
+    sample_db["user2"]["sources"] = {"atcoder": {"handle": "bob"}}
+    with open(temp_db_file, "w") as f:
+        json.dump(sample_db, f)
+
+    codeforces = CodeforcesSource()
+    codeforces.get_solved = Mock(
+        return_value={"easySolved": 0, "mediumSolved": 2, "hardSolved": 0}
+    )
+    atcoder = AtCoderSource()
+    atcoder.get_solved = Mock(
+        return_value={"easySolved": 40, "mediumSolved": 10, "hardSolved": 1}
+    )
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, sources=[codeforces, atcoder]
+    )
+    service.leetcode_api.get_user_stats = lambda lc_id: sample_api_responses.get(lc_id)
+
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=True)
+
+    # user1 gained 1 point on LeetCode and 2 on Codeforces, meeting their goal
+    assert users_to_tag == []
+    codeforces.get_solved.assert_called_once_with("alice")
+    atcoder.get_solved.assert_called_once_with("bob")
+
+    with open(temp_db_file, "r") as f:
+        updated_db = json.load(f)
+    assert updated_db["user1"]["weekly_points"] == 13
+    assert updated_db["user1"]["points"] == 15
+    assert updated_db["user1"]["sources"]["codeforces"]["mediumSolved"] == 2
+    assert updated_db["user2"]["weekly_points"] == 7
+    assert updated_db["user2"]["sources"]["atcoder"] == {
+        "handle": "bob",
+        "easySolved": 40,
+        "mediumSolved": 10,
+        "hardSolved": 1,
+    }
+    assert "sources" not in updated_db["user3"]
+
+
+def test_linked_fetch_past_the_deadline_gains_nothing(temp_db_file, sample_db):
+    """Test a linked account still fetching at the deadline counts no gain yet."""
+    release = threading.Event()
+    codeforces = CodeforcesSource()
+
+    def stalled(handle):
+        release.wait(5)
+        return {"easySolved": 0, "mediumSolved": 5, "hardSolved": 0}
+
+    codeforces.get_solved = stalled
+    service = LeetCodeService(
+        "https://api.example.com", temp_db_file, sources=[codeforces]
+    )
+    service.leetcode_api.get_user_stats = Mock(
+        return_value={"easySolved": 5, "mediumSolved": 3, "hardSolved": 1}
+    )
+    user_data = {
+        **sample_db["user1"],
+        "sources": {
+            "codeforces": {
+                "handle": "alice",
+                "easySolved": 0,
+                "mediumSolved": 1,
+                "hardSolved": 0,
+            }
+        },
+    }
+
+    try:
+        update = service.evaluate_user(user_data, deadline=time.time() + 0.05)
+    finally:
+        release.set()
+        service.close()
+
+    assert update.points_gained == 0
+    assert update.sources == {}
@@ -0,0 +1,140 @@
+import pytest
+from message_scheduler import (
+    MessageScheduler,
+    ChannelBucket,
+    LEADERBOARD_PRIORITY,
+    TAG_PRIORITY,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+@pytest.fixture
+def clock():
+    """Fake clock whose sleep advances time instantly."""
+    return FakeClock()
+
+
+def make_scheduler(clock, **kwargs):
+    return MessageScheduler(sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_channel_bucket_limits_burst(clock):
+    """Test the bucket allows `capacity` messages then waits for a refill."""
+    bucket = ChannelBucket(capacity=2, period=2.0, clock=clock)
+    bucket.consume()
+    bucket.consume()
+
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.now += 1.0
+    assert bucket.wait_time() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_flush_sends_leaderboard_before_tags(clock):
+    """Test leaderboard posts go out ahead of tags queued earlier."""
+    sent = []
+
+    async def send(content):
+        sent.append(content)
+
+    scheduler = make_scheduler(clock)
+    scheduler.enqueue(1, send, "tag1", TAG_PRIORITY)
+    scheduler.enqueue(1, send, "tag2", TAG_PRIORITY)
+    scheduler.enqueue(1, send, "leaderboard", LEADERBOARD_PRIORITY)
+
+    failed = await scheduler.flush()
+
+    assert failed == []
+    assert sent == ["leaderboard", "tag1", "tag2"]
+    assert scheduler.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_respects_channel_bucket(clock):
+    """Test sends beyond the bucket capacity wait for the bucket to refill."""
+    sent_at = []
+
+    async def send(content):
+        sent_at.append(clock.now)
+
+    scheduler = make_scheduler(clock, bucket_capacity=2, bucket_period=2.0)
+    for i in range(4):
+        scheduler.enqueue(1, send, f"tag{i}")
+
+    await scheduler.flush()
+
+    assert sent_at == [0.0, 0.0, pytest.approx(1.0), pytest.approx(2.0)]
+
+
+@pytest.mark.asyncio
+async def test_flush_retries_rate_limited_and_server_errors(clock):
+    """Test 429s wait for retry_after and 5xx errors back off exponentially."""
+    errors = [FakeHTTPError(429, retry_after=3.0), FakeHTTPError(503)]
+    sent = []
+
+    async def send(content):
+        if errors:
+            raise errors.pop(0)
+        sent.append((content, clock.now))
+
+    scheduler = make_scheduler(clock, base_backoff=1.0)
+    scheduler.enqueue(1, send, "tag")
+
+    failed = await scheduler.flush()
+
+    assert failed == []
+    # 3s for the rate limit, then 2s backoff for the second attempt
+    assert sent == [("tag", pytest.approx(5.0))]
+
+
+@pytest.mark.asyncio
+async def test_flush_gives_up_on_client_errors(clock):
+    """Test permanent errors are not retried and are reported as failed."""
+    attempts = []
+
+    async def send(content):
+        attempts.append(content)
+        raise FakeHTTPError(403)
+
+    scheduler = make_scheduler(clock)
+    scheduler.enqueue(1, send, "tag")
+
+    failed = await scheduler.flush()
+
+    assert attempts == ["tag"]
+    assert [message.content for message in failed] == ["tag"]
+
+
+@pytest.mark.asyncio
+async def test_flush_gives_up_after_max_retries(clock):
+    """Test transient errors stop being retried after max_retries."""
+    attempts = []
+
+    async def send(content):
+        attempts.append(content)
+        raise ConnectionError("reset")
+
+    scheduler = make_scheduler(clock, max_retries=2)
+    scheduler.enqueue(1, send, "tag")
+
+    failed = await scheduler.flush()
+
+    assert len(attempts) == 3
+    assert len(failed) == 1
@@ -0,0 +1,54 @@
+import pytest
+from migrations import SchemaMigrator, SCHEMA_VERSION, new_user_record
+
+
+def test_migrate_fills_missing_fields():
+    """Test v0 records gain every field with sensible defaults."""
+    db = {"user1": {"goal": [1, "2025-12-31"]}}
+
+    SchemaMigrator.migrate(db, 0)
+
+    assert db["user1"] == {
+        "lc_id": None,
+        "goal": [1, "2025-12-31"],
+        "easySolved": 0,
+        "mediumSolved": 0,
+        "hardSolved": 0,
+        "points": 0,
+        "weekly_points": 0,
+    }
+
+
+def test_migrate_keeps_existing_values():
+    """Test migration never overwrites stored values."""
+    record = {
+        "lc_id": "user1_lc",
+        "goal": [],
+        "easySolved": 5,
+        "mediumSolved": 3,
+        "hardSolved": 1,
+        "points": 0,  # Stale, but stored
+        "weekly_points": 7,
+    }
+    expected = dict(record)
+
+    assert SchemaMigrator.migrate_record(record, 0) == expected
+
+
+def test_migrate_current_version_is_noop():
+    """Test up-to-date data is left alone."""
+    db = {"user1": {}}
+    SchemaMigrator.migrate(db, SCHEMA_VERSION)
+
+    assert db == {"user1": {}}
+    assert SchemaMigrator.needs_migration(SCHEMA_VERSION) is False
+
+
+def test_new_user_record():
+    """Test new records are created in the current schema."""
+    record = new_user_record(goal=[3, "2025-12-31"])
+
+    assert record["lc_id"] is None
+    assert record["goal"] == [3, "2025-12-31"]
+    assert record["points"] == 0
+    assert record["weekly_points"] == 0
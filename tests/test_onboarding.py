@@ -0,0 +1,97 @@
+import os
+import tempfile
+from unittest.mock import Mock
+
+import pytest
+from database import DatabaseManager
+from onboarding import BulkOnboarder
+
+
+@pytest.fixture
+def db_manager():
+    """Create a database manager backed by a temporary file."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.unlink(path)
+    yield DatabaseManager(path)
+    for leftover in [path, f"{path}.lock", f"{path}.goals"]:
+        if os.path.exists(leftover):
+            os.unlink(leftover)
+
+
+@pytest.fixture
+def leetcode_api():
+    """Mock API that knows two LeetCode accounts."""
+    known = {
+        "alice_lc": {"easySolved": 10, "mediumSolved": 5, "hardSolved": 1},
+        "bob_lc": {"easySolved": 2, "mediumSolved": 0, "hardSolved": 0},
+    }
+    api = Mock()
+    api.get_user_stats = Mock(side_effect=lambda lc_id: known.get(lc_id))
+    return api
+
+
+def test_parse_mappings():
+    """Test CSV lines are parsed, skipping the header, comments and blanks."""
+    lines = ["discord_name,lc_id", "alice, alice_lc", "", "# comment", "bob,bob_lc"]
+
+    assert BulkOnboarder.parse_mappings(lines) == [
+        ("alice", "alice_lc"),
+        ("bob", "bob_lc"),
+    ]
+
+
+def test_parse_mappings_rejects_malformed_lines():
+    """Test lines without exactly two columns are rejected."""
+    with pytest.raises(ValueError, match="discord_name,lc_id"):
+        BulkOnboarder.parse_mappings(["alice"])
+
+
+def test_onboard_captures_baselines(db_manager, leetcode_api):
+    """Test valid users are added with their current totals as the baseline."""
+    onboarder = BulkOnboarder(leetcode_api, db_manager, workers=4)
+
+    result = onboarder.onboard(
+        [("alice", "alice_lc"), ("bob", "bob_lc"), ("carol", "typo_lc")]
+    )
+
+    assert sorted(result.added) == ["alice", "bob"]
+    assert result.failed == [("carol", "typo_lc")]
+    db = db_manager.get_db()
+    assert db["alice"] == {
+        "lc_id": "alice_lc",
+        "goal": [],
+        "easySolved": 10,
+        "mediumSolved": 5,
+        "hardSolved": 1,
+        "points": 23,
+        "weekly_points": 0,
+    }
+    assert "carol" not in db
+
+
+def test_onboard_relinks_existing_users(db_manager, leetcode_api):
+    """Test existing users keep their goal and skip refetching if unchanged."""
+    with db_manager.transaction() as db:
+        db["alice"] = {
+            "lc_id": None,
+            "goal": [2, "2025-12-31"],
+            "easySolved": 0,
+            "mediumSolved": 0,
+            "hardSolved": 0,
+            "points": 0,
+            "weekly_points": 4,
+        }
+        db["bob"] = {**db["alice"], "lc_id": "bob_lc"}
+
+    result = BulkOnboarder(leetcode_api, db_manager).onboard(
+        [("alice", "alice_lc"), ("bob", "bob_lc")]
+    )
+
+    assert result.updated == ["alice"]
+    assert result.unchanged == ["bob"]
+    leetcode_api.get_user_stats.assert_called_once_with("alice_lc")
+    alice = db_manager.get_user("alice")
+    assert alice["goal"] == [2, "2025-12-31"]
+    assert alice["weekly_points"] == 4
+    assert alice["points"] == 23
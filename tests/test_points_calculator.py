@@ -65,3 +65,12 @@ def test_calculate_points_gained_negative():
     """Test points gained calculation handles negative values."""
     gained = PointsCalculator.calculate_points_gained(10, 15)
     assert gained == 0  # Should not be negative
+
+
+def test_calculate_difficulty_points():
+    """Test scoring newly solved problems counted per difficulty."""
+    assert PointsCalculator.calculate_difficulty_points(
+        {"easy": 2, "medium": 1, "hard": 1}
+    ) == (2 * 1 + 1 * 2 + 1 * 3)
+    assert PointsCalculator.calculate_difficulty_points({"Hard": 2}) == 6
+    assert PointsCalculator.calculate_difficulty_points({}) == 0
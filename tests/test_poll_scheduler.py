@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import pytest
+from poll_scheduler import PollScheduler
+
+
+@pytest.fixture
+def schedule_path():
+    """Create a temporary path for the poll schedule."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.unlink(path)
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def idle_user():
+    return {"lc_id": "idle_lc", "goal": []}
+
+
+def test_new_users_are_fetched():
+    """Test users without history are always due."""
+    scheduler = PollScheduler()
+
+    assert scheduler.should_fetch("idle", idle_user(), "2025-01-01")
+
+
+def test_inactive_users_are_fetched_less_often():
+    """Test the interval grows as a user keeps gaining nothing."""
+    scheduler = PollScheduler(max_interval=7)
+    scheduler.record("idle", 3, "2024-12-01")
+    assert scheduler.interval("idle") == 1
+
+    for day in range(2, 20):
+        scheduler.record("idle", 0, f"2024-12-{day:02d}")
+
+    assert scheduler.interval("idle") == 7
+    # 2024-12-19 was the last fetch; Wednesday 2024-12-25 is six days later
+    assert not scheduler.should_fetch("idle", idle_user(), "2024-12-25")
+    assert scheduler.should_fetch("idle", idle_user(), "2024-12-26")
+
+
+def test_activity_shortens_the_interval_again():
+    """Test a gain pulls an idle user back towards daily fetches."""
+    scheduler = PollScheduler(alpha=0.5)
+    for day in range(1, 6):
+        scheduler.record("idle", 0, f"2024-12-0{day}")
+    slow = scheduler.interval("idle")
+
+    scheduler.record("idle", 2, "2024-12-06")
+
+    assert scheduler.interval("idle") < slow
+
+
+def test_active_goals_are_always_fetched():
+    """Test users with an active goal are fetched every day."""
+    scheduler = PollScheduler()
+    for day in range(1, 20):
+        scheduler.record("grinder", 0, f"2024-12-{day:02d}")
+
+    user_data = {"lc_id": "grinder_lc", "goal": [1, "2025-12-31"]}
+    assert scheduler.should_fetch("grinder", user_data, "2024-12-20")
+
+
+def test_everyone_is_fetched_before_the_leaderboard():
+    """Test everyone is fetched on Sunday, before the Monday leaderboard."""
+    scheduler = PollScheduler()
+    for day in range(1, 20):
+        scheduler.record("idle", 0, f"2024-12-{day:02d}")
+
+    assert not scheduler.should_fetch("idle", idle_user(), "2024-12-21")  # Saturday
+    assert scheduler.should_fetch("idle", idle_user(), "2024-12-22")  # Sunday
+
+
+def test_save_and_load(schedule_path):
+    """Test the schedule survives a round trip through disk."""
+    scheduler = PollScheduler(schedule_path)
+    scheduler.record("idle", 0, "2024-12-01")
+    scheduler.save()
+
+    loaded = PollScheduler(schedule_path).load()
+
+    assert loaded.entries == scheduler.entries
@@ -0,0 +1,49 @@
+import pytest
+import tempfile
+import os
+from unittest.mock import Mock
+from problem_catalog import ProblemCatalog
+
+
+@pytest.fixture
+def cache_path():
+    """Create a temporary cache path for testing."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "problems.json")
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+    os.rmdir(directory)
+
+
+def test_get_difficulty_fetches_once(cache_path):
+    """Test difficulties are fetched once and then served from the cache."""
+    api = Mock()
+    api.get_problem_difficulty.return_value = "Medium"
+    catalog = ProblemCatalog(api, cache_path)
+
+    assert catalog.get_difficulty("add-two-numbers") == "Medium"
+    assert catalog.get_difficulty("add-two-numbers") == "Medium"
+    api.get_problem_difficulty.assert_called_once_with("add-two-numbers")
+
+
+def test_failed_lookup_is_not_cached(cache_path):
+    """Test failed lookups are retried next time."""
+    api = Mock()
+    api.get_problem_difficulty.side_effect = [None, "Hard"]
+    catalog = ProblemCatalog(api, cache_path)
+
+    assert catalog.get_difficulty("median") is None
+    assert catalog.get_difficulty("median") == "Hard"
+
+
+def test_save_and_reload(cache_path):
+    """Test learned difficulties persist across runs."""
+    api = Mock()
+    api.get_problem_difficulty.return_value = "Easy"
+    catalog = ProblemCatalog(api, cache_path)
+    catalog.get_difficulty("two-sum")
+    catalog.save()
+
+    reloaded = ProblemCatalog(Mock(), cache_path)
+    assert reloaded.get_difficulty("two-sum") == "Easy"
@@ -0,0 +1,117 @@
+import json
+import os
+import pstats
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+from leetcode_service import LeetCodeService
+from profiler import NullProfiler, Profiler
+
+
+@pytest.fixture
+def output_path():
+    """Create a temporary prefix for profile output."""
+    directory = tempfile.mkdtemp()
+    yield os.path.join(directory, "profile")
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def test_null_profiler_phase_is_shared():
+    """Test disabled phases reuse one no-op context manager."""
+    profiler = NullProfiler()
+
+    with profiler.phase("fetch"):
+        pass
+
+    assert profiler.phase("fetch") is profiler.phase("save")
+
+
+def test_phases_are_timed_and_measured(output_path):
+    """Test each phase counts its calls and allocations."""
+    profiler = Profiler(output_path)
+    profiler.start()
+
+    for _ in range(3):
+        with profiler.phase("fetch"):
+            kept = [bytes(1024) for _ in range(100)]
+    with profiler.phase("save"):
+        pass
+    profiler.stop()
+
+    assert profiler.phases["fetch"].calls == 3
+    assert profiler.phases["save"].calls == 1
+    assert profiler.phases["fetch"].peak >= 100 * 1024
+    assert kept
+
+
+def test_nested_phase_is_folded_into_outer(output_path):
+    """Test a phase entered inside another is counted as part of the outer one."""
+    profiler = Profiler(output_path)
+    profiler.start()
+
+    with profiler.phase("stream"):
+        with profiler.phase("fetch"):
+            pass
+    profiler.stop()
+
+    assert list(profiler.phases) == ["stream"]
+
+
+def test_stop_writes_pstats_and_report(output_path):
+    """Test the pstats file loads and the report has a section per phase."""
+    profiler = Profiler(output_path)
+    profiler.start()
+    with profiler.phase("goal check"):
+        sorted(range(1000), reverse=True)
+    with profiler.phase("load"):
+        json.loads("[1, 2, 3]")
+    profiler.stop()
+
+    stats = pstats.Stats(profiler.pstats_path)
+    assert stats.total_calls > 0
+    with open(profiler.report_path, "r") as f:
+        report = f.read()
+    # Phases are reported in run order
+    assert report.index("=== load ===") < report.index("=== goal check ===")
+    assert "=== Top allocations ===" in report
+
+
+@patch("leetcode_service.datetime")
+def test_service_run_is_profiled_by_phase(mock_datetime, output_path):
+    """Test a progress run reports its load, fetch, score, save and goal check phases."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+
+    db_path = f"{output_path}.json"
+    with open(db_path, "w") as f:
+        json.dump(
+            {
+                "user1": {
+                    "lc_id": "user1_lc",
+                    "goal": [],
+                    "easySolved": 0,
+                    "mediumSolved": 0,
+                    "hardSolved": 0,
+                    "points": 0,
+                    "weekly_points": 0,
+                }
+            },
+            f,
+        )
+
+    profiler = Profiler(output_path)
+    service = LeetCodeService("https://api.example.com", db_path, profiler=profiler)
+    service.leetcode_api.get_user_stats = Mock(
+        return_value={"easySolved": 1, "mediumSolved": 0, "hardSolved": 0}
+    )
+    profiler.start()
+    service.check_and_update_progress(update_db=True)
+    profiler.stop()
+
+    assert set(profiler.phases) == {"load", "fetch", "score", "save", "goal check"}
+    assert profiler.phases["fetch"].calls == 1
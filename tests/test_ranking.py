@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+import json
+import os
+import random
+from database import DatabaseManager
+from leaderboard import LeaderboardManager
+from ranking import FenwickTree, RankingIndex, RankingView
+
+
+@pytest.fixture
+def sample_db():
+    """Sample database for testing."""
+    return {
+        "user1": {"lc_id": "user1_lc", "weekly_points": 15},
+        "user2": {"lc_id": "user2_lc", "weekly_points": 5},
+        "user3": {"lc_id": "user3_lc", "weekly_points": 0},
+        "user4": {"lc_id": "user4_lc", "weekly_points": 5},
+    }
+
+
+@pytest.fixture
+def temp_db_file(tmp_path):
+    """Create a temporary database file, alongside which its lock and goal
+    index files are written."""
+    path = tmp_path / "db.json"
+    path.touch()
+    return str(path)
+
+
+def test_fenwick_tree_grows():
+    """Test prefix sums stay correct when the tree grows."""
+    tree = FenwickTree(size=4)
+    tree.add(1, 2)
+    tree.add(100, 1)
+
+    assert tree.size >= 101
+    assert tree.prefix_sum(0) == 0
+    assert tree.prefix_sum(1) == 2
+    assert tree.prefix_sum(99) == 2
+    assert tree.prefix_sum(1000) == 3
+
+
+def test_rank_with_ties(sample_db):
+    """Test ranks count strictly higher scores, so ties share a rank."""
+    ranking = RankingIndex.from_db(sample_db)
+
+    assert ranking.rank("user1") == 1
+    assert ranking.rank("user2") == 2
+    assert ranking.rank("user4") == 2
+    assert ranking.rank("user3") == 4
+    assert ranking.rank("missing") is None
+
+
+def test_update_and_remove(sample_db):
+    """Test incremental updates move users through the ranking."""
+    ranking = RankingIndex.from_db(sample_db)
+    ranking.update("user3", 20)
+    ranking.remove("user1")
+
+    assert len(ranking) == 3
+    assert ranking.rank("user3") == 1
+    assert ranking.rank("user2") == 2
+
+
+def test_top_matches_weekly_leaderboard(sample_db):
+    """Test the top-N view orders users like the Monday leaderboard."""
+    ranking = RankingIndex.from_db(sample_db, top_n=3)
+
+    expected = LeaderboardManager.get_weekly_leaderboard(sample_db)[:3]
+    assert ranking.top() == expected
+
+
+def test_top_cache_invalidation():
+    """Test the cached top-N stays correct across random updates."""
+    rng = random.Random(0)
+    db = {f"user{i}": {"weekly_points": rng.randint(0, 50)} for i in range(200)}
+    ranking = RankingIndex.from_db(db, top_n=5)
+
+    for _ in range(500):
+        username = f"user{rng.randint(0, 199)}"
+        db[username]["weekly_points"] = rng.randint(0, 60)
+        ranking.update(username, db[username]["weekly_points"])
+        assert ranking.top() == LeaderboardManager.get_weekly_leaderboard(db)[:5]
+
+
+def test_ranking_view_refreshes_on_change(temp_db_file, sample_db):
+    """Test the view reloads only when the stored database changes."""
+    db_manager = DatabaseManager(temp_db_file)
+    db_manager.save_db(sample_db)
+    view = RankingView(db_manager, top_n=2)
+
+    assert view.refresh() is True
+    assert view.refresh() is False
+    assert [entry.username for entry in view.leaderboard()] == ["user1", "user2"]
+
+    sample_db["user3"]["weekly_points"] = 30
+    del sample_db["user2"]
+    db_manager.save_db(sample_db)
+    # Make sure the change is visible even on coarse-mtime filesystems
+    stat = os.stat(temp_db_file)
+    os.utime(temp_db_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    # Reads see the view as of the last refresh
+    assert view.user_stats("user3")[0]["weekly_points"] == 0
+    assert asyncio.run(view.refresh_async()) is True
+    assert asyncio.run(view.refresh_async()) is False
+
+    user_data, rank = view.user_stats("user3")
+    assert user_data["weekly_points"] == 30
+    assert rank == 1
+    assert view.user_stats("user2") is None
+    assert [entry.username for entry in view.leaderboard()] == ["user3", "user1"]
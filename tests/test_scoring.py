@@ -0,0 +1,144 @@
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+from baseline_prefetcher import BaselinePrefetcher
+from database import DatabaseManager
+from leetcode_service import LeetCodeService
+from migrations import new_user_record
+from models import ScoringScheme, DEFAULT_SCORING_SCHEME
+from onboarding import BulkOnboarder
+from points_calculator import PointsCalculator
+from scoring import Rescorer, load_scoring_scheme
+
+HARD_HEAVY = ScoringScheme(version=2, easy=1, medium=3, hard=5)
+
+
+@pytest.fixture
+def db_manager():
+    """Create a database manager backed by a temporary file."""
+    directory = tempfile.mkdtemp()
+    manager = DatabaseManager(os.path.join(directory, "db.json"))
+    manager.save_db(
+        {
+            "user1": {
+                "lc_id": "user1_lc",
+                "goal": [4, "2099-12-31"],
+                "easySolved": 5,
+                "mediumSolved": 3,
+                "hardSolved": 1,
+                "points": 14,
+                "weekly_points": 6,
+            },
+            "user2": {
+                "lc_id": "user2_lc",
+                "goal": [],
+                "easySolved": 2,
+                "mediumSolved": 0,
+                "hardSolved": 0,
+                "points": 2,
+                "weekly_points": 0,
+            },
+        }
+    )
+    yield manager
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def test_load_scoring_scheme(tmp_path):
+    """Test a scheme is read from JSON, defaulting when there is no file."""
+    path = tmp_path / "scoring.json"
+    assert load_scoring_scheme(str(path)) == DEFAULT_SCORING_SCHEME
+
+    path.write_text(json.dumps({"version": 2, "easy": 1, "medium": 3, "hard": 5}))
+    assert load_scoring_scheme(str(path)) == HARD_HEAVY
+
+
+def test_points_use_the_given_scheme():
+    """Test points are weighted by the scheme passed in."""
+    stats = {"easySolved": 5, "mediumSolved": 3, "hardSolved": 1}
+
+    assert PointsCalculator.calculate_points(stats) == 14
+    assert PointsCalculator.calculate_points(stats, HARD_HEAVY) == 19
+    assert PointsCalculator.calculate_difficulty_points({"Hard": 2}, HARD_HEAVY) == 10
+
+
+def test_rescore_recomputes_points_once(db_manager):
+    """Test rescoring rewrites points from solved counts and records the scheme."""
+    rescorer = Rescorer(db_manager, HARD_HEAVY)
+    assert rescorer.needs_rescore()
+
+    assert rescorer.rescore() == 1
+
+    db = db_manager.get_db()
+    assert db["user1"]["points"] == 5 + 3 * 3 + 1 * 5
+    # Easy-only users score the same under both schemes
+    assert db["user2"]["points"] == 2
+    # Weekly gains have no per-difficulty history to rescore
+    assert db["user1"]["weekly_points"] == 6
+    assert rescorer.stored_scheme() == HARD_HEAVY
+    assert not rescorer.needs_rescore()
+
+
+def test_baselines_use_the_stored_scheme(db_manager):
+    """Test baseline writers on a newer scheme than the stored points stay on their scale."""
+    stats = {"easySolved": 1, "mediumSolved": 1, "hardSolved": 1}
+    api = Mock()
+    api.get_user_stats = Mock(return_value=stats)
+    with db_manager.transaction() as db:
+        db["alice"] = new_user_record()
+        BaselinePrefetcher.link(db["alice"], "alice_lc")
+
+    prefetcher = BaselinePrefetcher(api, db_manager, scheme=HARD_HEAVY)
+    assert prefetcher.store_baseline("alice", "alice_lc", stats)
+    BulkOnboarder(api, db_manager, scheme=HARD_HEAVY).onboard([("bob", "bob_lc")])
+
+    db = db_manager.get_db()
+    assert db["alice"]["points"] == 1 + 2 + 3
+    assert db["bob"]["points"] == 1 + 2 + 3
+
+    # Once the checker rescores, new baselines use the new scheme
+    Rescorer(db_manager, HARD_HEAVY).rescore()
+    BulkOnboarder(api, db_manager, scheme=HARD_HEAVY).onboard([("carol", "carol_lc")])
+    assert db_manager.get_user("carol")["points"] == 1 + 3 + 5
+
+
+def test_changed_weights_need_a_new_version(db_manager):
+    """Test editing weights without bumping the version is refused."""
+    Rescorer(db_manager, HARD_HEAVY).rescore()
+    edited = ScoringScheme(version=2, easy=1, medium=4, hard=6)
+
+    with pytest.raises(ValueError, match="bump its version"):
+        Rescorer(db_manager, edited).needs_rescore()
+
+
+@patch("leetcode_service.datetime")
+def test_run_after_scheme_change_counts_no_fake_gains(mock_datetime, db_manager):
+    """Test a run under a new scheme rescores first, so unchanged users gain nothing."""
+    mock_now = Mock()
+    mock_now.weekday.return_value = 2  # Wednesday
+    mock_now.strftime.return_value = "2025-01-01"
+    mock_datetime.now.return_value = mock_now
+    unchanged = {
+        "user1_lc": {"easySolved": 5, "mediumSolved": 3, "hardSolved": 1},
+        "user2_lc": {"easySolved": 2, "mediumSolved": 0, "hardSolved": 0},
+    }
+
+    service = LeetCodeService(
+        "https://api.example.com", db_manager.db_path, scoring_scheme=HARD_HEAVY
+    )
+    service.leetcode_api.get_user_stats = Mock(side_effect=unchanged.get)
+
+    # Print mode rescores in memory only
+    users_to_tag, _, _ = service.check_and_update_progress(update_db=False)
+    assert [user.username for user in users_to_tag] == ["user1"]
+    assert db_manager.get_user("user1")["points"] == 14
+
+    service.check_and_update_progress(update_db=True)
+    db = db_manager.get_db()
+    assert db["user1"]["points"] == 19
+    assert db["user1"]["weekly_points"] == 6
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+from models import SourceLimits
+from source_scheduler import RateLimiter, SourceScheduler
+from stats_cache import StatsCache
+from stats_sources import StatsSource
+
+COUNTS = {"easySolved": 1, "mediumSolved": 0, "hardSolved": 0}
+
+
+class FakeSource(StatsSource):
+    name = "fake"
+
+    def __init__(self, limits=SourceLimits(), release=None):
+        self.limits = limits
+        self.release = release
+        self.batches = []
+
+    def fetch_batch(self, handles):
+        self.batches.append(sorted(handles))
+        if self.release is not None:
+            self.release.wait(5)
+        return {handle: COUNTS for handle in handles if handle != "missing"}
+
+
+def test_rate_limiter_spaces_requests():
+    """Test requests are spaced by the source's rate without sleeping when idle."""
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(0.5, clock=lambda: now[0], sleep=sleep)
+    limiter.wait()
+    limiter.wait()
+    now[0] += 1.0
+    limiter.wait()
+    now[0] += 10.0
+    limiter.wait()
+
+    assert sleeps == [2.0, 1.0]
+    # No limit never waits
+    RateLimiter(None, sleep=sleep).wait()
+    assert sleeps == [2.0, 1.0]
+
+
+def test_requests_queued_behind_a_busy_source_are_batched():
+    """Test requests waiting for the source's only slot go out together."""
+    release = threading.Event()
+    source = FakeSource(SourceLimits(max_batch=3, max_concurrency=1), release)
+    scheduler = SourceScheduler([source])
+
+    first = scheduler.submit("fake", "a")
+    while not source.batches:
+        time.sleep(0.01)
+    others = [scheduler.submit("fake", handle) for handle in "bcde"]
+    while len(scheduler._pending["fake"]) < 4:
+        time.sleep(0.01)
+    release.set()
+
+    assert [future.result(5) for future in [first, *others]] == [COUNTS] * 5
+    assert source.batches == [["a"], ["b", "c", "d"], ["e"]]
+
+
+def test_cached_counts_are_reused_but_fetches_not_cached(tmp_path):
+    """Test counts cached under the source's key skip the fetch, and fetches
+    don't grow the cache."""
+    source = FakeSource()
+    cache = StatsCache(str(tmp_path / "stats.json"))
+    cache.put("fake:alice", COUNTS)
+    scheduler = SourceScheduler([source], cache, max_age=60)
+
+    assert scheduler.fetch("fake", "alice") == COUNTS
+    assert scheduler.fetch("fake", "bob") == COUNTS
+    assert scheduler.fetch("fake", "missing") is None
+    assert source.batches == [["bob"], ["missing"]]
+    assert list(cache.entries) == ["fake:alice"]
+
+
+def test_source_errors_reach_the_caller():
+    """Test an exception from a source is raised by the fetch that asked for it."""
+
+    class BrokenSource(FakeSource):
+        def fetch_batch(self, handles):
+            raise RuntimeError("boom")
+
+    scheduler = SourceScheduler([BrokenSource()])
+
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.fetch("fake", "alice")
+
+
+def test_submit_linked_skips_unlinked_sources():
+    """Test only sources the user linked an account on are fetched."""
+    scheduler = SourceScheduler([FakeSource()])
+    user_data = {"lc_id": "alice_lc", "sources": {"fake": {"handle": "alice"}}}
+
+    futures = scheduler.submit_linked(user_data)
+    assert list(futures) == ["fake"]
+    assert futures["fake"].result(5) == COUNTS
+    # Submitting an account again shares the first fetch
+    assert scheduler.submit_linked(user_data)["fake"] is futures["fake"]
+    assert scheduler.submit_linked(user_data, skip=["fake"]) == {}
+    assert scheduler.submit_linked({"lc_id": "bob_lc"}) == {}
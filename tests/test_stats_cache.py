@@ -0,0 +1,45 @@
+import pytest
+import tempfile
+import os
+from stats_cache import StatsCache
+
+
+@pytest.fixture
+def cache_path():
+    """Create a temporary cache path for testing."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "stats_cache.json")
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+    os.rmdir(directory)
+
+
+def test_get_respects_max_age(cache_path):
+    """Test cached stats are only returned while fresh."""
+    cache = StatsCache(cache_path)
+    cache.put("user1_lc", {"easySolved": 1}, now=1000.0)
+
+    assert cache.get("user1_lc", max_age=60, now=1050.0) == {"easySolved": 1}
+    assert cache.get("user1_lc", max_age=60, now=1061.0) is None
+    assert cache.get("missing", max_age=60, now=1000.0) is None
+
+
+def test_save_and_load(cache_path):
+    """Test the cache round-trips through disk."""
+    cache = StatsCache(cache_path)
+    cache.put("user1_lc", {"easySolved": 1}, now=1000.0)
+    cache.save()
+
+    loaded = StatsCache(cache_path).load()
+    assert loaded.fetched_at("user1_lc") == 1000.0
+    assert loaded.fetched_at("missing") == 0.0
+
+
+def test_load_missing_or_corrupt(cache_path):
+    """Test a missing or corrupt cache file loads as empty."""
+    assert StatsCache(cache_path).load().entries == {}
+
+    with open(cache_path, "w") as f:
+        f.write("not json")
+    assert StatsCache(cache_path).load().entries == {}
@@ -0,0 +1,126 @@
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from stats_sources import (
+    AtCoderSource,
+    CodeforcesSource,
+    LeetCodeSource,
+    StatsSource,
+    create_sources,
+)
+
+
+def json_response(payload):
+    response = Mock()
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+def test_sources_must_fetch_batches():
+    """Test a source without fetch_batch can't be created."""
+
+    class Incomplete(StatsSource):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="fetch_batch"):
+        Incomplete()
+
+
+def test_source_handles():
+    """Test LeetCode uses lc_id and other sources use linked accounts."""
+    user_data = {"lc_id": "alice_lc", "sources": {"codeforces": {"handle": "alice"}}}
+
+    assert LeetCodeSource(Mock()).handle(user_data) == "alice_lc"
+    assert CodeforcesSource().handle(user_data) == "alice"
+    assert AtCoderSource().handle(user_data) is None
+    assert AtCoderSource().handle({"lc_id": None}) is None
+
+
+@patch("stats_sources.requests.get")
+def test_codeforces_counts_distinct_accepted_problems(mock_get):
+    """Test Codeforces problems are bucketed by rating and counted once."""
+    mock_get.return_value = json_response(
+        {
+            "status": "OK",
+            "result": [
+                {"verdict": "OK", "problem": {"contestId": 1, "index": "A"}},
+                {
+                    "verdict": "OK",
+                    "problem": {"contestId": 1, "index": "B", "rating": 1500},
+                },
+                {
+                    "verdict": "OK",
+                    "problem": {"contestId": 1, "index": "B", "rating": 1500},
+                },
+                {
+                    "verdict": "WRONG_ANSWER",
+                    "problem": {"contestId": 2, "index": "E", "rating": 2400},
+                },
+                {
+                    "verdict": "OK",
+                    "problem": {"contestId": 3, "index": "F", "rating": 2400},
+                },
+            ],
+        }
+    )
+
+    assert CodeforcesSource().fetch_batch(["alice"]) == {
+        "alice": {"easySolved": 1, "mediumSolved": 1, "hardSolved": 1}
+    }
+
+
+@patch("stats_sources.requests.get")
+def test_codeforces_unknown_handle(mock_get):
+    """Test a failed Codeforces request gives no counts."""
+    response = Mock()
+    response.raise_for_status.side_effect = requests.HTTPError("400 Bad Request")
+    mock_get.return_value = response
+
+    assert CodeforcesSource().get_solved("nobody") is None
+
+
+@patch("stats_sources.requests.get")
+def test_atcoder_pages_through_submissions(mock_get):
+    """Test AtCoder submissions are paged, waiting between requests."""
+    first_page = [
+        {
+            "problem_id": f"abc{i:03}_a",
+            "result": "AC",
+            "point": 100.0,
+            "epoch_second": i,
+        }
+        for i in range(AtCoderSource.page_size)
+    ]
+    second_page = [
+        {"problem_id": "abc001_c", "result": "AC", "point": 300.0, "epoch_second": 600},
+        {"problem_id": "abc001_f", "result": "WA", "point": 600.0, "epoch_second": 601},
+        {
+            "problem_id": "agc001_f",
+            "result": "AC",
+            "point": 1600.0,
+            "epoch_second": 602,
+        },
+    ]
+    mock_get.side_effect = [json_response(first_page), json_response(second_page)]
+    sleep = Mock()
+
+    counts = AtCoderSource(sleep=sleep).get_solved("alice")
+
+    assert counts == {"easySolved": 500, "mediumSolved": 1, "hardSolved": 1}
+    assert mock_get.call_args.kwargs["params"] == {
+        "user": "alice",
+        "from_second": AtCoderSource.page_size,
+    }
+    sleep.assert_called_once_with(1.0)
+
+
+def test_create_sources():
+    """Test sources are created from a comma-separated setting."""
+    sources = create_sources(" Codeforces,atcoder,".split(","))
+    assert [source.name for source in sources] == ["codeforces", "atcoder"]
+    assert create_sources([""]) == []
+
+    with pytest.raises(ValueError, match="Unknown stats source"):
+        create_sources(["topcoder"])
@@ -0,0 +1,87 @@
+import pytest
+import tempfile
+import json
+import os
+from unittest.mock import Mock
+from database import DatabaseManager
+from stats_cache import StatsCache
+from trickle_poller import TricklePoller
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for the database and cache."""
+    directory = tempfile.mkdtemp()
+    yield directory
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+@pytest.fixture
+def poller(temp_dir):
+    """Poller over a three-user database with a fake clock."""
+    db_path = os.path.join(temp_dir, "db.json")
+    with open(db_path, "w") as f:
+        json.dump(
+            {
+                "user1": {"lc_id": "user1_lc"},
+                "user2": {"lc_id": "user2_lc"},
+                "user3": {"goal": [1, "2025-12-31"]},  # No lc_id yet
+            },
+            f,
+        )
+
+    clock = Mock(return_value=1000.0)
+    api = Mock()
+    api.get_user_stats.side_effect = lambda lc_id: {"lc_id": lc_id}
+    cache = StatsCache(os.path.join(temp_dir, "stats_cache.json"))
+    return TricklePoller(
+        api, DatabaseManager(db_path), cache, period=60.0, sleep=Mock(), clock=clock
+    )
+
+
+def test_tracked_lc_ids_stalest_first(poller):
+    """Test users are refreshed starting with the stalest."""
+    poller.stats_cache.put("user1_lc", {}, now=500.0)
+
+    assert poller.tracked_lc_ids() == ["user2_lc", "user1_lc"]
+
+
+def test_run_cycle_spreads_fetches(poller):
+    """Test a cycle refreshes every user and sleeps period / users between them."""
+    refreshed = poller.run_cycle()
+
+    assert refreshed == 2
+    assert poller.sleep.call_count == 2
+    poller.sleep.assert_called_with(30.0)
+
+    cache = StatsCache(poller.stats_cache.cache_path).load()
+    assert cache.get("user1_lc", max_age=1, now=1000.0) == {"lc_id": "user1_lc"}
+
+
+def test_run_cycle_skips_failed_fetches(poller):
+    """Test failed fetches do not overwrite cached stats."""
+    poller.leetcode_api.get_user_stats.side_effect = lambda lc_id: None
+
+    assert poller.run_cycle() == 0
+    assert poller.stats_cache.entries == {}
+
+
+def test_cache_saved_in_batches(poller):
+    """Test the cache is written every few fetches and once more on shutdown."""
+    poller.stats_cache.save = Mock()
+    poller.save_every = 2
+
+    poller.poll_once("user1_lc")
+    poller.stats_cache.save.assert_not_called()
+    poller.poll_once("user2_lc")
+    assert poller.stats_cache.save.call_count == 1
+
+    poller.poll_once("user1_lc")
+    poller.save_every = 10
+    poller.sleep.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        poller.run()
+    # The cycle is interrupted, but the unsaved fetches are still written
+    assert poller.stats_cache.save.call_count == 2
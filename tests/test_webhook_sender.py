@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+from webhook_sender import WebhookSender, DiscordRestError
+from models import UserToTag, LeaderboardEntry
+
+
+class FakeResponse:
+    def __init__(self, status, data=None):
+        self.status = status
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+    async def text(self):
+        return str(self.data)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Records requests and answers them like the Discord REST API."""
+
+    def __init__(self, members=None, fail_posts=0, fail_searches=0, channel_status=200):
+        self.members = members or {}
+        self.fail_posts = fail_posts
+        self.fail_searches = fail_searches
+        self.channel_status = channel_status
+        self.requests = []
+
+    def request(self, method, url, headers=None, json=None):
+        self.requests.append((method, url, headers, json))
+        if method == "GET" and url.endswith("/channels/42"):
+            if self.channel_status != 200:
+                return FakeResponse(self.channel_status, "forbidden")
+            return FakeResponse(200, {"id": "42", "guild_id": "7"})
+        if method == "GET" and "/members/search" in url:
+            if self.fail_searches:
+                self.fail_searches -= 1
+                return FakeResponse(429, {"retry_after": 0.5})
+            query = url.split("query=")[1].split("&")[0]
+            member_id = self.members.get(query)
+            users = [{"user": {"username": query, "id": str(member_id)}}]
+            return FakeResponse(200, users if member_id else [])
+        if method == "POST":
+            if self.fail_posts:
+                self.fail_posts -= 1
+                return FakeResponse(429, {"retry_after": 0})
+            return FakeResponse(204)
+        return FakeResponse(404, "not found")
+
+    def posted(self):
+        return [
+            json["content"] for method, _, _, json in self.requests if method == "POST"
+        ]
+
+
+@pytest.mark.asyncio
+async def test_send_tags_over_rest():
+    """Test tags are posted to the channel endpoint, mentioning resolved members."""
+    session = FakeSession(members={"user1": 111})
+    sender = WebhookSender("token", 42, session=session)
+
+    await sender.send_tags(
+        [UserToTag(username="user1", daily_goal=1), UserToTag("ghost", 2)]
+    )
+
+    assert session.posted() == [
+        "@everyone <@111> has failed to gain 1 point yesterday, this is why they are unemployed",
+        "@everyone ghost has failed to gain 2 points yesterday, this is why they are unemployed",
+    ]
+    post = [r for r in session.requests if r[0] == "POST"][0]
+    assert post[1] == "https://discord.com/api/v10/channels/42/messages"
+    assert post[2] == {"Authorization": "Bot token"}
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_sent_before_tags_through_webhook():
+    """Test webhook posts skip the bot token and put the leaderboard first."""
+    session = FakeSession(members={"user1": 111, "user2": 222})
+    sender = WebhookSender(
+        "token", 42, webhook_url="https://hooks.example/abc", session=session
+    )
+
+    sender.queue_tags([UserToTag(username="user2", daily_goal=3)])
+    sender.queue_leaderboard(
+        [LeaderboardEntry("user1", 5), LeaderboardEntry("user2", 0)]
+    )
+    await sender.flush_messages()
+
+    posted = session.posted()
+    assert posted[0].startswith("# 🏆 Leaderboard 🏆\n1. <@111> - `5 pts`")
+    assert "<@222>" in posted[0]
+    assert posted[1].startswith("@everyone <@222> has failed to gain 3 points")
+
+    posts = [r for r in session.requests if r[0] == "POST"]
+    assert all(url == "https://hooks.example/abc" for _, url, _, _ in posts)
+    assert all(headers == {} for _, _, headers, _ in posts)
+
+
+@pytest.mark.asyncio
+async def test_webhook_without_token_tags_by_name():
+    """Test tags still go out, unmentioned, when members can't be looked up."""
+    session = FakeSession(members={"user1": 111})
+    sender = WebhookSender(
+        None, 42, webhook_url="https://hooks.example/abc", session=session
+    )
+
+    await sender.send_tags([UserToTag("user1", 2)])
+
+    assert session.posted() == [
+        "@everyone user1 has failed to gain 2 points yesterday, this is why they are unemployed"
+    ]
+    assert not [r for r in session.requests if r[0] == "GET"]
+
+
+@pytest.mark.asyncio
+async def test_member_lookups_are_cached():
+    """Test each username is only searched for once per sender."""
+    session = FakeSession(members={"user1": 111})
+    sender = WebhookSender("token", 42, session=session)
+
+    await sender.send_tags([UserToTag("user1", 1)])
+    await sender.send_tags([UserToTag("user1", 1)])
+
+    searches = [r for r in session.requests if "/members/search" in r[1]]
+    assert len(searches) == 1
+    assert len(session.posted()) == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_lookups_wait_and_failures_are_not_cached():
+    """Test a 429 search waits retry_after, and a lookup that gives up is retried later."""
+    session = FakeSession(members={"user1": 111}, fail_searches=3)
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    sender = WebhookSender("token", 42, session=session, sleep=sleep)
+
+    guild = await sender.resolve_guild(["user1"])
+    assert guild.members == []
+    assert sleeps == [0.5, 0.5]
+
+    guild = await sender.resolve_guild(["user1"])
+    assert [member.id for member in guild.members] == [111]
+
+
+@pytest.mark.asyncio
+async def test_member_lookups_are_bounded():
+    """Test only a few member searches run at once."""
+    session = FakeSession()
+    sender = WebhookSender("token", 42, session=session, max_concurrent_lookups=2)
+    running = []
+    request = sender._request
+
+    async def tracked_request(method, url, **kwargs):
+        running.append(url)
+        assert len(running) <= 2
+        await asyncio.sleep(0)
+        result = await request(method, url, **kwargs)
+        running.remove(url)
+        return result
+
+    sender._request = tracked_request
+    await sender.resolve_guild([f"user{i}" for i in range(10)])
+
+    assert len([r for r in session.requests if "/members/search" in r[1]]) == 10
+
+
+@pytest.mark.asyncio
+async def test_guild_lookup_failure_falls_back_to_usernames():
+    """Test the leaderboard is still posted, unmentioned, when the guild can't be found."""
+    session = FakeSession(members={"user1": 111}, channel_status=403)
+    sender = WebhookSender("token", 42, session=session)
+
+    await sender.send_leaderboard([LeaderboardEntry("user1", 5)])
+
+    assert session.posted() == ["# 🏆 Leaderboard 🏆\n1. user1 - `5 pts`\n"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_post_is_retried():
+    """Test a 429 from Discord is retried by the scheduler."""
+    session = FakeSession(members={"user1": 111}, fail_posts=1)
+    sender = WebhookSender("token", 42, session=session)
+
+    await sender.send_tags([UserToTag("user1", 1)])
+
+    assert len([r for r in session.requests if r[0] == "POST"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_request_errors_raise_discord_rest_error():
+    """Test non-success responses surface as DiscordRestError."""
+    sender = WebhookSender("token", 42, session=FakeSession())
+
+    with pytest.raises(DiscordRestError) as error:
+        await sender._request("GET", "https://discord.com/api/v10/unknown")
+    assert error.value.status == 404